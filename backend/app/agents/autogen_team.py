@@ -1,8 +1,3 @@
-try:
-    from autogen import AssistantAgent
-except Exception:
-    AssistantAgent = None
-
 # Import system prompts from individual agents
 from app.agents.requirements_agent import REQUIREMENTS_SYSTEM_PROMPT
 from app.agents.diagram_agent import DIAGRAM_SYSTEM_PROMPT
@@ -17,7 +12,9 @@ def build_team(model="gpt-4o-mini"):
     Each agent has a specific role and expertise, working together through the orchestration
     layer (LangGraph) to transform a user's idea into comprehensive project documentation.
     """
-    if AssistantAgent is None:
+    try:
+        from autogen import AssistantAgent
+    except Exception:
         return None
     
     base_config = {
@@ -1,5 +1,6 @@
-from app.llm.provider import llm_call
-import json
+from app.agents.schemas import DiagramsOutput
+from app.llm.prompts import ChatPrompt
+from app.llm.structured import generate_structured
 from typing import Dict, Any
 
 DIAGRAM_SYSTEM_PROMPT = """You are a world-class Software Architect and System Designer with 25+ years of experience designing systems for companies like Google, Amazon, and Netflix. You are an absolute expert in creating React Flow diagrams for interactive, editable visualizations.
@@ -291,12 +292,7 @@ Before outputting JSON, verify:
 - ✅ Each diagram has: title, type, nodes[], edges[]"""
 
 
-async def generate_diagrams(idea: str) -> str:
-    """
-    Generates React Flow-compatible JSON diagrams for the given project idea.
-    Returns a JSON string containing 4 diagram definitions: class, sequence, activity, usecase.
-    """
-    output_structure = """{
+DIAGRAM_OUTPUT_STRUCTURE = """{
   "class": {
     "title": "Class Diagram",
     "type": "class",
@@ -398,19 +394,13 @@ async def generate_diagrams(idea: str) -> str:
     ]
   }
 }"""
-    
-    # Separate f-string from DIAGRAM_SYSTEM_PROMPT to avoid nested brace issues
-    prompt = DIAGRAM_SYSTEM_PROMPT + f"""
-
----
-
-## PROJECT IDEA TO DIAGRAM:
 
-{idea}
+DIAGRAM_PROMPT = ChatPrompt(
+    system=DIAGRAM_SYSTEM_PROMPT + """
 
 ---
 
-Now, generate comprehensive React Flow UML diagrams for this project in JSON format.
+Generate comprehensive React Flow UML diagrams in JSON format for the project idea given by the user.
 
 REQUIREMENTS:
 1. Generate ALL 4 diagrams: Class, Sequence, Activity, Use Case
@@ -427,77 +417,62 @@ Think about:
 - Use Case: Who are the actors and what can they do?
 
 OUTPUT STRUCTURE EXAMPLE:
-{output_structure}
+""" + DIAGRAM_OUTPUT_STRUCTURE,
+    user_template="""## PROJECT IDEA TO DIAGRAM:
+
+{idea}
+
+---
+
+OUTPUT ONLY VALID, COMPLETE JSON WITH ALL 4 DIAGRAMS:""",
+)
 
-OUTPUT ONLY VALID, COMPLETE JSON WITH ALL 4 DIAGRAMS:"""
-    
-    return await llm_call(prompt)
+
+async def generate_diagrams(idea: str, on_token=None, use_cache: bool = True) -> DiagramsOutput:
+    """
+    Generates React Flow-compatible JSON diagrams for the given project idea.
+    Returns the 4 validated diagram definitions: class, sequence, activity, usecase.
+    """
+    return await generate_structured(DIAGRAM_PROMPT, DiagramsOutput, on_token=on_token, use_cache=use_cache, idea=idea)
 
 
 async def generate_diagrams_with_validation(idea: str) -> Dict[str, Any]:
     """
-    Generates React Flow diagrams with JSON validation and error handling.
+    Generates React Flow diagrams with strict structure validation.
     Returns parsed JSON with 4 diagrams (class, sequence, activity, usecase).
     """
-    raw_response = await generate_diagrams(idea)
-    
-    # Clean the response - remove any markdown code blocks if present
-    cleaned = raw_response.strip()
-    if cleaned.startswith("```"):
-        # Remove markdown code block
-        lines = cleaned.split("\n")
-        if lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines[-1].strip() == "```":
-            lines = lines[:-1]
-        cleaned = "\n".join(lines)
-    
-    try:
-        parsed = json.loads(cleaned)
-        
-        # Validate top-level structure - must have all 4 diagram types
-        required_diagrams = ["class", "sequence", "activity", "usecase"]
-        for diagram_type in required_diagrams:
-            if diagram_type not in parsed:
-                raise ValueError(f"Missing required diagram type: '{diagram_type}'")
-        
-        # Validate each diagram structure
-        for diagram_type in required_diagrams:
-            diagram = parsed[diagram_type]
-            
-            # Check required fields
-            if "title" not in diagram:
-                raise ValueError(f"{diagram_type} diagram missing 'title' field")
-            if "type" not in diagram:
-                raise ValueError(f"{diagram_type} diagram missing 'type' field")
-            if "nodes" not in diagram:
-                raise ValueError(f"{diagram_type} diagram missing 'nodes' array")
-            if "edges" not in diagram:
-                raise ValueError(f"{diagram_type} diagram missing 'edges' array")
-            
-            # Validate nodes have required properties
-            for i, node in enumerate(diagram["nodes"]):
-                required_node_fields = ["id", "type", "position", "data", "width", "height"]
-                for field in required_node_fields:
-                    if field not in node:
-                        raise ValueError(f"{diagram_type} diagram node {i} missing '{field}' field")
-            
-            # Validate edges have required properties
-            for i, edge in enumerate(diagram["edges"]):
-                required_edge_fields = ["id", "source", "target", "type", "style"]
-                for field in required_edge_fields:
-                    if field not in edge:
-                        raise ValueError(f"{diagram_type} diagram edge {i} missing '{field}' field")
-        
-        # Validate all node IDs are unique across ALL diagrams
-        all_node_ids = []
-        for diagram_type in required_diagrams:
-            all_node_ids.extend([node["id"] for node in parsed[diagram_type]["nodes"]])
-        
-        if len(all_node_ids) != len(set(all_node_ids)):
-            raise ValueError("Duplicate node IDs found across diagrams")
-        
-        return parsed
-        
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON response: {e.msg} at position {e.pos}")
+    parsed = (await generate_diagrams(idea)).model_dump(by_alias=True)
+
+    required_diagrams = ["class", "sequence", "activity", "usecase"]
+    for diagram_type in required_diagrams:
+        diagram = parsed[diagram_type]
+
+        # Check required fields
+        if not diagram.get("title"):
+            raise ValueError(f"{diagram_type} diagram missing 'title' field")
+        if not diagram.get("type"):
+            raise ValueError(f"{diagram_type} diagram missing 'type' field")
+
+        # Validate nodes have required properties
+        for i, node in enumerate(diagram["nodes"]):
+            required_node_fields = ["id", "type", "position", "data", "width", "height"]
+            for field in required_node_fields:
+                if field not in node:
+                    raise ValueError(f"{diagram_type} diagram node {i} missing '{field}' field")
+
+        # Validate edges have required properties
+        for i, edge in enumerate(diagram["edges"]):
+            required_edge_fields = ["id", "source", "target", "type", "style"]
+            for field in required_edge_fields:
+                if field not in edge:
+                    raise ValueError(f"{diagram_type} diagram edge {i} missing '{field}' field")
+
+    # Validate all node IDs are unique across ALL diagrams
+    all_node_ids = []
+    for diagram_type in required_diagrams:
+        all_node_ids.extend([node["id"] for node in parsed[diagram_type]["nodes"]])
+
+    if len(all_node_ids) != len(set(all_node_ids)):
+        raise ValueError("Duplicate node IDs found across diagrams")
+
+    return parsed
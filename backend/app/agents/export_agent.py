@@ -1,7 +1,10 @@
 # DEPRECATED: Export agent no longer uses MinIO storage
 # Content is stored directly in state and returned via API
 # from app.agents.tools.storage_tools import put_text
+from app.agents.schemas import ExportOutput
 from app.llm.provider import llm_call
+from app.llm.prompts import ChatPrompt
+from app.llm.structured import generate_structured
 
 EXPORT_SYSTEM_PROMPT = """You are a world-class Technical Documentation Specialist and Content Architect with expertise in creating professional, publication-ready documentation for software projects.
 
@@ -101,21 +104,18 @@ Transform raw project artifacts (requirements, diagrams, plans) into a polished,
 *This document was automatically generated by the AI Blueprint System.*"""
 
 
-async def consolidate_and_export(
-    project_id: int,
-    requirements_content: str,
-    diagrams_content: str, 
-    plan_content: str,
-    project_name: str = "Project"
-) -> str:
-    """
-    Consolidates all project artifacts into a unified, professional document.
-    """
-    prompt = f"""{EXPORT_SYSTEM_PROMPT}
+EXPORT_CONSOLIDATE_PROMPT = ChatPrompt(
+    system=EXPORT_SYSTEM_PROMPT + """
 
 ---
 
-## INPUT ARTIFACTS TO CONSOLIDATE:
+From the input artifacts given by the user, create a unified, professional project blueprint document that:
+1. Synthesizes all the artifacts into a cohesive narrative
+2. Adds an executive summary highlighting key insights
+3. Ensures consistent formatting throughout
+4. Adds cross-references between sections
+5. Is ready for immediate stakeholder distribution""",
+    user_template="""## INPUT ARTIFACTS TO CONSOLIDATE:
 
 ### REQUIREMENTS DOCUMENT:
 {requirements_content}
@@ -128,17 +128,30 @@ async def consolidate_and_export(
 
 ---
 
-Now, create a unified, professional project blueprint document that:
-1. Synthesizes all the above into a cohesive narrative
-2. Adds an executive summary highlighting key insights
-3. Ensures consistent formatting throughout
-4. Adds cross-references between sections
-5. Is ready for immediate stakeholder distribution
-
 Project Name: {project_name}
-"""
-    
-    consolidated = await llm_call(prompt)
+""",
+)
+
+
+async def consolidate_and_export(
+    project_id: int,
+    requirements_content: str,
+    diagrams_content: str, 
+    plan_content: str,
+    project_name: str = "Project"
+) -> str:
+    """
+    Consolidates all project artifacts into a unified, professional document.
+    """
+    consolidated = await llm_call(
+        EXPORT_CONSOLIDATE_PROMPT.format(
+            requirements_content=requirements_content,
+            diagrams_content=diagrams_content,
+            plan_content=plan_content,
+            project_name=project_name,
+        ),
+        system=EXPORT_CONSOLIDATE_PROMPT.system,
+    )
     return consolidated
 
 
@@ -258,28 +271,10 @@ EXPORT_JSON_OUTPUT_STRUCTURE = """{
 }"""
 
 
-async def generate_export_json(idea: str, requirements: str, diagrams_json: str, planner_json: str) -> str:
-    """
-    Generates structured JSON output for project export documentation.
-    Returns JSON string with document structure and GitHub export templates.
-    """
-    prompt = f"""You are a world-class Technical Documentation Specialist and Project Architect.
-
-Your task is to analyze the project artifacts below and generate a comprehensive export document in JSON format.
-
-## PROJECT IDEA:
-
-{idea}
-
-## REQUIREMENTS (Text):
-
-{requirements}
-
-## PLANNER DATA (JSON):
-
-{planner_json}
+EXPORT_JSON_PROMPT = ChatPrompt(
+    system="""You are a world-class Technical Documentation Specialist and Project Architect.
 
----
+Your task is to analyze the project artifacts given by the user and generate a comprehensive export document in JSON format.
 
 ## YOUR TASK:
 
@@ -313,8 +308,36 @@ Generate a complete project export document as a JSON object with the following
 Return ONLY valid JSON - no markdown, no code blocks, no explanations.
 
 EXAMPLE STRUCTURE:
-{EXPORT_JSON_OUTPUT_STRUCTURE}
+""" + EXPORT_JSON_OUTPUT_STRUCTURE,
+    user_template="""## PROJECT IDEA:
+
+{idea}
 
-Now generate the complete export document JSON for the project above. Be thorough, professional, and aligned with the provided artifacts."""
-    
-    return await llm_call(prompt)
+## REQUIREMENTS (Text):
+
+{requirements}
+
+## PLANNER DATA (JSON):
+
+{planner_json}
+
+---
+
+Now generate the complete export document JSON for the project above. Be thorough, professional, and aligned with the provided artifacts.""",
+)
+
+
+async def generate_export_json(idea: str, requirements: str, diagrams_json: str, planner_json: str, on_token=None, use_cache: bool = True) -> ExportOutput:
+    """
+    Generates structured JSON output for project export documentation.
+    Returns the validated document structure and GitHub export templates.
+    """
+    return await generate_structured(
+        EXPORT_JSON_PROMPT,
+        ExportOutput,
+        on_token=on_token,
+        use_cache=use_cache,
+        idea=idea,
+        requirements=requirements,
+        planner_json=planner_json,
+    )
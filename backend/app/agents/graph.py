@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from langgraph.graph import StateGraph, END
+import time
+from typing import Awaitable, Callable, Iterable, Optional
 from uuid import UUID
 
-from app.agents.state import BlueprintState
+from app.core import tracing
+from app.core.config import settings
+from app.core.metrics import current_agent, observe_node
+from app.core.events import emit_run_event
+from app.agents.state import BlueprintState, json_content
+from app.repositories import runs_repo
 from app.agents.nodes import (
     node_metadata,
     node_requirements,
@@ -14,27 +20,200 @@ from app.agents.nodes import (
     make_initial_state,
 )
 
-def build_graph():
+# Etapes LLM qui ne lisent que state["idea"] : elles peuvent tourner en parallèle
+PARALLEL_STAGES = ("REQUIREMENTS", "DIAGRAMS", "PLANNER")
+
+NODES = {
+    "METADATA": node_metadata,
+    "REQUIREMENTS": node_requirements,
+    "DIAGRAMS": node_diagrams,
+    "PLANNER": node_planner,
+    "EXPORT": node_export,
+    "PERSIST": node_persist_to_collections,
+}
+
+# Artefacts régénérables individuellement (POST /v1/idea/regenerate) -> noeud LLM
+REGENERABLE_STAGES = {
+    "metadata": "METADATA",
+    "requirements": "REQUIREMENTS",
+    "diagrams": "DIAGRAMS",
+    "plan": "PLANNER",
+    "export": "EXPORT",
+}
+
+# Sortie qui fait d'un noeud un noeud terminé (checkpoint) : un noeud dont la
+# sortie LLM reste invalide ne la renvoie pas et sera ré-exécuté à la reprise
+NODE_OUTPUT_KEYS = {
+    "METADATA": "project_name",
+    "REQUIREMENTS": "requirements_data",
+    "DIAGRAMS": "diagrams_data",
+    "PLANNER": "planner_data",
+    "EXPORT": "export_data",
+    "PERSIST": "persisted_ids",
+}
+
+# Clés du state produites par chaque noeud LLM (sortie parsée + texte des runs antérieurs)
+STAGE_OUTPUTS = {
+    "METADATA": ("project_name", "project_description"),
+    "REQUIREMENTS": ("requirements_data", "requirements_content"),
+    "DIAGRAMS": ("diagrams_data", "diagrams_json_content", "diagrams_content", "architecture", "uml_sequence"),
+    "PLANNER": ("planner_data", "planner_json_content"),
+    "EXPORT": ("export_data", "export_json_content", "export_content", "blueprint_markdown"),
+}
+
+
+NodeFn = Callable[[BlueprintState], Awaitable[dict]]
+
+# Observateurs appelés à la fin de chaque noeud exécuté :
+# observer(node_name, run_id, seconds, error) - error est None si le noeud a réussi
+NodeObserver = Callable[[str, UUID, float, Optional[BaseException]], None]
+_node_observers: list[NodeObserver] = []
+
+
+def add_node_observer(observer: NodeObserver) -> None:
+    _node_observers.append(observer)
+
+
+def remove_node_observer(observer: NodeObserver) -> None:
+    if observer in _node_observers:
+        _node_observers.remove(observer)
+
+
+def _notify_node_observers(name: str, run_id: UUID, seconds: float, error: Optional[BaseException]) -> None:
+    for observer in list(_node_observers):
+        try:
+            observer(name, run_id, seconds, error)
+        except Exception as e:
+            print(f"[GRAPH] node observer failed: {e}")
+
+
+# Durées des noeuds exportées en métriques Prometheus (app/core/metrics.py)
+add_node_observer(observe_node)
+
+
+def checkpointed(name: str, fn: NodeFn, completed: frozenset[str] = frozenset()) -> NodeFn:
+    """
+    Enveloppe un noeud :
+    - s'il figure dans `completed` (run repris), il n'est pas ré-exécuté : ses
+      sorties ont déjà été restaurées dans le state initial ;
+    - sinon ses sorties sont sauvegardées dans le run avec le marqueur du noeud
+      (runs_repo.save_node_checkpoint) dès qu'il termine, et sa durée
+      (checkpoint compris) est passée aux observateurs (add_node_observer) ;
+    - un noeud qui n'a pas produit sa sortie (NODE_OUTPUT_KEYS) est marqué en
+      échec et non terminé : une reprise du run le ré-exécute.
+    """
+    async def node(state: BlueprintState) -> dict:
+        run_id = state["run_id"]
+        if name in completed:
+            print(f"[GRAPH] {name} already completed for run {run_id}, skipping (checkpoint)")
+            await emit_run_event(run_id, f"Resumed: {name} (checkpoint)")
+            return {}
+        # Appels LLM du noeud attribués à cet agent (métriques)
+        agent = current_agent.set(name.lower())
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"node {name}", **{"run.id": str(run_id), "pipeline.node": name}):
+                updates = await fn(state)
+                produced = (updates or {}).get(NODE_OUTPUT_KEYS.get(name)) is not None
+                if not produced:
+                    print(f"[GRAPH] {name} produced no output for run {run_id}, not checkpointed as completed")
+                await runs_repo.save_node_checkpoint(run_id, name, updates, completed=produced)
+        except BaseException as e:
+            _notify_node_observers(name, run_id, time.perf_counter() - started, e)
+            raise
+        finally:
+            current_agent.reset(agent)
+        _notify_node_observers(name, run_id, time.perf_counter() - started, None)
+        return updates
+
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
+
+
+def _pipeline_levels(parallel: bool) -> list[list[str]]:
+    """Noeuds du pipeline groupés par super-step, dans l'ordre d'exécution."""
+    if parallel:
+        return [["METADATA"], list(PARALLEL_STAGES), ["EXPORT"], ["PERSIST"]]
+    return [[name] for name in NODES]
+
+
+def build_graph(
+    parallel: bool | None = None,
+    completed_nodes: Iterable[str] = (),
+    stages: Iterable[str] | None = None,
+):
+    """
+    Construit le graphe du pipeline.
+
+    - Mode séquentiel : METADATA → REQUIREMENTS → DIAGRAMS → PLANNER → EXPORT → PERSIST
+    - Mode parallèle : METADATA → (REQUIREMENTS | DIAGRAMS | PLANNER) → EXPORT → PERSIST
+      Les trois branches s'exécutent dans le même super-step et se rejoignent
+      avant EXPORT ; les reducers de BlueprintState fusionnent leurs sorties.
+
+    `parallel=None` utilise PIPELINE_PARALLEL (settings).
+    `completed_nodes` : noeuds déjà terminés lors d'une tentative précédente du run.
+    `stages` : graphe partiel (régénération) - seuls ces noeuds, puis PERSIST,
+    sont ajoutés, dans le même ordre ; ex. ["DIAGRAMS"] => DIAGRAMS → PERSIST.
+    Les sorties des autres noeuds doivent déjà être dans le state initial.
+    """
+    if parallel is None:
+        parallel = settings.pipeline_parallel
+    completed = frozenset(completed_nodes)
+    selected = set(NODES) if stages is None else set(stages) | {"PERSIST"}
+    unknown = selected - set(NODES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {sorted(unknown)}")
+
+    # LangGraph n'est chargé qu'à la construction du premier graphe (jobs)
+    from langgraph.graph import StateGraph, START, END
+
     g = StateGraph(BlueprintState)
 
-    g.add_node("METADATA", node_metadata)
-    g.add_node("REQUIREMENTS", node_requirements)
-    g.add_node("DIAGRAMS", node_diagrams)
-    g.add_node("PLANNER", node_planner)
-    g.add_node("EXPORT", node_export)
-    g.add_node("PERSIST", node_persist_to_collections)
-
-    g.set_entry_point("METADATA")
-    g.add_edge("METADATA", "REQUIREMENTS")
-    g.add_edge("REQUIREMENTS", "DIAGRAMS")
-    g.add_edge("DIAGRAMS", "PLANNER")
-    g.add_edge("PLANNER", "EXPORT")
-    g.add_edge("EXPORT", "PERSIST")
-    g.add_edge("PERSIST", END)
+    levels = [
+        [name for name in level if name in selected]
+        for level in _pipeline_levels(parallel)
+    ]
+    levels = [level for level in levels if level]
+
+    for level in levels:
+        for name in level:
+            g.add_node(name, checkpointed(name, NODES[name], completed))
+
+    previous: list[str] = [START]
+    for level in levels:
+        if len(previous) > 1:
+            # Jointure : le noeud suivant attend la fin de toutes les branches
+            g.add_edge(previous, level[0])
+        else:
+            for name in level:
+                g.add_edge(previous[0], name)
+        previous = level
+    g.add_edge(previous[0], END)
 
     return g.compile()
 
 
+def make_regeneration_state(source_state: dict, stages: Iterable[str], idea: str) -> dict:
+    """
+    State initial (stocké dans le nouveau run) d'une régénération partielle :
+    sorties des noeuds et persisted_ids repris du run source, sans ses
+    checkpoints, + la liste des noeuds à ré-exécuter.
+    Les sorties source des noeuds ré-exécutés ne sont pas reprises : si l'un
+    d'eux échoue, PERSIST n'a rien à réécrire pour lui.
+    """
+    dropped = {key for stage in stages for key in STAGE_OUTPUTS.get(stage, ())}
+    state = {
+        key: value
+        for key, value in (source_state or {}).items()
+        if key in BlueprintState.__annotations__
+        and key not in ("project_id", "run_id", "idea", "regenerate")
+        and key not in dropped
+    }
+    state["idea"] = idea
+    state["regenerate"] = [name for name in NODES if name in set(stages)]
+    return state
+
+
 async def run_blueprint_pipeline(
     project_id: str,
     run_id: UUID,
@@ -43,21 +222,41 @@ async def run_blueprint_pipeline(
     """
     Execute le pipeline complet d'agents pour générer un blueprint.
     MongoDB async - plus besoin de session SQL.
-    """
-    graph = build_graph()
 
+    Reprise : si le run a déjà des noeuds terminés (job relancé après un timeout
+    ou un redémarrage du worker), leurs sorties sont rechargées depuis le run et
+    seuls les noeuds restants s'exécutent.
+    """
     state: BlueprintState = make_initial_state(
         project_id=project_id,
         run_id=run_id,
         idea=idea,
     )
 
+    completed_nodes: list[str] = []
+    run = await runs_repo.get_run(run_id)
+    if run and run.state:
+        completed_nodes = list(run.state.get("completed_nodes") or [])
+        for key in BlueprintState.__annotations__:
+            if key not in ("project_id", "run_id", "idea") and run.state.get(key) is not None:
+                state[key] = run.state[key]
+        if completed_nodes:
+            print(f"[GRAPH] Resuming run {run_id}, completed nodes: {completed_nodes}")
+
+    # Régénération : seuls les noeuds demandés (+ PERSIST) sont exécutés, les
+    # sorties des autres ont été copiées depuis le run source (voir regenerate)
+    stages = state.get("regenerate") or None
+    if stages:
+        print(f"[GRAPH] Partial run {run_id}: {stages} -> PERSIST")
+
+    graph = build_graph(completed_nodes=completed_nodes, stages=stages)
+
     final_state: BlueprintState = await graph.ainvoke(state)
     return {
         "blueprint_markdown": final_state.get("blueprint_markdown"),
-        "requirements": final_state.get("requirements_content"),
+        "requirements": json_content(final_state, "requirements_content"),
         "diagrams": final_state.get("diagrams_content"),
-        "diagrams_json": final_state.get("diagrams_json_content"),
-        "plan_json": final_state.get("planner_json_content"),
-        "export_json": final_state.get("export_json_content"),
+        "diagrams_json": json_content(final_state, "diagrams_json_content"),
+        "plan_json": json_content(final_state, "planner_json_content"),
+        "export_json": json_content(final_state, "export_json_content"),
     }
@@ -1,5 +1,6 @@
-import json
-from app.llm.provider import llm_call
+from app.agents.schemas import MetadataOutput
+from app.llm.prompts import ChatPrompt
+from app.llm.structured import StructuredOutputError, generate_structured
 
 METADATA_SYSTEM_PROMPT = """You are an expert project naming and branding consultant. Your task is to analyze a project idea and generate professional, concise project metadata.
 
@@ -45,64 +46,38 @@ Output:
 
 Remember: Return ONLY the JSON object, nothing else."""
 
+METADATA_PROMPT = ChatPrompt(
+    system=METADATA_SYSTEM_PROMPT,
+    user_template="""## PROJECT IDEA TO ANALYZE:
 
-async def generate_project_metadata(idea: str) -> dict:
+{idea}
+
+---
+
+Generate the project metadata JSON now:""",
+)
+
+
+async def generate_project_metadata(idea: str, use_cache: bool = True) -> dict:
     """
     Generate project name and description from the user's idea using LLM.
     
     Args:
         idea: The user's project idea/description
+        use_cache: False to force a fresh LLM answer (regeneration)
         
     Returns:
         dict with keys: 'name' and 'description'
         
-    Raises:
-        ValueError: If LLM response is not valid JSON or missing required fields
+    Falls back to values derived from the idea if the LLM output stays invalid.
     """
-    prompt = f"""{METADATA_SYSTEM_PROMPT}
-
----
-
-## PROJECT IDEA TO ANALYZE:
-
-{idea}
-
----
-
-Generate the project metadata JSON now:"""
-    
     try:
-        response = await llm_call(prompt)
-        
-        # Clean response (remove markdown code blocks if present)
-        response = response.strip()
-        if response.startswith("```json"):
-            response = response[7:]
-        if response.startswith("```"):
-            response = response[3:]
-        if response.endswith("```"):
-            response = response[:-3]
-        response = response.strip()
-        
-        # Parse JSON
-        metadata = json.loads(response)
-        
-        # Validate required fields
-        if "name" not in metadata or "description" not in metadata:
-            raise ValueError("Missing required fields: name or description")
-        
-        # Validate field lengths
-        if len(metadata["name"]) > 60:
-            metadata["name"] = metadata["name"][:60].strip()
-        
-        if len(metadata["description"]) > 200:
-            metadata["description"] = metadata["description"][:200].strip()
-        
-        return metadata
-        
-    except json.JSONDecodeError as e:
+        metadata = await generate_structured(METADATA_PROMPT, MetadataOutput, use_cache=use_cache, idea=idea)
+        return metadata.model_dump()
+
+    except StructuredOutputError as e:
         # Fallback: extract from idea
-        print(f"[METADATA_AGENT] JSON decode error: {e}. Using fallback.")
+        print(f"[METADATA_AGENT] Invalid output: {e}. Using fallback.")
         return {
             "name": idea[:60].strip() if len(idea) <= 60 else idea[:57].strip() + "...",
             "description": idea[:200].strip() if len(idea) <= 200 else idea[:197].strip() + "..."
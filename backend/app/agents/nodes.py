@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import cast
-import json
+from typing import Optional, cast
 from uuid import UUID
 
-from app.agents.state import BlueprintState
+from pydantic import BaseModel
+
+from app.agents.state import BlueprintState, JSON_CONTENT_KEYS, json_content
 from app.agents.requirements_agent import generate_requirements
 from app.agents.diagram_agent import generate_diagrams
 from app.agents.planner_agent import generate_plan_json
@@ -12,8 +13,10 @@ from app.agents.export_agent import generate_export_json
 from app.agents.metadata_agent import generate_project_metadata
 # from app.agents.export_agent import export_markdown  # COMMENTED: No longer using MinIO
 # from app.agents.tools.db_tools import persist_artifact  # DEPRECATED: MongoDB async
-from app.core.events import publish
-from app.repositories import runs_repo  # MongoDB version
+from app.agents.streaming import RunStreamPublisher
+from app.core.events import emit_run_event
+from app.llm.structured import StructuredOutputError, parse_json
+from app.repositories.embedded_items import stable_object_id
 
 
 # ------------------------------------------------------------
@@ -44,6 +47,12 @@ def make_initial_state(project_id: str, run_id: UUID, idea: str) -> BlueprintSta
         "planner_json_content": None,
         "export_content": None,
         "export_json_content": None,
+
+        # Sorties parsées des agents (JSON validé)
+        "requirements_data": None,
+        "diagrams_data": None,
+        "planner_data": None,
+        "export_data": None,
         
         # MinIO URIs (COMMENTED - not used anymore)
         # "requirements_uri": None,
@@ -54,40 +63,60 @@ def make_initial_state(project_id: str, run_id: UUID, idea: str) -> BlueprintSta
         # "result_uri": None,
         
         "blueprint_markdown": None,
+
+        "regenerate": None,
+        "persisted_ids": None,
     }
     return state
 
 
+def _dump(output: BaseModel) -> dict:
+    """Sortie validée -> dict JSON stocké dans le state (checkpointé dans le run)."""
+    return output.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+def _use_cache(state: BlueprintState, node: str) -> bool:
+    # Noeud régénéré (POST /v1/idea/regenerate) : même idée, mêmes prompts, la
+    # réponse en cache serait celle du run source -> nouvel appel forcé
+    regenerate = state.get("regenerate")
+    return not regenerate or node not in regenerate
+
+
+async def _invalid_output(run_id: UUID, agent: str, error: StructuredOutputError) -> dict:
+    # Sortie toujours invalide après les re-demandes ciblées : le pipeline
+    # continue, PERSIST ne touche pas aux collections de cet agent
+    print(f"[{agent}] Invalid output: {error}")
+    await emit_run_event(run_id, f"WARNING: {agent} output invalid, not persisted")
+    return {}
+
+
 # ------------------------------------------------------------
 # Node 0: Metadata (generates project name and description)
 # ------------------------------------------------------------
-async def node_metadata(state: BlueprintState) -> BlueprintState:
+async def node_metadata(state: BlueprintState) -> dict:
     """
     First node: analyzes the idea and generates project metadata.
     Updates the project immediately with the generated name/description.
+    Returns only the keys it produced (merged into the graph state by LangGraph).
     """
     idea = state["idea"]
     run_id = state["run_id"]
     project_id = state["project_id"]
 
-    publish(f"run:{run_id}", "Running: MetadataAgent")
+    await emit_run_event(run_id, "Running: MetadataAgent")
 
     try:
         # 1) LLM - Generate project metadata
-        metadata = await generate_project_metadata(idea)
+        metadata = await generate_project_metadata(idea, use_cache=_use_cache(state, "METADATA"))
         
         # 2) Update state
-        state["project_name"] = metadata["name"]
-        state["project_description"] = metadata["description"]
-
-        # 3) Save to MongoDB run state
-        state_json = {
-            "project_name": state.get("project_name"),
-            "project_description": state.get("project_description"),
+        updates = {
+            "project_name": metadata["name"],
+            "project_description": metadata["description"],
         }
-        await runs_repo.update_run_state(run_id, state_json)
 
-        # 4) Update the project document immediately
+        # 3) Update the project document immediately
+        #    (the run state itself is checkpointed by the graph wrapper)
         from app.services.project_service import update_project_metadata
         await update_project_metadata(
             project_id=project_id,
@@ -95,8 +124,8 @@ async def node_metadata(state: BlueprintState) -> BlueprintState:
             description=metadata["description"]
         )
 
-        # 5) Publish notification
-        publish(f"run:{run_id}", f"PROJECT_NAME:{metadata['name']}")
+        # 4) Publish notification
+        await emit_run_event(run_id, f"PROJECT_NAME:{metadata['name']}")
         
         print(f"[METADATA_NODE] Generated: name='{metadata['name']}', desc='{metadata['description']}'")
         
@@ -104,66 +133,62 @@ async def node_metadata(state: BlueprintState) -> BlueprintState:
         print(f"[METADATA_NODE] Error: {e}. Using fallback.")
         # Fallback: use idea as name/description
         fallback_name = idea[:60].strip() if len(idea) <= 60 else idea[:57].strip() + "..."
-        state["project_name"] = fallback_name
-        state["project_description"] = idea[:200].strip() if len(idea) <= 200 else idea[:197].strip() + "..."
+        updates = {
+            "project_name": fallback_name,
+            "project_description": idea[:200].strip() if len(idea) <= 200 else idea[:197].strip() + "...",
+        }
 
-    return state
+    return updates
 
 
 # ------------------------------------------------------------
 # Node 1: Requirements
 # ------------------------------------------------------------
-async def node_requirements(state: BlueprintState) -> BlueprintState:
+async def node_requirements(state: BlueprintState) -> dict:
     idea = state["idea"]
     run_id = state["run_id"]
     project_id = state["project_id"]
 
-    publish(f"run:{run_id}", "Running: RequirementsAgent")
-
-    # 1) LLM - Génère le contenu requirements en JSON
-    requirements_json_str = await generate_requirements(idea)
-
-    # 2) Clean JSON if wrapped in markdown code blocks
-    cleaned_json = requirements_json_str.strip()
-    if cleaned_json.startswith("```"):
-        lines = cleaned_json.split("\n")
-        if lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        cleaned_json = "\n".join(lines).strip()
-
-    # 3) Update state - Stockage du JSON structuré
-    state["requirements_content"] = cleaned_json  # Store JSON for persistence
-    state["requirements_json_content"] = cleaned_json  # Alias for clarity
-
-    # 4) Sauvegarder le state complet en JSON dans la DB (MongoDB async)
-    state_json = {
-        "requirements_content": state.get("requirements_content"),
-        "diagrams_content": state.get("diagrams_content"),
-        "diagrams_json_content": state.get("diagrams_json_content"),
-        "planner_json_content": state.get("planner_json_content"),
-        "export_content": state.get("export_content"),
-        "export_json_content": state.get("export_json_content"),
-        "blueprint_markdown": state.get("blueprint_markdown"),
+    await emit_run_event(run_id, "Running: RequirementsAgent")
+
+    # 1) LLM - Génère le contenu requirements en JSON (streamé : chaque requirement
+    #    complété est publié dès qu'il est fermé)
+    #    La réponse est parsée et validée une seule fois (app/llm/structured.py)
+    stream = RunStreamPublisher(run_id, "RequirementsAgent", item_key="requirements", item_kind="requirement")
+    try:
+        requirements = await generate_requirements(idea, on_token=stream.callback, use_cache=_use_cache(state, "REQUIREMENTS"))
+    except StructuredOutputError as e:
+        return await _invalid_output(run_id, "RequirementsAgent", e)
+    finally:
+        stream.close()
+
+    # 2) Update state - Stockage de la sortie parsée
+    #    (sauvegardée dans le run par le checkpoint du graphe, voir graph.py)
+    updates = {
+        "requirements_data": _dump(requirements),
     }
-    await runs_repo.update_run_state(run_id, state_json)
 
-    return state
+    return updates
 
 
 # ------------------------------------------------------------
 # Node 2: Diagrams
 # ------------------------------------------------------------
-async def node_diagrams(state: BlueprintState) -> BlueprintState:
+async def node_diagrams(state: BlueprintState) -> dict:
     idea = state["idea"]
     run_id = state["run_id"]
     project_id = state["project_id"]
 
-    publish(f"run:{run_id}", "Running: DiagramAgent")
+    await emit_run_event(run_id, "Running: DiagramAgent")
 
     # 1) LLM - Génère les diagrammes JSON React Flow
-    diagrams_json_str = await generate_diagrams(idea)
+    stream = RunStreamPublisher(run_id, "DiagramAgent")
+    try:
+        diagrams = await generate_diagrams(idea, on_token=stream.callback, use_cache=_use_cache(state, "DIAGRAMS"))
+    except StructuredOutputError as e:
+        return await _invalid_output(run_id, "DiagramAgent", e)
+    finally:
+        stream.close()
 
     # 2a) Export JSON pour le frontend - COMMENTED: stockage direct
     # from app.agents.tools.storage_tools import put_json
@@ -212,78 +237,54 @@ These diagrams can be rendered directly in the frontend using React Flow.
     # )
 
     # 4) Update state - Stockage direct du texte
-    state["architecture"] = diagrams_md
-    state["uml_sequence"] = diagrams_md
-    state["diagrams_content"] = diagrams_md  # 🆕 Markdown pour le frontend
-    state["diagrams_json_content"] = diagrams_json_str  # 🆕 JSON React Flow
-
-    # 5) Sauvegarder le state complet en JSON dans la DB (MongoDB async)
-    state_json = {
-        "requirements_content": state.get("requirements_content"),
-        "diagrams_content": state.get("diagrams_content"),
-        "diagrams_json_content": state.get("diagrams_json_content"),
-        "planner_json_content": state.get("planner_json_content"),
-        "export_content": state.get("export_content"),
-        "export_json_content": state.get("export_json_content"),
-        "blueprint_markdown": state.get("blueprint_markdown"),
+    updates = {
+        "architecture": diagrams_md,
+        "uml_sequence": diagrams_md,
+        "diagrams_content": diagrams_md,  # 🆕 Markdown pour le frontend
+        "diagrams_data": _dump(diagrams),  # 🆕 JSON React Flow (parsé)
     }
-    await runs_repo.update_run_state(run_id, state_json)
 
-    return state
+    return updates
 
 
 # ------------------------------------------------------------
 # Node 3: Planner
 # ------------------------------------------------------------
-async def node_planner(state: BlueprintState) -> BlueprintState:
+async def node_planner(state: BlueprintState) -> dict:
     idea = state["idea"]
     run_id = state["run_id"]
     project_id = state["project_id"]
 
-    publish(f"run:{run_id}", "Running: PlannerAgent")
+    await emit_run_event(run_id, "Running: PlannerAgent")
 
     # 1) LLM - Génère le plan structuré (JSON uniquement - pas de markdown pour économiser tokens)
-    plan_json_str = await generate_plan_json(idea)
-
-    # 2) Clean JSON if wrapped in markdown code blocks
-    cleaned_json = plan_json_str.strip()
-    if cleaned_json.startswith("```"):
-        lines = cleaned_json.split("\n")
-        if lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        cleaned_json = "\n".join(lines).strip()
-
-    # 3) Update state - Stockage JSON uniquement (optimisation tokens)
-    state["planner_json_content"] = cleaned_json
-
-    # 4) Sauvegarder le state complet en JSON dans la DB (MongoDB async)
-    state_json = {
-        "requirements_content": state.get("requirements_content"),
-        "diagrams_content": state.get("diagrams_content"),
-        "diagrams_json_content": state.get("diagrams_json_content"),
-        "planner_json_content": state.get("planner_json_content"),
-        "export_content": state.get("export_content"),
-        "export_json_content": state.get("export_json_content"),
-        "blueprint_markdown": state.get("blueprint_markdown"),
+    stream = RunStreamPublisher(run_id, "PlannerAgent", item_key="tasks", item_kind="task")
+    try:
+        plan = await generate_plan_json(idea, on_token=stream.callback, use_cache=_use_cache(state, "PLANNER"))
+    except StructuredOutputError as e:
+        return await _invalid_output(run_id, "PlannerAgent", e)
+    finally:
+        stream.close()
+
+    # 2) Update state - Stockage JSON parsé uniquement (optimisation tokens)
+    updates = {
+        "planner_data": _dump(plan),
     }
-    await runs_repo.update_run_state(run_id, state_json)
 
-    return state
+    return updates
 
 
 # ------------------------------------------------------------
 # Node 4: Export / Result URI
 # ------------------------------------------------------------
-async def node_export(state: BlueprintState) -> BlueprintState:
+async def node_export(state: BlueprintState) -> dict:
     run_id = state["run_id"]
     idea = state["idea"]
 
-    publish(f"run:{run_id}", "Running: ExportAgent")
+    await emit_run_event(run_id, "Running: ExportAgent")
 
     # 1) Assemble markdown final pour la documentation complète
-    state["blueprint_markdown"] = "\n\n".join(
+    blueprint_markdown = "\n\n".join(
         filter(
             None,
             [
@@ -293,285 +294,298 @@ async def node_export(state: BlueprintState) -> BlueprintState:
             ],
         )
     )
-    
-    # 2) Stocke aussi le contenu final dans export_content
-    state["export_content"] = state["blueprint_markdown"]
 
     # 3) Génère le JSON structuré pour l'export (document + github_export)
-    export_json_str = await generate_export_json(
-        idea=idea,
-        requirements=state.get("requirements_content") or "",
-        diagrams_json=state.get("diagrams_json_content") or "",
-        planner_json=state.get("planner_json_content") or "",
-    )
+    stream = RunStreamPublisher(run_id, "ExportAgent")
+    export_data = None
+    try:
+        export = await generate_export_json(
+            idea=idea,
+            requirements=json_content(state, "requirements_content") or "",
+            diagrams_json=json_content(state, "diagrams_json_content") or "",
+            planner_json=json_content(state, "planner_json_content") or "",
+            on_token=stream.callback,
+            use_cache=_use_cache(state, "EXPORT"),
+        )
+        export_data = _dump(export)
+    except StructuredOutputError as e:
+        await _invalid_output(run_id, "ExportAgent", e)
+    finally:
+        stream.close()
 
-    # 4) Clean JSON if wrapped in markdown code blocks
-    cleaned_json = export_json_str.strip()
-    if cleaned_json.startswith("```"):
-        lines = cleaned_json.split("\n")
-        if lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        cleaned_json = "\n".join(lines).strip()
-
-    state["export_json_content"] = cleaned_json
-
-    # 5) Sauvegarder le state final complet en JSON dans la DB (MongoDB async)
-    state_json = {
-        "requirements_content": state.get("requirements_content"),
-        "diagrams_content": state.get("diagrams_content"),
-        "diagrams_json_content": state.get("diagrams_json_content"),
-        "planner_json_content": state.get("planner_json_content"),
-        "export_content": state.get("export_content"),
-        "export_json_content": state.get("export_json_content"),
-        "blueprint_markdown": state.get("blueprint_markdown"),
+    # 2) Stocke aussi le contenu final dans export_content
+    updates = {
+        "blueprint_markdown": blueprint_markdown,
+        "export_content": blueprint_markdown,
+        "export_data": export_data,
     }
-    await runs_repo.update_run_state(run_id, state_json)
 
-    publish(f"run:{run_id}", "DONE: All content stored in state")
+    await emit_run_event(run_id, "DONE: All content stored in state")
 
-    return state
+    return updates
 
 
 # ------------------------------------------------------------
 # Node 5: Persist to Collections
 # ------------------------------------------------------------
-async def node_persist_to_collections(state: BlueprintState) -> BlueprintState:
+def _output_data(state: BlueprintState, content_key: str) -> Optional[dict]:
+    """Sortie parsée d'un agent ; les runs antérieurs n'ont que le JSON texte."""
+    data = state.get(JSON_CONTENT_KEYS[content_key])
+    raw = state.get(content_key)
+    if data is None and raw:
+        try:
+            data = parse_json(raw)
+        except StructuredOutputError as e:
+            print(f"[PERSIST_NODE] Failed to parse {content_key}: {e}")
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _build_diagrams(run_id, diagrams_data: dict) -> list:
+    from app.domain.diagram import DiagramStructure
+    from datetime import datetime
+
+    diagrams = []
+    # diagrams_data has keys: class, sequence, activity, usecase
+    for diagram_type, diagram_content in diagrams_data.items():
+        if isinstance(diagram_content, dict) and "nodes" in diagram_content:
+            diagrams.append(DiagramStructure(
+                _id=stable_object_id(run_id, "diagram", len(diagrams)),
+                title=diagram_content.get("title", f"{diagram_type.capitalize()} Diagram"),
+                type=diagram_content.get("type", diagram_type),
+                nodes=diagram_content.get("nodes", []),
+                edges=diagram_content.get("edges", []),
+                created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow(),
+            ))
+    return diagrams
+
+
+def _build_requirements(run_id, requirements_list: list) -> list:
+    from app.domain.requirement import RequirementStructure
+    from datetime import datetime
+
+    return [
+        RequirementStructure(
+            _id=stable_object_id(run_id, "requirement", idx),
+            title=req_item.get("title", "Untitled Requirement"),
+            category=req_item.get("category", "other"),
+            description=req_item.get("description"),
+            content=req_item.get("content"),
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        for idx, req_item in enumerate(requirements_list)
+    ]
+
+
+def _build_task_payloads(tasks_list: list) -> list[dict]:
+    payloads = []
+    for task_item in tasks_list:
+        # Map priority values to ensure consistency
+        priority = task_item.get("priority", "medium")
+        if isinstance(priority, str):
+            priority = priority.lower()
+        if priority not in ["low", "medium", "high", "critical"]:
+            priority = "medium"
+
+        # Map status values to ensure consistency
+        status = task_item.get("status", "backlog")
+        if isinstance(status, str):
+            status = status.lower()
+        if status not in ["backlog", "todo", "in-progress", "review", "done"]:
+            status = "backlog"
+
+        payloads.append({
+            "title": task_item.get("title", "Untitled Task"),
+            "description": task_item.get("description", ""),
+            "assignee_id": None,
+            "status": status,
+            "priority": priority,
+            "due_date": None,
+            "asign_date": None,
+        })
+    return payloads
+
+
+def _format_full_description(requirements_list: list, planner_data: dict | None) -> str:
+    full_desc_parts = []
+
+    # Add requirements summary
+    if requirements_list:
+        full_desc_parts.append("## Project Requirements\n")
+        for req in requirements_list[:5]:  # Show first 5 requirements
+            full_desc_parts.append(f"### {req.get('title', 'Untitled')}\n")
+            if req.get('description'):
+                full_desc_parts.append(f"{req.get('description')}\n\n")
+
+    # Add planner summary
+    if planner_data:
+        try:
+            full_desc_parts.append("\n## Project Timeline & Budget\n")
+            if planner_data.get("time_estimates"):
+                time_est = planner_data["time_estimates"]
+                full_desc_parts.append(f"- **Duration:** {time_est.get('total_weeks', 'N/A')} weeks\n")
+            if planner_data.get("cost_estimates"):
+                cost_est = planner_data["cost_estimates"]
+                full_desc_parts.append(f"- **Budget:** ${cost_est.get('total_budget', 'N/A'):,.2f}\n")
+        except Exception:
+            pass
+
+    return "\n".join(full_desc_parts)
+
+
+async def node_persist_to_collections(state: BlueprintState) -> dict:
     """
     Final node: Persists the generated data from state to the appropriate
     domain collections (diagrams, requirements, project, planners, exports, tasks).
-    Uses existing service functions.
+    Agent outputs arrive already parsed (state["*_data"]); every collection is written with a single
+    request (create_many => $push/$each) and all writes run concurrently.
+
+    Idempotent: generated items get ids derived from (run_id, kind, index) and are
+    only pushed if absent, so a retried/resumed run never duplicates them. Any
+    failed write fails the node (it is not checkpointed and re-runs on retry).
+
+    Partial runs (state["regenerate"]) only write what the re-run nodes produced
+    in this run (a node with invalid output writes nothing); the items listed in
+    state["persisted_ids"] for those kinds are then pulled.
     """
+    import asyncio
     from app.services import diagram_service, requirement_service, project_service
     from app.services import planner_service, export_service, task_service
-    from app.domain.diagram import DiagramStructure
-    from app.domain.requirement import RequirementStructure
-    from app.domain.task import TaskStructure
     from datetime import datetime
-    
+
     run_id = state["run_id"]
     project_id = state["project_id"]
 
-    publish(f"run:{run_id}", "Running: PersistToCollections")
+    await emit_run_event(run_id, "Running: PersistToCollections")
     print(f"[PERSIST_NODE] Starting persist for project_id={project_id}")
 
     try:
         # -----------------------------------------------------
-        # 1) Save Diagrams from diagrams_json_content
-        # -----------------------------------------------------
-        diagrams_json_str = state.get("diagrams_json_content")
-        if diagrams_json_str:
-            try:
-                diagrams_data = json.loads(diagrams_json_str)
-                diagrams_saved = 0
-                
-                # diagrams_data has keys: class, sequence, activity, usecase
-                for diagram_type, diagram_content in diagrams_data.items():
-                    if isinstance(diagram_content, dict) and "nodes" in diagram_content:
-                        diagram_struct = DiagramStructure(
-                            title=diagram_content.get("title", f"{diagram_type.capitalize()} Diagram"),
-                            type=diagram_content.get("type", diagram_type),
-                            nodes=diagram_content.get("nodes", []),
-                            edges=diagram_content.get("edges", []),
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow(),
-                        )
-                        await diagram_service.create(project_id, diagram_struct)
-                        diagrams_saved += 1
-                
-                print(f"[PERSIST_NODE] Saved {diagrams_saved} diagrams")
-            except json.JSONDecodeError as e:
-                print(f"[PERSIST_NODE] Failed to parse diagrams JSON: {e}")
-            except Exception as e:
-                print(f"[PERSIST_NODE] Error saving diagrams: {e}")
-
-        # -----------------------------------------------------
-        # 2) Save Requirements from requirements_content
-        # -----------------------------------------------------
-        # 2) Save Requirements from requirements_content (JSON format)
-        # -----------------------------------------------------
-        requirements_json_str = state.get("requirements_content")
-        if requirements_json_str:
-            try:
-                # Parse JSON requirements
-                requirements_data = json.loads(requirements_json_str)
-                requirements_list = requirements_data.get("requirements", [])
-                requirements_saved = 0
-                
-                for req_item in requirements_list:
-                    requirement_struct = RequirementStructure(
-                        title=req_item.get("title", "Untitled Requirement"),
-                        category=req_item.get("category", "other"),
-                        description=req_item.get("description"),
-                        content=req_item.get("content"),
-                        created_at=datetime.utcnow(),
-                        updated_at=datetime.utcnow(),
-                    )
-                    await requirement_service.create(project_id, requirement_struct)
-                    requirements_saved += 1
-                
-                print(f"[PERSIST_NODE] Saved {requirements_saved} requirements")
-            except json.JSONDecodeError as e:
-                print(f"[PERSIST_NODE] Failed to parse requirements JSON: {e}")
-            except Exception as e:
-                print(f"[PERSIST_NODE] Error saving requirements: {e}")
-
-        # -----------------------------------------------------
-        # 3) Update Project with full_description (formatted blueprint)
-        # -----------------------------------------------------
-        try:
-            # Create a formatted full_description from the generated content
-            full_desc_parts = []
-            
-            # Add requirements summary
-            requirements_json_str = state.get("requirements_content")
-            if requirements_json_str:
-                try:
-                    requirements_data = json.loads(requirements_json_str)
-                    requirements_list = requirements_data.get("requirements", [])
-                    if requirements_list:
-                        full_desc_parts.append("## Project Requirements\n")
-                        for req in requirements_list[:5]:  # Show first 5 requirements
-                            full_desc_parts.append(f"### {req.get('title', 'Untitled')}\n")
-                            if req.get('description'):
-                                full_desc_parts.append(f"{req.get('description')}\n\n")
-                except:
-                    pass
-            
-            # Add planner summary
-            planner_json_str = state.get("planner_json_content")
-            if planner_json_str:
-                try:
-                    planner_data = json.loads(planner_json_str)
-                    full_desc_parts.append("\n## Project Timeline & Budget\n")
-                    if planner_data.get("time_estimates"):
-                        time_est = planner_data["time_estimates"]
-                        full_desc_parts.append(f"- **Duration:** {time_est.get('total_weeks', 'N/A')} weeks\n")
-                    if planner_data.get("cost_estimates"):
-                        cost_est = planner_data["cost_estimates"]
-                        full_desc_parts.append(f"- **Budget:** ${cost_est.get('total_budget', 'N/A'):,.2f}\n")
-                except:
-                    pass
-            
-            # Save formatted full_description
-            if full_desc_parts:
-                formatted_description = "\n".join(full_desc_parts)
-                await project_service.update(project_id, {
-                    "full_description": formatted_description,
-                    "updated_at": datetime.utcnow(),
-                })
-                print(f"[PERSIST_NODE] Updated project full_description ({len(formatted_description)} chars)")
-        except Exception as e:
-            print(f"[PERSIST_NODE] Error updating project full_description: {e}")
-
-        # -----------------------------------------------------
-        # 4) Save Planner Data to PlannerDomain
+        # 1) Agent outputs were parsed and validated by their nodes
         # -----------------------------------------------------
-        planner_json_str = state.get("planner_json_content")
-        if planner_json_str:
-            try:
-                planner_doc = await planner_service.update_from_json(project_id, planner_json_str)
-                if planner_doc:
-                    print(f"[PERSIST_NODE] Saved planner data with {len(planner_doc.risks or [])} risks and {len(planner_doc.success_criteria or [])} success criteria")
-                else:
-                    print(f"[PERSIST_NODE] Failed to save planner data")
-            except Exception as e:
-                print(f"[PERSIST_NODE] Error saving planner: {e}")
+        diagrams_data = _output_data(state, "diagrams_json_content") or {}
+        requirements_data = _output_data(state, "requirements_content") or {}
+        planner_data = _output_data(state, "planner_json_content")
+        export_data = _output_data(state, "export_json_content")
+
+        requirements_list = requirements_data.get("requirements", [])
+        tasks_list = planner_data.get("tasks", []) if planner_data else []
+        if planner_data is not None and not tasks_list:
+            print(f"[PERSIST_NODE] WARNING: No tasks found in planner output")
+
+        diagrams = _build_diagrams(run_id, diagrams_data)
+        requirements = _build_requirements(run_id, requirements_list)
+        task_payloads = _build_task_payloads(tasks_list)
+        task_ids = [stable_object_id(run_id, "task", idx) for idx in range(len(task_payloads))]
+        formatted_description = _format_full_description(requirements_list, planner_data)
 
         # -----------------------------------------------------
-        # 5) Save Export Data to ExportDomain
+        # 2) One write per collection, all concurrently.
+        #    Regeneration: only the collections fed by the re-run nodes are
+        #    written, and the items of the previous generation are replaced.
         # -----------------------------------------------------
-        export_json_str = state.get("export_json_content")
-        if export_json_str:
-            try:
-                export_doc = await export_service.update_from_json(project_id, export_json_str)
-                if export_doc:
-                    print(f"[PERSIST_NODE] Saved export document with {len(export_doc.github_export or [])} GitHub repositories")
-                else:
-                    print(f"[PERSIST_NODE] Failed to save export data")
-            except Exception as e:
-                print(f"[PERSIST_NODE] Error saving export: {e}")
+        regenerate = state.get("regenerate")
+        previous_ids = dict(state.get("persisted_ids") or {})
+        new_ids = {
+            "diagram": [str(d.id) for d in diagrams],
+            "requirement": [str(r.id) for r in requirements],
+            "task": [str(i) for i in task_ids],
+        }
 
-        # -----------------------------------------------------
-        # 6) Save Tasks from planner_json_content
-        # -----------------------------------------------------
-        planner_json_str = state.get("planner_json_content")
-        print(f"[PERSIST_NODE] ======= TASKS EXTRACTION START =======")
-        print(f"[PERSIST_NODE] planner_json_str exists: {planner_json_str is not None}")
-        
-        if planner_json_str:
-            try:
-                planner_data = json.loads(planner_json_str)
-                tasks_list = planner_data.get("tasks", [])
-                print(f"[PERSIST_NODE] Found {len(tasks_list)} tasks in planner JSON")
-                
-                if not tasks_list:
-                    print(f"[PERSIST_NODE] WARNING: No tasks found in planner_json_content")
-                    print(f"[PERSIST_NODE] planner_data keys: {list(planner_data.keys())}")
-                
-                tasks_saved = 0
-                
-                for idx, task_item in enumerate(tasks_list):
-                    # Map priority values to ensure consistency
-                    priority = task_item.get("priority", "medium")
-                    if isinstance(priority, str):
-                        priority = priority.lower()
-                    if priority not in ["low", "medium", "high", "critical"]:
-                        priority = "medium"
-                    
-                    # Map status values to ensure consistency
-                    status = task_item.get("status", "backlog")
-                    if isinstance(status, str):
-                        status = status.lower()
-                    if status not in ["backlog", "todo", "in-progress", "review", "done"]:
-                        status = "backlog"
-                    
-                    task_title = task_item.get("title", "Untitled Task")
-                    task_description = task_item.get("description", "")
-                    
-                    print(f"[PERSIST_NODE] Task {idx+1}: title='{task_title}', priority='{priority}', status='{status}'")
-                    print(f"[PERSIST_NODE] Task {idx+1} description: {task_description[:100]}..." if len(task_description) > 100 else f"[PERSIST_NODE] Task {idx+1} description: {task_description}")
-                    
-                    # Create task as dict instead of TaskStructure for compatibility
-                    task_payload = {
-                        "title": task_title,
-                        "description": task_description,
-                        "assignee_id": None,
-                        "status": status,
-                        "priority": priority,
-                        "due_date": None,
-                        "asign_date": None,
-                    }
-                    
-                    print(f"[PERSIST_NODE] Calling task_service.create for task {idx+1}...")
-                    try:
-                        created_task = await task_service.create(project_id, task_payload)
-                        print(f"[PERSIST_NODE] Task {idx+1} created successfully: id={created_task.id if hasattr(created_task, 'id') else 'N/A'}")
-                        tasks_saved += 1
-                    except Exception as task_err:
-                        print(f"[PERSIST_NODE] ERROR creating task {idx+1}: {task_err}")
-                        import traceback
-                        traceback.print_exc()
-                
-                print(f"[PERSIST_NODE] ======= TASKS EXTRACTION COMPLETE =======")
-                print(f"[PERSIST_NODE] Total tasks saved: {tasks_saved}/{len(tasks_list)}")
-                
-            except json.JSONDecodeError as e:
-                print(f"[PERSIST_NODE] Failed to parse planner JSON for tasks: {e}")
-                print(f"[PERSIST_NODE] Raw planner_json_str (first 500 chars): {planner_json_str[:500]}")
-            except Exception as e:
-                print(f"[PERSIST_NODE] Error saving tasks: {e}")
-                import traceback
-                traceback.print_exc()
-        else:
-            print(f"[PERSIST_NODE] WARNING: planner_json_content is None or empty")
-
-        publish(f"run:{run_id}", "PERSIST: Data saved to collections")
+        async def replace_previous(kind: str, service) -> None:
+            stale = [i for i in previous_ids.get(kind) or [] if i not in new_ids[kind]]
+            if stale:
+                await service.remove_many(project_id, stale)
+
+        async def save_diagrams():
+            if diagrams:
+                await diagram_service.create_many(project_id, diagrams, idempotent=True)
+                await replace_previous("diagram", diagram_service)
+            return f"{len(diagrams)} diagrams"
+
+        async def save_requirements():
+            if requirements:
+                await requirement_service.create_many(project_id, requirements, idempotent=True)
+                await replace_previous("requirement", requirement_service)
+            return f"{len(requirements)} requirements"
+
+        async def save_tasks():
+            if task_payloads:
+                await task_service.create_many(project_id, task_payloads, item_ids=task_ids)
+                await replace_previous("task", task_service)
+            return f"{len(task_payloads)} tasks"
+
+        async def save_project():
+            if not formatted_description:
+                return "no project full_description"
+            await project_service.update(project_id, {
+                "full_description": formatted_description,
+                "updated_at": datetime.utcnow(),
+            })
+            return f"project full_description ({len(formatted_description)} chars)"
+
+        async def save_planner():
+            if not planner_data:
+                return "no planner data"
+            planner_doc = await planner_service.update_from_data(project_id, planner_data)
+            if not planner_doc:
+                return "planner data NOT saved"
+            return f"planner data with {len(planner_doc.risks or [])} risks and {len(planner_doc.success_criteria or [])} success criteria"
+
+        async def save_export():
+            if not export_data:
+                return "no export data"
+            export_doc = await export_service.update_from_data(project_id, export_data)
+            if not export_doc:
+                return "export data NOT saved"
+            return f"export document with {len(export_doc.github_export or [])} GitHub repositories"
+
+        # Noeud source -> écritures qu'il alimente (item kind pour les listes)
+        writers_by_stage = {
+            "REQUIREMENTS": [(save_requirements, "requirement"), (save_project, None)],
+            "DIAGRAMS": [(save_diagrams, "diagram")],
+            "PLANNER": [(save_tasks, "task"), (save_planner, None), (save_project, None)],
+            "EXPORT": [(save_export, None)],
+        }
+        # Régénération : les sorties source des noeuds ré-exécutés ne sont pas
+        # reprises (make_regeneration_state), une sortie absente = noeud en échec
+        produced = {
+            "REQUIREMENTS": bool(requirements_list),
+            "DIAGRAMS": bool(diagrams),
+            "PLANNER": planner_data is not None,
+            "EXPORT": export_data is not None,
+        }
+        writers = {}
+        for stage, stage_writers in writers_by_stage.items():
+            if regenerate is None or (stage in regenerate and produced[stage]):
+                writers.update(stage_writers)
+        results = await asyncio.gather(*(w() for w in writers), return_exceptions=True)
+
+        persisted_ids = dict(previous_ids)
+        failed = []
+        for (writer, kind), result in zip(writers.items(), results):
+            if isinstance(result, Exception):
+                print(f"[PERSIST_NODE] Error in {writer.__name__}: {result}")
+                failed.append(f"{writer.__name__}: {result}")
+            else:
+                print(f"[PERSIST_NODE] Saved {result}")
+                if kind and new_ids[kind]:
+                    persisted_ids[kind] = new_ids[kind]
+        if failed:
+            raise RuntimeError(f"{len(failed)} write(s) failed: {'; '.join(failed)}")
+
+        await emit_run_event(run_id, "PERSIST: Data saved to collections")
         print(f"[PERSIST_NODE] Completed successfully")
 
     except Exception as e:
+        # Le noeud échoue (pas de checkpoint) : le job est relancé par RQ et PERSIST
+        # rejoue toutes ses écritures (ids stables, pushes idempotents)
         print(f"[PERSIST_NODE] Critical error: {e}")
-        publish(f"run:{run_id}", f"PERSIST_ERROR: {str(e)}")
+        await emit_run_event(run_id, f"PERSIST_ERROR: {str(e)}")
+        raise
 
-    return state
+    # Seuls les _id écrits sont ajoutés au state (checkpointé dans le run) :
+    # la prochaine régénération saura quels éléments remplacer
+    return {"persisted_ids": persisted_ids}
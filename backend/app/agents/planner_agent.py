@@ -1,4 +1,7 @@
+from app.agents.schemas import PlannerOutput
 from app.llm.provider import llm_call
+from app.llm.prompts import ChatPrompt
+from app.llm.structured import generate_structured
 
 PLANNER_SYSTEM_PROMPT = """You are a world-class Technical Project Manager and Agile Coach with 20+ years of experience leading software projects at top tech companies. You have delivered 100+ successful projects and are an expert in estimation, resource planning, and risk management.
 
@@ -172,25 +175,12 @@ gantt
 - **Recommended Buffer:** 20%"""
 
 
-# NOTE: Cette fonction n'est plus utilisée dans le pipeline principal.
-# On utilise maintenant generate_plan_json() pour économiser des tokens.
-# Conservée pour compatibilité avec autogen_team.py qui utilise PLANNER_SYSTEM_PROMPT.
-async def generate_plan(idea: str) -> str:
-    """
-    LEGACY: Génère un plan projet en format Markdown (non utilisé dans le pipeline).
-    Utiliser generate_plan_json() à la place pour format structuré et économie de tokens.
-    """
-    prompt = f"""{PLANNER_SYSTEM_PROMPT}
+PLANNER_MARKDOWN_PROMPT = ChatPrompt(
+    system=PLANNER_SYSTEM_PROMPT + """
 
 ---
 
-## PROJECT IDEA TO PLAN:
-
-{idea}
-
----
-
-Now, create a comprehensive project execution plan following the exact format above.
+Create a comprehensive project execution plan for the project idea given by the user, following the exact format above.
 
 Consider:
 1. What are the technical complexities that could affect estimates?
@@ -199,9 +189,22 @@ Consider:
 4. What are realistic team compositions for this project?
 5. What are the major risks and how to mitigate them?
 
-Be REALISTIC - neither overly optimistic nor pessimistic. Use industry-standard estimation techniques and provide ranges where uncertainty exists."""
-    
-    return await llm_call(prompt)
+Be REALISTIC - neither overly optimistic nor pessimistic. Use industry-standard estimation techniques and provide ranges where uncertainty exists.""",
+    user_template="""## PROJECT IDEA TO PLAN:
+
+{idea}""",
+)
+
+
+# NOTE: Cette fonction n'est plus utilisée dans le pipeline principal.
+# On utilise maintenant generate_plan_json() pour économiser des tokens.
+# Conservée pour compatibilité avec autogen_team.py qui utilise PLANNER_SYSTEM_PROMPT.
+async def generate_plan(idea: str) -> str:
+    """
+    LEGACY: Génère un plan projet en format Markdown (non utilisé dans le pipeline).
+    Utiliser generate_plan_json() à la place pour format structuré et économie de tokens.
+    """
+    return await llm_call(PLANNER_MARKDOWN_PROMPT.format(idea=idea), system=PLANNER_MARKDOWN_PROMPT.system)
 
 
 # JSON structured output for planner
@@ -321,20 +324,10 @@ PLANNER_JSON_OUTPUT_STRUCTURE = """{
 }"""
 
 
-async def generate_plan_json(idea: str) -> str:
-    """
-    Generates structured JSON output for project planning.
-    Returns JSON string with time estimates, costs, tech stack, risks, success criteria, and tasks.
-    """
-    prompt = f"""You are a world-class Technical Project Manager and Agile Coach with 20+ years of experience.
-
-Your task is to analyze the project idea below and generate a comprehensive project plan in JSON format.
-
-## PROJECT IDEA:
-
-{idea}
+PLANNER_JSON_PROMPT = ChatPrompt(
+    system="""You are a world-class Technical Project Manager and Agile Coach with 20+ years of experience.
 
----
+Your task is to analyze the project idea given by the user and generate a comprehensive project plan in JSON format.
 
 ## YOUR TASK:
 
@@ -362,8 +355,20 @@ Generate a detailed project plan as a JSON object with the following structure:
 Return ONLY valid JSON - no markdown, no code blocks, no explanations.
 
 EXAMPLE STRUCTURE:
-{PLANNER_JSON_OUTPUT_STRUCTURE}
+""" + PLANNER_JSON_OUTPUT_STRUCTURE,
+    user_template="""## PROJECT IDEA:
+
+{idea}
+
+---
 
-Now generate the project plan JSON for the idea above. Be thorough, realistic, and professional."""
-    
-    return await llm_call(prompt)
+Now generate the project plan JSON for the idea above. Be thorough, realistic, and professional.""",
+)
+
+
+async def generate_plan_json(idea: str, on_token=None, use_cache: bool = True) -> PlannerOutput:
+    """
+    Generates structured JSON output for project planning.
+    Returns the validated plan: time estimates, costs, tech stack, risks, success criteria, and tasks.
+    """
+    return await generate_structured(PLANNER_JSON_PROMPT, PlannerOutput, on_token=on_token, use_cache=use_cache, idea=idea)
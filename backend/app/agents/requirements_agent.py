@@ -1,4 +1,6 @@
-from app.llm.provider import llm_call
+from app.agents.schemas import RequirementsOutput
+from app.llm.prompts import ChatPrompt
+from app.llm.structured import generate_structured
 
 REQUIREMENTS_SYSTEM_PROMPT = """You are a world-class Senior Business Analyst and Requirements Engineer with 20+ years of experience in software development across startups and Fortune 500 companies. You specialize in transforming vague ideas into crystal-clear, actionable product requirements.
 
@@ -73,19 +75,19 @@ You must return a JSON object with a "requirements" array. Each requirement obje
 - Return ONLY valid JSON - no markdown code blocks, no explanations before or after"""
 
 
-async def generate_requirements(idea: str) -> str:
-    prompt = f"""{REQUIREMENTS_SYSTEM_PROMPT}
+REQUIREMENTS_PROMPT = ChatPrompt(
+    system=REQUIREMENTS_SYSTEM_PROMPT + """
 
 ---
 
-## PROJECT IDEA TO ANALYZE:
+Transform the project idea given by the user into a complete, professional requirements document following the exact JSON format above. Be thorough, specific, and actionable. Think like a product owner who needs to hand this off to a development team tomorrow.
 
-{idea}
+CRITICAL: Return ONLY the JSON object - no markdown code blocks, no explanations, just pure JSON starting with { and ending with }.""",
+    user_template="""## PROJECT IDEA TO ANALYZE:
 
----
+{idea}""",
+)
 
-Now, transform this idea into a complete, professional requirements document following the exact JSON format above. Be thorough, specific, and actionable. Think like a product owner who needs to hand this off to a development team tomorrow.
 
-CRITICAL: Return ONLY the JSON object - no markdown code blocks, no explanations, just pure JSON starting with {{ and ending with }}."""
-    
-    return await llm_call(prompt)
+async def generate_requirements(idea: str, on_token=None, use_cache: bool = True) -> RequirementsOutput:
+    return await generate_structured(REQUIREMENTS_PROMPT, RequirementsOutput, on_token=on_token, use_cache=use_cache, idea=idea)
@@ -0,0 +1,118 @@
+"""
+Modèles Pydantic des sorties JSON des agents (validées par app/llm/structured.py).
+
+Les champs de premier niveau indispensables sont obligatoires : s'ils manquent
+ou sont invalides, seul ce champ est redemandé au LLM. Les éléments eux-mêmes
+restent tolérants (valeurs par défaut, normalisation) comme l'était la
+persistance. Les sous-modèles du planner et de l'export sont ceux du domaine.
+"""
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.domain.exports import FunctionalDesignDocument, GithubExport
+from app.domain.planner import CostEstimates, Risk, SuccessCriteria, TechnicalStack, TimeEstimates
+
+TASK_PRIORITIES = ("low", "medium", "high", "critical")
+TASK_STATUSES = ("backlog", "todo", "in-progress", "review", "done")
+
+
+def _truncate(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars].strip()
+    return value
+
+
+# =========================
+# Metadata
+# =========================
+class MetadataOutput(BaseModel):
+    name: str
+    description: str
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def _name_length(cls, value):
+        return _truncate(value, 60)
+
+    @field_validator("description", mode="before")
+    @classmethod
+    def _description_length(cls, value):
+        return _truncate(value, 200)
+
+
+# =========================
+# Requirements
+# =========================
+class RequirementOutput(BaseModel):
+    title: str = "Untitled Requirement"
+    category: str = "other"
+    description: Optional[str] = None
+    content: Optional[str] = None
+
+
+class RequirementsOutput(BaseModel):
+    requirements: List[RequirementOutput] = Field(min_length=1)
+
+
+# =========================
+# Diagrams (React Flow)
+# =========================
+class DiagramOutput(BaseModel):
+    title: Optional[str] = None
+    type: Optional[str] = None
+    nodes: List[Dict[str, Any]]
+    edges: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class DiagramsOutput(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    class_: DiagramOutput = Field(alias="class")
+    sequence: DiagramOutput
+    activity: DiagramOutput
+    usecase: DiagramOutput
+
+
+# =========================
+# Planner
+# =========================
+class TaskOutput(BaseModel):
+    title: str = "Untitled Task"
+    description: str = ""
+    status: str = "backlog"
+    priority: str = "medium"
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _priority(cls, value):
+        value = value.lower() if isinstance(value, str) else value
+        return value if value in TASK_PRIORITIES else "medium"
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _status(cls, value):
+        value = value.lower() if isinstance(value, str) else value
+        return value if value in TASK_STATUSES else "backlog"
+
+    @field_validator("description", mode="before")
+    @classmethod
+    def _description(cls, value):
+        return value or ""
+
+
+class PlannerOutput(BaseModel):
+    time_estimates: Optional[TimeEstimates] = None
+    cost_estimates: Optional[CostEstimates] = None
+    technical_stack: Optional[TechnicalStack] = None
+    risks: List[Risk] = Field(default_factory=list)
+    success_criteria: List[SuccessCriteria] = Field(default_factory=list)
+    tasks: List[TaskOutput] = Field(min_length=1)
+
+
+# =========================
+# Export
+# =========================
+class ExportOutput(BaseModel):
+    document: FunctionalDesignDocument
+    github_export: List[GithubExport] = Field(default_factory=list)
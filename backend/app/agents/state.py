@@ -1,6 +1,18 @@
-from typing import TypedDict, Optional
+import json
+from typing import Annotated, Mapping, TypedDict, Optional, TypeVar
 from uuid import UUID
 
+T = TypeVar("T")
+
+
+def keep_latest(current: Optional[T], update: Optional[T]) -> Optional[T]:
+    """
+    Reducer LangGraph: garde la dernière valeur non-nulle.
+    Permet aux branches parallèles (REQUIREMENTS / DIAGRAMS / PLANNER) d'écrire
+    leurs propres clés sans écraser celles des autres avec None.
+    """
+    return current if update is None else update
+
 
 class BlueprintState(TypedDict):
     # Context
@@ -9,24 +21,59 @@ class BlueprintState(TypedDict):
     idea: str
 
     # Project metadata (generated by metadata agent)
-    project_name: Optional[str]
-    project_description: Optional[str]
+    project_name: Annotated[Optional[str], keep_latest]
+    project_description: Annotated[Optional[str], keep_latest]
 
     # Outputs des agents (contenu texte brut - sans MinIO)
-    problem_definition: Optional[str]
-    functional_requirements: Optional[str]
-    non_functional_requirements: Optional[str]
-    architecture: Optional[str]
-    uml_sequence: Optional[str]
-    sprint_planning: Optional[str]
+    problem_definition: Annotated[Optional[str], keep_latest]
+    functional_requirements: Annotated[Optional[str], keep_latest]
+    non_functional_requirements: Annotated[Optional[str], keep_latest]
+    architecture: Annotated[Optional[str], keep_latest]
+    uml_sequence: Annotated[Optional[str], keep_latest]
+    sprint_planning: Annotated[Optional[str], keep_latest]
 
     # Contenu généré par les agents (texte brut pour frontend)
-    requirements_content: Optional[str]      # Contenu requirements.md
-    diagrams_content: Optional[str]          # Contenu diagrams.md
-    diagrams_json_content: Optional[str]     # JSON React Flow pour frontend
-    planner_json_content: Optional[str]      # JSON structuré (time, cost, stack, risks, criteria, tasks)
-    export_content: Optional[str]            # Contenu final export.md
-    export_json_content: Optional[str]       # JSON structuré (document, github_export)
+    requirements_content: Annotated[Optional[str], keep_latest]      # Contenu requirements.md
+    diagrams_content: Annotated[Optional[str], keep_latest]          # Contenu diagrams.md
+    diagrams_json_content: Annotated[Optional[str], keep_latest]     # JSON React Flow pour frontend
+    planner_json_content: Annotated[Optional[str], keep_latest]      # JSON structuré (time, cost, stack, risks, criteria, tasks)
+    export_content: Annotated[Optional[str], keep_latest]            # Contenu final export.md
+    export_json_content: Annotated[Optional[str], keep_latest]       # JSON structuré (document, github_export)
+
+    # Sorties JSON des agents, parsées et validées une seule fois (app/agents/schemas.py).
+    # Remplacent les *_json_content / requirements_content texte, lus via json_content()
+    requirements_data: Annotated[Optional[dict], keep_latest]
+    diagrams_data: Annotated[Optional[dict], keep_latest]
+    planner_data: Annotated[Optional[dict], keep_latest]
+    export_data: Annotated[Optional[dict], keep_latest]
 
     # Final
-    blueprint_markdown: Optional[str]
+    blueprint_markdown: Annotated[Optional[str], keep_latest]
+
+    # Régénération partielle : noeuds à ré-exécuter (None = pipeline complet)
+    regenerate: Optional[list[str]]
+    # _id des éléments écrits par PERSIST, par type (diagram / requirement / task) :
+    # une régénération remplace exactement ces éléments
+    persisted_ids: Annotated[Optional[dict], keep_latest]
+
+
+# Clé texte (JSON brut des runs antérieurs) -> clé de la sortie parsée
+JSON_CONTENT_KEYS = {
+    "requirements_content": "requirements_data",
+    "diagrams_json_content": "diagrams_data",
+    "planner_json_content": "planner_data",
+    "export_json_content": "export_data",
+}
+
+
+def json_content(state: Optional[Mapping], key: str) -> Optional[str]:
+    """
+    JSON texte d'une sortie d'agent (API, prompt de l'export) : sérialisé depuis
+    la sortie parsée, ou texte brut stocké par les runs antérieurs.
+    """
+    if not state:
+        return None
+    data = state.get(JSON_CONTENT_KEYS[key])
+    if data is not None:
+        return json.dumps(data, ensure_ascii=False)
+    return state.get(key)
@@ -0,0 +1,66 @@
+"""
+Streaming des sorties LLM vers les événements du run (stream run:{run_id}:events
++ canal run:{run_id}).
+
+Les tokens sont regroupés et publiés (sans bloquer le stream, via le
+BatchingPublisher) au plus toutes les STREAM_FLUSH_INTERVAL_MS
+sous la forme "TOKENS:{agent}:{texte}". Si `item_key` est fourni, la réponse est
+aussi parsée au fil de l'eau et chaque objet complété de la liste est publié
+immédiatement en "ITEM:{item_kind}:{json}".
+"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Callable, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.events import get_publisher
+from app.llm.json_stream import JsonArrayItemStream
+
+
+class RunStreamPublisher:
+    def __init__(
+        self,
+        run_id: UUID | str,
+        agent: str,
+        item_key: Optional[str] = None,
+        item_kind: Optional[str] = None,
+        flush_interval_ms: Optional[int] = None,
+    ):
+        self.run_id = run_id
+        self.agent = agent
+        self.item_kind = item_kind or item_key
+        self.flush_interval = (flush_interval_ms if flush_interval_ms is not None else settings.stream_flush_interval_ms) / 1000
+        self._parser = JsonArrayItemStream(item_key) if item_key else None
+        self._pending: list[str] = []
+        self._last_flush = time.monotonic()
+        self.items_emitted = 0
+
+    @property
+    def callback(self) -> Optional[Callable[[str], None]]:
+        """Callback à passer à `llm_call(on_token=...)` (None si le streaming est désactivé)."""
+        return self.on_token if settings.llm_streaming else None
+
+    def on_token(self, chunk: str) -> None:
+        self._pending.append(chunk)
+
+        if self._parser is not None:
+            for item in self._parser.feed(chunk):
+                self.items_emitted += 1
+                get_publisher().emit_run_event_nowait(self.run_id, f"ITEM:{self.item_kind}:{json.dumps(item, ensure_ascii=False)}")
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        get_publisher().emit_run_event_nowait(self.run_id, f"TOKENS:{self.agent}:{text}")
+
+    def close(self) -> None:
+        self.flush()
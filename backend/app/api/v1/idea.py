@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel
-from rq import Queue
-from typing import Optional
+from rq import Queue, Retry
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from app.repositories import runs_repo
+from app.core import tracing
 from app.core.events import get_redis
-from app.jobs.blueprint_job import run_blueprint_job
+from app.services.user_service import isAllowed
 from app.domain.project import Project
 from app.services.project_service import create, update , create_project_with_roles
 
@@ -33,6 +34,16 @@ class IdeaIn(BaseModel):
     webhook_url: Optional[str] = None  # URL pour callback quand terminé
 
 
+class RegenerateIn(BaseModel):
+    project_id: str
+    # Artefacts à régénérer ; les autres sont repris du dernier run réussi.
+    # "export" n'est pas ré-exécuté implicitement : l'ajouter pour qu'il reflète
+    # les nouveaux diagrammes / requirements / plan.
+    artifacts: List[Literal["metadata", "requirements", "diagrams", "plan", "export"]]
+    idea: Optional[str] = None  # par défaut : l'idée du run source
+    webhook_url: Optional[str] = None
+
+
 @router.post("/generate")
 async def generate_blueprint(payload: IdeaIn, current_user: object = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
     # 🆕 Auto-create project if project_id not provided
@@ -102,29 +113,86 @@ async def generate_blueprint(payload: IdeaIn, current_user: object = Depends(get
         project_id = payload.project_id
         print(f"[IDEA_API] Using existing project_id: {project_id}")
 
-    # 1) create run in DB (MongoDB async)
+    # 1) create run in DB (MongoDB async) - l'idée est gardée pour une régénération
     run = await runs_repo.create_run(
         project_id=project_id,
-        state={}
+        state={"idea": payload.idea}
     )
 
     # 2) enqueue job to RQ
-    q = Queue(name="fromscratch", connection=get_redis())
+    job = _enqueue_run(run.id, project_id, payload.idea, payload.webhook_url)
+
+    return {
+        "run_id": str(run.id),
+        "project_id": str(project_id),  # 🆕 Return the project_id (useful for frontend)
+        "status": "queued",
+        "job_id": job.id,
+        "websocket_url": f"/ws/run/{run.id}",
+    }
+
 
-    job = q.enqueue(
-        run_blueprint_job,  # Pass function directly instead of string
-        str(run.id),  # Convert UUID to string for RQ
-        str(project_id),  # 🆕 Use the resolved project_id (auto-created or provided)
-        payload.idea,
-        payload.webhook_url,
+def _enqueue_run(run_id, project_id, idea: str, webhook_url: Optional[str]):
+    q = Queue(name="fromscratch", connection=get_redis())
+    # Contexte de trace passé au job seulement si le tracing est actif
+    trace_kwargs = {"trace_context": context} if (context := tracing.inject_context()) else {}
+    return q.enqueue(
+        # Chemin importé par le worker : l'API ne charge ni le job ni le pipeline
+        "app.jobs.blueprint_job.run_blueprint_job",
+        str(run_id),  # Convert UUID to string for RQ
+        str(project_id),
+        idea,
+        webhook_url,
+        **trace_kwargs,
         job_timeout=600,   # 10 min
+        retry=Retry(max=2, interval=[10, 60]),  # resumes from the last completed node
         result_ttl=3600,   # keep result 1h
         ttl=3600,
     )
 
+
+@router.post("/regenerate")
+async def regenerate_artifacts(payload: RegenerateIn, current_user: object = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Régénère seulement certains artefacts d'un projet (ex. diagrams => DIAGRAMS → PERSIST).
+    Les sorties des autres noeuds sont reprises du dernier run réussi, et seuls les
+    éléments générés précédemment pour les artefacts demandés sont remplacés.
+    """
+    if not await isAllowed(current_user.get("id"), payload.project_id, "manage_project"):
+        raise HTTPException(403, "Not enough permissions")
+    if not payload.artifacts:
+        raise HTTPException(400, "No artifact to regenerate")
+
+    latest = await runs_repo.get_latest_run_for_project(payload.project_id)
+    if latest and latest.status in ("queued", "running", "retrying"):
+        raise HTTPException(409, "A generation is already in progress for this project")
+
+    source = await runs_repo.get_latest_run_for_project(payload.project_id, status="succeeded")
+    if not source:
+        raise HTTPException(404, "No completed generation to regenerate from")
+    if not source.state.get("persisted_ids"):
+        # Run antérieur au suivi des éléments écrits : ses éléments ne pourraient
+        # pas être remplacés, la régénération les dupliquerait
+        raise HTTPException(409, "The last generation predates partial regeneration; run a full generation first")
+
+    idea = payload.idea or source.state.get("idea")
+    if not idea:
+        raise HTTPException(400, "The source run has no stored idea; provide `idea`")
+
+    from app.agents.graph import REGENERABLE_STAGES, make_regeneration_state
+
+    stages = [REGENERABLE_STAGES[a] for a in payload.artifacts]
+    state = make_regeneration_state(source.state, stages, idea)
+    state["source_run_id"] = str(source.id)
+
+    run = await runs_repo.create_run(project_id=payload.project_id, state=state)
+    job = _enqueue_run(run.id, payload.project_id, idea, payload.webhook_url)
+    print(f"[IDEA_API] Regenerating {state['regenerate']} for project {payload.project_id} from run {source.id}")
+
     return {
         "run_id": str(run.id),
-        "project_id": str(project_id),  # 🆕 Return the project_id (useful for frontend)
+        "project_id": payload.project_id,
+        "source_run_id": str(source.id),
+        "stages": state["regenerate"] + ["PERSIST"],
         "status": "queued",
         "job_id": job.id,
         "websocket_url": f"/ws/run/{run.id}",
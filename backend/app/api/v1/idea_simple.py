@@ -59,7 +59,7 @@ Produce a structured answer in clear Markdown with the following sections:
 Answer in Markdown, well structured, easy to convert to a document later.
 """
 
-    answer = await llm_call(prompt)
+    answer = await llm_call(prompt, priority="interactive")
     return {
         "project_id": payload.project_id,
         "idea": payload.idea,
@@ -55,10 +55,11 @@ async def get_project_endpoint(project_id: str, payload: ProjectIn, current_user
         raise HTTPException(404, "Project not found")
     if not await isAllowed(current_user.get("id"), project_id, "manage_project"):
         raise HTTPException(403, "Not enough permissions")
-    p.name = payload.name
-    p.description = payload.description
-    p.full_description = payload.full_description
-    await p.save()
+    await p.set({
+        "name": payload.name,
+        "description": payload.description,
+        "full_description": payload.full_description,
+    })
     return p
 
 @router.get("/{project_id}/members")
@@ -85,7 +86,8 @@ async def delete_project_endpoint(project_id: str, current_user: object = Depend
         raise HTTPException(404, "Project not found")
     if project.created_by != current_user.get("id"):
         raise HTTPException(403, "Only the project owner can delete the project")
-    await log_activity(project_id, current_user.get("id"), f"Deleted project: {project.name}")
+    # Écrite tout de suite : mise en attente, elle serait écrite après la suppression
+    await log_activity(project_id, current_user.get("id"), f"Deleted project: {project.name}", immediate=True)
     return await delete_project(project)
 
 @router.get("/{project_id}/owner")
@@ -1,9 +1,12 @@
 import json
 import urllib.parse
 from typing import Optional, Dict, Any
+from uuid import UUID
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from app.services.realtime import manager, room_key
+from app.services.run_events import iter_run_events
+from app.core import metrics
 from app.core.observability import logger
 
 
@@ -68,17 +71,9 @@ async def ws_project_page(websocket: WebSocket, project_id: str, page_id: str):
 
             mtype = data.get("type")
             if mtype == "cursor":
-                # Broadcast cursor positions to others in the same room; never persisted
-                payload = {
-                    "type": "cursor",
-                    "projectId": str(project_id),
-                    "pageId": str(page_id),
-                    "user": user,
-                    "x": data.get("x"),
-                    "y": data.get("y"),
-                    "ts": data.get("ts"),
-                }
-                await manager.broadcast(key, payload, skip=websocket)
+                # Latest position only; flushed to the room in a batched `cursors` frame
+                # at REALTIME_CURSOR_HZ. Never persisted.
+                manager.update_cursor(key, user, data.get("x"), data.get("y"), data.get("ts"))
             # Additional realtime-only messages can be handled here
     except WebSocketDisconnect:
         # Remove from room and notify others
@@ -95,6 +90,38 @@ async def ws_project_page(websocket: WebSocket, project_id: str, page_id: str):
         )
 
 
+@router.websocket("/ws/run/{run_id}")
+async def ws_run_events(websocket: WebSocket, run_id: UUID):
+    """Run progress events, replayed from `last_id` (query param) then live.
+
+    Each frame is `{"id": <stream id>, "data": <message>}`; a client that
+    reconnects passes the last id it received to resume without gaps.
+    """
+    await websocket.accept()
+    last_id = websocket.query_params.get("last_id")
+    metrics.track_run_socket(1)
+    try:
+        async for event in iter_run_events(run_id, last_id):
+            if event is None:
+                await websocket.send_text(json.dumps({"type": "keepalive"}))
+                continue
+            event_id, message = event
+            await websocket.send_text(json.dumps({"id": event_id, "data": message}))
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"Run WS disconnect: run={run_id}")
+    except Exception as e:
+        # Redis indisponible, envoi sur un socket déjà fermé... : fermeture propre
+        # (1011) pour que le client se reconnecte avec son dernier `last_id`
+        logger.warning(f"Run WS error: run={run_id}: {e}")
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        metrics.track_run_socket(-1)
+
+
 @router.get('/rooms')
 async def list_rooms():
     # Debug endpoint to inspect current rooms and counts
@@ -1,7 +1,10 @@
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse
 from uuid import UUID
+from app.agents.state import json_content
 from app.repositories import runs_repo
+from app.services.run_events import iter_run_events
 
 
 router = APIRouter(prefix="/v1/runs", tags=["Runs"])
@@ -36,10 +39,38 @@ async def get_run_status(run_id: UUID):
         
         # 🆕 CONTENU TEXTE DIRECT depuis le state JSON
         "content": {
-            "requirements": run.state.get("requirements_content"),
+            "requirements": json_content(run.state, "requirements_content"),
             "diagrams": run.state.get("diagrams_content"),
-            "diagrams_json": run.state.get("diagrams_json_content"),  # 🎯 JSON React Flow
+            "diagrams_json": json_content(run.state, "diagrams_json_content"),  # 🎯 JSON React Flow
             "plan": run.state.get("planner_content"),
             "export": run.state.get("export_content") or run.state.get("blueprint_markdown"),
         },
     }
+
+
+@router.get("/{run_id}/events")
+async def stream_run_events(
+    run_id: UUID,
+    last_id: str | None = Query(None),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events des événements du run.
+    Reprise depuis `Last-Event-ID` (reconnexion automatique du navigateur) ou `last_id`."""
+    run = await runs_repo.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    async def event_source():
+        async for event in iter_run_events(run_id, last_event_id or last_id):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            event_id, message = event
+            data = "".join(f"data: {line}\n" for line in message.split("\n"))
+            yield f"id: {event_id}\n{data}\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
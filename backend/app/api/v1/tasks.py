@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from app.api.deps import get_db, get_current_user
 from app.services.task_service import (
@@ -29,13 +29,13 @@ async def create_task(project_id: str, payload: dict, current_user: object = Dep
     return task
 
 @router.get("/{project_id}", response_model=List[dict])
-async def list_tasks(project_id: str, current_user: object = Depends(get_current_user), _=Depends(get_db)):
+async def list_tasks(project_id: str, assignee_id: Optional[str] = None, current_user: object = Depends(get_current_user), _=Depends(get_db)):
     project = await get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if not await isAllowed(current_user.get("id"), project_id, "view_tasks"):
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return await list_by_project(project_id)
+    return await list_by_project(project_id, assignee_id)
 
 @router.put("/{project_id}/{doc_id}", response_model=TaskStructure)
 async def update_task(project_id: str, doc_id: str, payload: dict, current_user: object = Depends(get_current_user), _=Depends(get_db)):
@@ -34,6 +34,102 @@ class Settings(BaseSettings):
     nvidia_api_key: str | None = Field(None, alias="NVIDIA_API_KEY")
     nvidia_model: str | None = Field("deepseek-ai/deepseek-r1", alias="NVIDIA_MODEL")
 
+    # Provider factice (MODEL_PROVIDER=fake) : fixtures rejouées avec latence +/- jitter
+    fake_llm_latency_ms: float = Field(0, alias="FAKE_LLM_LATENCY_MS")
+    fake_llm_jitter_ms: float = Field(0, alias="FAKE_LLM_JITTER_MS")
+    fake_llm_chunk_chars: int = Field(64, alias="FAKE_LLM_CHUNK_CHARS")
+    fake_llm_seed: int | None = Field(None, alias="FAKE_LLM_SEED")
+
+    # Cache des réponses LLM : none | memory (LRU en process) | redis (LRU + Redis partagé)
+    llm_cache_backend: str = Field("memory", alias="LLM_CACHE_BACKEND")
+    llm_cache_ttl_seconds: int = Field(24 * 3600, alias="LLM_CACHE_TTL_SECONDS")
+    llm_cache_max_entries: int = Field(256, alias="LLM_CACHE_MAX_ENTRIES")
+
+    # Streaming des tokens LLM vers le canal run:{run_id} (coalescés toutes les N ms)
+    llm_streaming: bool = Field(True, alias="LLM_STREAMING")
+    stream_flush_interval_ms: int = Field(100, alias="STREAM_FLUSH_INTERVAL_MS")
+
+    # Stockage des éléments des nouveaux projets : embedded (tableau `data`) | items
+    # (un document par élément) ; les projets existants passent par scripts/migrate_item_storage.py
+    item_storage_default: str = Field("embedded", alias="ITEM_STORAGE_DEFAULT")
+    # Mode de stockage d'un projet mémorisé par processus (la migration attend ce délai)
+    item_storage_mode_cache_seconds: int = Field(30, alias="ITEM_STORAGE_MODE_CACHE_SECONDS")
+
+    # Index Mongo (Settings.indexes des documents) : background (réconciliés en tâche
+    # de fond au démarrage de l'API) | init (créés par init_beanie, bloquant) | off
+    # (uniquement via scripts/reconcile_indexes.py)
+    mongo_indexes: str = Field("background", alias="MONGO_INDEXES")
+
+    # Journal d'activité : buffered (entrées écrites par lots en tâche de fond par
+    # l'API, app/services/activity_log.py) | inline (écriture dans la requête)
+    activity_log_mode: str = Field("buffered", alias="ACTIVITY_LOG_MODE")
+    activity_log_flush_interval_ms: int = Field(500, alias="ACTIVITY_LOG_FLUSH_INTERVAL_MS")
+    activity_log_batch_size: int = Field(500, alias="ACTIVITY_LOG_BATCH_SIZE")
+    # Au-delà, log_activity attend un flush (contre-pression)
+    activity_log_max_pending: int = Field(10000, alias="ACTIVITY_LOG_MAX_PENDING")
+
+    # Sorties JSON des agents : nombre de re-demandes ciblées des champs invalides
+    structured_output_max_reasks: int = Field(1, alias="STRUCTURED_OUTPUT_MAX_REASKS")
+
+    # Cache des permissions effectives par (info_id, project_id), en secondes (0 = désactivé)
+    permission_cache_ttl_seconds: int = Field(30, alias="PERMISSION_CACHE_TTL_SECONDS")
+    # Nombre maximal d'entrées (info_id, project_id) du cache des permissions (LRU)
+    permission_cache_max_entries: int = Field(10000, alias="PERMISSION_CACHE_MAX_ENTRIES")
+
+    # Routage multi-provider : liste ordonnée (ex. "openai,nvidia" ; vide = MODEL_PROVIDER seul)
+    llm_providers: str = Field("", alias="LLM_PROVIDERS")
+    # Hedging : requête dupliquée sur le provider suivant au-delà du p95 du principal
+    # (LLM_HEDGE_DELAY_SECONDS tant qu'il y a moins de LLM_HEDGE_MIN_SAMPLES mesures)
+    llm_hedging: bool = Field(True, alias="LLM_HEDGING")
+    llm_hedge_delay_seconds: float = Field(30.0, alias="LLM_HEDGE_DELAY_SECONDS")
+    llm_hedge_min_samples: int = Field(20, alias="LLM_HEDGE_MIN_SAMPLES")
+    # Circuit breaker : ouvert après N échecs consécutifs ou si l'EWMA dépasse le seuil (0 = ignoré)
+    llm_circuit_failures: int = Field(3, alias="LLM_CIRCUIT_FAILURES")
+    llm_circuit_cooldown_seconds: float = Field(30.0, alias="LLM_CIRCUIT_COOLDOWN_SECONDS")
+    llm_degraded_latency_seconds: float = Field(0.0, alias="LLM_DEGRADED_LATENCY_SECONDS")
+
+    # Limiteur LLM : appels simultanés par processus + buckets requêtes/tokens par minute
+    # (none | memory (par processus) | redis (partagés entre API et workers) ; 0 = pas de limite)
+    llm_max_concurrency: int = Field(8, alias="LLM_MAX_CONCURRENCY")
+    llm_rate_limit_backend: str = Field("memory", alias="LLM_RATE_LIMIT_BACKEND")
+    llm_rpm: int = Field(0, alias="LLM_RPM")
+    llm_tpm: int = Field(0, alias="LLM_TPM")
+    # Fraction des buckets que les appels background laissent aux appels interactifs
+    llm_interactive_reserve: float = Field(0.1, alias="LLM_INTERACTIVE_RESERVE")
+    # Retries sur 429 : backoff exponentiel à jitter complet
+    llm_max_retries: int = Field(5, alias="LLM_MAX_RETRIES")
+    llm_backoff_base_seconds: float = Field(1.0, alias="LLM_BACKOFF_BASE_SECONDS")
+    llm_backoff_max_seconds: float = Field(60.0, alias="LLM_BACKOFF_MAX_SECONDS")
+
+    # Realtime (WebSocket rooms) : memory (un seul processus) | redis (fan-out multi-processus)
+    realtime_backend: str = Field("memory", alias="REALTIME_BACKEND")
+    realtime_presence_ttl_seconds: int = Field(30, alias="REALTIME_PRESENCE_TTL_SECONDS")
+    # Curseurs regroupés en une trame "cursors" par room et par tick ; socket fermée si un envoi dépasse le timeout
+    realtime_cursor_hz: float = Field(30, alias="REALTIME_CURSOR_HZ")
+    realtime_send_timeout_ms: int = Field(1000, alias="REALTIME_SEND_TIMEOUT_MS")
+
+    # Événements de run : Redis Stream plafonné par run (rejouable via WS/SSE)
+    run_events_maxlen: int = Field(5000, alias="RUN_EVENTS_MAXLEN")
+    run_events_ttl_seconds: int = Field(24 * 3600, alias="RUN_EVENTS_TTL_SECONDS")
+
+    # Pipeline: REQUIREMENTS / DIAGRAMS / PLANNER en parallèle (sinon séquentiel)
+    pipeline_parallel: bool = Field(True, alias="PIPELINE_PARALLEL")
+
+    # Worker RQ persistant : nombre de pipelines exécutés en parallèle par processus
+    worker_concurrency: int = Field(4, alias="WORKER_CONCURRENCY")
+
+    # Métriques Prometheus (prometheus_client) : GET /metrics sur l'API ; le worker
+    # les expose sur son propre port (0 = désactivé)
+    metrics_enabled: bool = Field(True, alias="METRICS_ENABLED")
+    worker_metrics_port: int = Field(9100, alias="WORKER_METRICS_PORT")
+
+    # Traces OpenTelemetry (requête API -> job RQ -> noeuds -> LLM / Mongo) :
+    # none | file (JSON par ligne dans TRACING_FILE) | otlp (OTEL_EXPORTER_OTLP_ENDPOINT)
+    tracing_exporter: str = Field("none", alias="TRACING_EXPORTER")
+    tracing_file: str = Field("logs/traces.jsonl", alias="TRACING_FILE")
+    # Part des traces conservées (une trace démarrée par l'API est suivie par le worker)
+    tracing_sample_ratio: float = Field(1.0, alias="TRACING_SAMPLE_RATIO")
+
     class Config:
         env_file = ".env"
         extra = "ignore"
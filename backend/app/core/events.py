@@ -1,15 +1,20 @@
 # app/core/events.py
-import time
+import asyncio
 import redis
-from typing import Generator
+import redis.asyncio as aioredis
+from typing import AsyncIterator
 from app.core.config import settings
+from app.core.observability import get_logger
+
+logger = get_logger("fromscratch.events")
 
 _redis: redis.Redis | None = None
+_async_redis: aioredis.Redis | None = None
 
 
 def get_redis() -> redis.Redis:
     """
-    Singleton Redis connection.
+    Singleton Redis connection (synchrone : utilisée par RQ).
     IMPORTANT: settings.redis_url يجب يكون redis://redis:6379/0 داخل Docker
     """
     global _redis
@@ -25,33 +30,166 @@ def get_redis() -> redis.Redis:
     return _redis
 
 
-def publish(channel: str, message: str) -> None:
+def get_async_redis() -> aioredis.Redis:
+    """
+    Singleton Redis asyncio (pool de connexions partagé) pour le code async.
+    """
+    global _async_redis
+
+    if _async_redis is None:
+        _async_redis = aioredis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_keepalive=True,
+            health_check_interval=30,
+        )
+
+    return _async_redis
+
+
+def run_channel(run_id) -> str:
+    return f"run:{run_id}"
+
+
+def run_stream_key(run_id) -> str:
+    return f"run:{run_id}:events"
+
+
+def _queue_run_event(pipe, run_id, message: str) -> None:
+    """XADD dans le stream plafonné du run + PUBLISH pour les abonnés Pub/Sub."""
+    key = run_stream_key(run_id)
+    pipe.xadd(key, {"data": message}, maxlen=settings.run_events_maxlen, approximate=True)
+    pipe.expire(key, settings.run_events_ttl_seconds)
+    pipe.publish(run_channel(run_id), message)
+
+
+class BatchingPublisher:
+    """
+    Publication "fire-and-forget" : `publish_nowait` / `emit_run_event_nowait` ne
+    bloquent jamais (utilisables depuis un callback synchrone, ex. tokens LLM).
+    Les messages d'une rafale sont regroupés et envoyés par une tâche de fond en
+    un seul aller-retour (pipeline), dans l'ordre d'arrivée par canal.
+    """
+
+    def __init__(self, flush_interval: float = 0.05):
+        self.flush_interval = flush_interval
+        # (channel, message, run_id) ; run_id non nul => événement de run (stream + pub/sub)
+        self._pending: list[tuple[str, str, object]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def publish_nowait(self, channel: str, message: str) -> None:
+        self._enqueue(channel, message, None)
+
+    def emit_run_event_nowait(self, run_id, message: str) -> None:
+        self._enqueue(run_channel(run_id), message, run_id)
+
+    def _enqueue(self, channel: str, message: str, run_id) -> None:
+        self._pending.append((channel, message, run_id))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def has_pending(self, channel: str | None = None) -> bool:
+        return any(channel is None or c == channel for c, _, _ in self._pending)
+
+    async def flush(self) -> None:
+        """Envoie immédiatement tous les messages en attente."""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                pipe = get_async_redis().pipeline(transaction=False)
+                for channel, message, run_id in batch:
+                    if run_id is not None:
+                        _queue_run_event(pipe, run_id, message)
+                    else:
+                        pipe.publish(channel, message)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Events: batched publish of {len(batch)} messages failed: {e}")
+
+
+_publisher: BatchingPublisher | None = None
+
+
+def get_publisher() -> BatchingPublisher:
+    global _publisher
+
+    if _publisher is None:
+        _publisher = BatchingPublisher()
+
+    return _publisher
+
+
+async def publish(channel: str, message: str) -> int:
+    """
+    Publish message to Redis Pub/Sub channel (non bloquant pour la boucle).
+    Les messages "fire-and-forget" encore en attente sur ce canal partent avant,
+    pour garder l'ordre. Une erreur Redis est loggée, pas propagée.
+    """
+    publisher = get_publisher()
+    if publisher.has_pending(channel):
+        await publisher.flush()
+    try:
+        return await get_async_redis().publish(channel, message)
+    except Exception as e:
+        logger.warning(f"Events: publish to {channel} failed: {e}")
+        return 0
+
+
+async def emit_run_event(run_id, message: str) -> str | None:
+    """
+    Événement de progression d'un run : ajouté au Redis Stream plafonné
+    `run:{run_id}:events` (rejouable depuis un id, voir `read_run_events`) et
+    publié sur `run:{run_id}`. Retourne l'id de l'entrée (None si Redis échoue).
+    """
+    publisher = get_publisher()
+    if publisher.has_pending(run_channel(run_id)):
+        await publisher.flush()
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        _queue_run_event(pipe, run_id, message)
+        results = await pipe.execute()
+        return results[0]
+    except Exception as e:
+        logger.warning(f"Events: run event for {run_id} failed: {e}")
+        return None
+
+
+async def read_run_events(run_id, last_id: str = "0-0", block_ms: int | None = None, count: int = 200) -> list[tuple[str, str]]:
     """
-    Publish message to Redis Pub/Sub channel.
+    Événements du run postérieurs à `last_id` ("0-0" = depuis le début).
+    Avec `block_ms`, attend au plus ce délai qu'un événement arrive.
     """
-    r = get_redis()
-    r.publish(channel, message)
+    response = await get_async_redis().xread({run_stream_key(run_id): last_id}, count=count, block=block_ms)
+    events: list[tuple[str, str]] = []
+    for _key, entries in response or []:
+        for event_id, fields in entries:
+            events.append((event_id, fields.get("data", "")))
+    return events
 
 
-def subscribe(channel: str) -> Generator[str, None, None]:
+async def subscribe(channel: str) -> AsyncIterator[str]:
     """
-    Generator كيرجع messages من Redis Pub/Sub.
-    مناسب للـ WebSocket (sync loop).
+    Itérateur async des messages d'un canal Redis Pub/Sub (pour WebSocket/SSE).
     """
-    r = get_redis()
-    pubsub = r.pubsub(ignore_subscribe_messages=True)
-    pubsub.subscribe(channel)
+    pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(channel)
 
     try:
-        for msg in pubsub.listen():
+        async for msg in pubsub.listen():
             # msg = {'type': 'message', 'channel': 'run:1', 'data': '...'}
             if msg and msg.get("type") == "message":
                 yield msg["data"]
-            else:
-                time.sleep(0.01)
     finally:
         try:
-            pubsub.unsubscribe(channel)
-            pubsub.close()
+            await pubsub.unsubscribe(channel)
+            close = getattr(pubsub, "aclose", None) or pubsub.close
+            await close()
         except Exception:
             pass
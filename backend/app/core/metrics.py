@@ -0,0 +1,231 @@
+"""
+Métriques Prometheus (optionnel : prometheus_client).
+
+- API : GET /metrics (METRICS_ENABLED) ; worker RQ : serveur HTTP sur
+  WORKER_METRICS_PORT. Chaque processus expose ses propres séries, le scrape se
+  fait par pod / processus.
+- Routes : latence par template de route (`/api/v1/projects/{project_id}`, pas
+  l'URL réelle) pour garder une cardinalité bornée.
+- Pipeline : durée de chaque noeud (observateur de app/agents/graph.py).
+- LLM : latence des appels provider et tokens, par agent (noeud courant, via
+  `current_agent`) et provider.
+- Mongo : nombre et latence des commandes par collection (CommandListener
+  pymongo passé au client Motor).
+- RQ : profondeur des files (lue à chaque scrape) ; WebSocket : rooms et sockets
+  ouverts du processus.
+
+Sans prometheus_client, toutes les fonctions de ce module sont des no-op.
+"""
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Any, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.mongo_events import IGNORED_MONGO_COMMANDS, collection_of
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+try:
+    from pymongo import monitoring
+except ImportError:
+    monitoring = None
+
+# Agent à l'origine des appels LLM : nom du noeud du pipeline en cours
+# (positionné par app/agents/graph.py), "other" hors pipeline (chat, tests)
+current_agent: ContextVar[str] = ContextVar("current_agent", default="other")
+
+QUEUES = ("fromscratch",)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+def enabled() -> bool:
+    return prometheus_client is not None and settings.metrics_enabled
+
+
+if prometheus_client is not None:
+    HTTP_REQUEST_SECONDS = Histogram(
+        "fromscratch_http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ["method", "route", "status"],
+        buckets=LATENCY_BUCKETS,
+    )
+    NODE_SECONDS = Histogram(
+        "fromscratch_pipeline_node_duration_seconds",
+        "Blueprint pipeline node duration (checkpoint included)",
+        ["node", "outcome"],
+        buckets=SLOW_BUCKETS,
+    )
+    LLM_SECONDS = Histogram(
+        "fromscratch_llm_request_duration_seconds",
+        "LLM provider call latency (rate-limiter wait excluded)",
+        ["agent", "provider", "outcome"],
+        buckets=SLOW_BUCKETS,
+    )
+    LLM_TOKENS = Counter(
+        "fromscratch_llm_tokens_total",
+        "LLM tokens by agent and provider",
+        ["agent", "provider", "kind"],  # kind: input | output | cached_input
+    )
+    MONGO_SECONDS = Histogram(
+        "fromscratch_mongo_command_duration_seconds",
+        "MongoDB command latency",
+        ["command", "collection", "outcome"],
+        buckets=LATENCY_BUCKETS,
+    )
+    RUN_SOCKETS = Gauge(
+        "fromscratch_ws_run_sockets",
+        "Open /ws/run/{run_id} sockets in this process",
+    )
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if enabled():
+        HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_node(name: str, run_id: UUID, seconds: float, error: Optional[BaseException]) -> None:
+    """Observateur de noeud (add_node_observer)."""
+    if enabled():
+        NODE_SECONDS.labels(name, "ok" if error is None else "error").observe(seconds)
+
+
+def observe_llm(provider: str, seconds: float, error: Optional[BaseException] = None) -> None:
+    if enabled():
+        LLM_SECONDS.labels(current_agent.get(), provider, "ok" if error is None else "error").observe(seconds)
+
+
+def count_llm_tokens(provider: str, usage: Optional[dict]) -> None:
+    if not enabled() or not usage:
+        return
+    agent = current_agent.get()
+    LLM_TOKENS.labels(agent, provider, "input").inc(usage.get("input_tokens") or 0)
+    LLM_TOKENS.labels(agent, provider, "output").inc(usage.get("output_tokens") or 0)
+    LLM_TOKENS.labels(agent, provider, "cached_input").inc(usage.get("cached_input_tokens") or 0)
+
+
+def track_run_socket(delta: int) -> None:
+    if enabled():
+        RUN_SOCKETS.inc(delta)
+
+
+# =========================
+# Mongo
+# =========================
+if monitoring is not None:
+    class MongoCommandMetrics(monitoring.CommandListener):
+        """Latence des commandes Mongo ; la collection n'est connue qu'au `started`."""
+
+        def __init__(self) -> None:
+            self._pending: dict[tuple[Any, int], str] = {}
+
+        def started(self, event) -> None:
+            if event.command_name not in IGNORED_MONGO_COMMANDS:
+                key = (event.connection_id, event.request_id)
+                self._pending[key] = collection_of(event.command_name, event.command) or "-"
+
+        def _observe(self, event, outcome: str) -> None:
+            collection = self._pending.pop((event.connection_id, event.request_id), None)
+            if collection is not None:
+                MONGO_SECONDS.labels(event.command_name, collection, outcome).observe(event.duration_micros / 1e6)
+
+        def succeeded(self, event) -> None:
+            self._observe(event, "ok")
+
+        def failed(self, event) -> None:
+            self._observe(event, "error")
+
+
+def mongo_listeners() -> list:
+    """Listener de métriques Mongo (vide si les métriques sont désactivées)."""
+    if not enabled() or monitoring is None:
+        return []
+    return [MongoCommandMetrics()]
+
+
+# =========================
+# Collecteurs lus au scrape
+# =========================
+class _QueueCollector:
+    """Profondeur des files RQ (jobs en attente / en cours / en échec)."""
+
+    def describe(self):
+        # Pas de collect() à l'enregistrement (il interrogerait Redis au démarrage)
+        return []
+
+    def collect(self):
+        from rq import Queue
+        from rq.registry import FailedJobRegistry, StartedJobRegistry
+
+        from app.core.events import get_redis
+
+        family = GaugeMetricFamily("fromscratch_rq_jobs", "RQ jobs by queue and state", labels=["queue", "state"])
+        try:
+            connection = get_redis()
+            for name in QUEUES:
+                queue = Queue(name=name, connection=connection)
+                family.add_metric([name, "queued"], queue.count)
+                family.add_metric([name, "started"], StartedJobRegistry(queue=queue).count)
+                family.add_metric([name, "failed"], FailedJobRegistry(queue=queue).count)
+        except Exception:
+            # Redis indisponible : la série disparaît plutôt que de casser le scrape
+            pass
+        yield family
+
+
+class _RealtimeCollector:
+    """Rooms collaboratives et sockets ouverts dans ce processus."""
+
+    def __init__(self, manager) -> None:
+        self.manager = manager
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        rooms = dict(self.manager.rooms)
+        yield GaugeMetricFamily("fromscratch_ws_rooms", "Active realtime rooms in this process", value=len(rooms))
+        yield GaugeMetricFamily(
+            "fromscratch_ws_room_sockets",
+            "Open realtime room sockets in this process",
+            value=sum(len(sockets) for sockets in rooms.values()),
+        )
+
+
+_registered = False
+
+
+def register_api_collectors(manager) -> None:
+    """Collecteurs RQ et WebSocket (API uniquement), une seule fois par processus."""
+    global _registered
+    if not enabled() or _registered:
+        return
+    prometheus_client.REGISTRY.register(_QueueCollector())
+    prometheus_client.REGISTRY.register(_RealtimeCollector(manager))
+    _registered = True
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Corps et content-type de la réponse /metrics (appels Redis bloquants : hors boucle)."""
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> bool:
+    """Serveur HTTP /metrics dans un thread (worker RQ). False si désactivé ou port pris."""
+    if not enabled() or port <= 0:
+        return False
+    try:
+        prometheus_client.start_http_server(port)
+    except OSError as e:
+        print(f"[METRICS] cannot listen on port {port}: {e}")
+        return False
+    return True
+
@@ -0,0 +1,30 @@
+"""
+Commandes Mongo vues par les CommandListener pymongo (métriques : app/core/metrics.py,
+traces : app/core/tracing.py) : commandes ignorées, collection visée, et liste
+des listeners à passer au client Motor.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+# Commandes internes du driver, sans intérêt pour la latence applicative
+IGNORED_MONGO_COMMANDS = frozenset({
+    "hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "buildInfo", "endSessions",
+})
+
+
+def collection_of(command_name: str, command: Any) -> Optional[str]:
+    """Collection visée par la commande (None si la commande n'en vise aucune)."""
+    target = command.get(command_name)
+    if isinstance(target, str):
+        return target
+    # getMore : id de curseur ; la collection est dans "collection"
+    collection = command.get("collection")
+    return collection if isinstance(collection, str) else None
+
+
+def command_listeners() -> list:
+    """Listeners à passer à AsyncIOMotorClient(event_listeners=...) : métriques et traces actives."""
+    from app.core import metrics, tracing
+
+    return metrics.mongo_listeners() + tracing.mongo_listeners()
@@ -0,0 +1,194 @@
+"""
+Traces OpenTelemetry (optionnel : opentelemetry-sdk).
+
+Une génération de blueprint forme une seule trace :
+requête HTTP (POST /api/v1/idea/generate) -> job RQ (contexte W3C `traceparent`
+passé dans les kwargs du job) -> noeuds du pipeline -> appels LLM et commandes
+Mongo (CommandListener pymongo, parent = span courant de l'opération).
+
+TRACING_EXPORTER :
+- none : désactivé (défaut) ;
+- file : un span JSON par ligne dans TRACING_FILE (un fichier par processus,
+  à lire avec jq ou à rejouer vers un collecteur) ;
+- otlp : OTLP/HTTP vers OTEL_EXPORTER_OTLP_ENDPOINT (opentelemetry-exporter-otlp).
+
+Sans opentelemetry installé (ou exporter "none"), `span()` ne fait rien.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from app.core.config import settings
+from app.core.mongo_events import IGNORED_MONGO_COMMANDS, collection_of
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+except ImportError:
+    trace = None
+
+try:
+    from pymongo import monitoring
+except ImportError:
+    monitoring = None
+
+_provider = None
+_tracer = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+if trace is not None:
+    class JsonLinesSpanExporter(SpanExporter):
+        """Exporte chaque span en une ligne JSON (remplace un collecteur OTLP en local)."""
+
+        def __init__(self, path: str):
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> "SpanExportResult":
+            lines = [json.dumps(json.loads(span.to_json())) + "\n" for span in spans]
+            try:
+                with self._lock, self.path.open("a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except OSError:
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+
+def _make_exporter(kind: str):
+    if kind == "file":
+        return JsonLinesSpanExporter(settings.tracing_file)
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter()  # endpoint : OTEL_EXPORTER_OTLP_ENDPOINT
+    raise ValueError(f"Unknown TRACING_EXPORTER: {kind}")
+
+
+def setup_tracing(service_name: str) -> bool:
+    """Configure le provider du processus (une seule fois). False si désactivé."""
+    global _provider, _tracer
+    if _tracer is not None:
+        return True
+    kind = (settings.tracing_exporter or "none").lower()
+    if trace is None or kind == "none":
+        return False
+    try:
+        exporter = _make_exporter(kind)
+    except ImportError as e:
+        print(f"[TRACING] exporter '{kind}' unavailable: {e}")
+        return False
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("fromscratch")
+    print(f"[TRACING] {service_name}: exporting spans ({kind})")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Vide les spans en attente (à l'arrêt du processus)."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """Span enfant du span courant ; les exceptions y sont enregistrées."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name) as current:
+        set_attributes(current, **attributes)
+        yield current
+
+
+def set_attributes(current: Optional[Any], **attributes: Any) -> None:
+    if current is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+
+
+def inject_context() -> dict[str, str]:
+    """Contexte courant au format W3C (traceparent), à passer à un job."""
+    carrier: dict[str, str] = {}
+    if _tracer is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attached_context(carrier: Optional[dict]) -> Iterator[None]:
+    """Rattache le code du bloc à la trace décrite par `carrier` (headers, kwargs de job)."""
+    if _tracer is None or not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+# =========================
+# Mongo
+# =========================
+if monitoring is not None:
+    class MongoCommandTracer(monitoring.CommandListener):
+        """Un span par commande Mongo, enfant du span actif au moment de l'envoi."""
+
+        def __init__(self) -> None:
+            self._pending: dict[tuple[Any, int], Any] = {}
+
+        def started(self, event) -> None:
+            if _tracer is None or event.command_name in IGNORED_MONGO_COMMANDS:
+                return
+            current = _tracer.start_span(f"mongo {event.command_name}")
+            set_attributes(
+                current,
+                **{
+                    "db.system": "mongodb",
+                    "db.name": event.database_name,
+                    "db.operation": event.command_name,
+                    "db.mongodb.collection": collection_of(event.command_name, event.command),
+                },
+            )
+            self._pending[(event.connection_id, event.request_id)] = current
+
+        def succeeded(self, event) -> None:
+            current = self._pending.pop((event.connection_id, event.request_id), None)
+            if current is not None:
+                current.end()
+
+        def failed(self, event) -> None:
+            current = self._pending.pop((event.connection_id, event.request_id), None)
+            if current is not None:
+                current.set_status(trace.Status(trace.StatusCode.ERROR, str(event.failure)))
+                current.end()
+
+
+def mongo_listeners() -> list:
+    """Listener de traces Mongo (vide si le tracing est désactivé)."""
+    if _tracer is None or monitoring is None:
+        return []
+    return [MongoCommandTracer()]
@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from uuid import UUID, uuid4
 from datetime import datetime
 from typing import List, Dict, Any
@@ -25,3 +26,19 @@ class ChatDomain(Document):
 
     class Settings:
         name = "chats"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
+
+
+class ChatMessageItemDomain(Document, SubChatMessage):
+    """Un message par document (projets en stockage "items", voir repositories/item_store.py)."""
+    id:  PydanticObjectId = Field(default_factory=PydanticObjectId, alias="_id")
+    project_id: PydanticObjectId
+    user_id: str
+
+    class Settings:
+        name = "chat_message_items"
+        indexes = [
+            IndexModel([("project_id", ASCENDING), ("timestamp", DESCENDING)]),
+        ]
@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from uuid import UUID, uuid4
 from datetime import datetime
 from typing import List, Dict, Any
@@ -22,3 +23,18 @@ class DiagramDomain(Document):
 
     class Settings:
         name = "diagrams"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
+
+
+class DiagramItemDomain(Document, DiagramStructure):
+    """Un diagramme par document (projets en stockage "items", voir repositories/item_store.py)."""
+    id:  PydanticObjectId = Field(default_factory=PydanticObjectId, alias="_id")
+    project_id: PydanticObjectId
+
+    class Settings:
+        name = "diagram_items"
+        indexes = [
+            IndexModel([("project_id", ASCENDING), ("updated_at", DESCENDING)]),
+        ]
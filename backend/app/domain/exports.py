@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 from typing import List, Optional
 from datetime import datetime
 
@@ -44,3 +45,6 @@ class ExportDomain(Document):
 
     class Settings:
         name = "exports"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
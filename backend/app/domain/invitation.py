@@ -2,6 +2,7 @@
 from datetime import datetime
 from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 
 class ProjectInvitation(Document):
@@ -18,3 +19,8 @@ class ProjectInvitation(Document):
     
     class Settings:
         name = "project_invitations"
+        indexes = [
+            IndexModel([("token", ASCENDING)], unique=True),
+            IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("email", ASCENDING)]),
+            IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING)]),
+        ]
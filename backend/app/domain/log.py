@@ -1,5 +1,6 @@
 from beanie import Document , PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from uuid import UUID, uuid4
 from datetime import datetime
 from typing import List
@@ -19,3 +20,19 @@ class LogDomain(Document):
 
     class Settings:
         name = "logs"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
+
+
+class LogItemDomain(Document, LogEntry):
+    """Une entrée de log par document (projets en stockage "items", voir repositories/item_store.py)."""
+    id:  PydanticObjectId = Field(default_factory=PydanticObjectId, alias="_id")
+    project_id: PydanticObjectId
+
+    class Settings:
+        name = "log_items"
+        indexes = [
+            IndexModel([("project_id", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("project_id", ASCENDING), ("user_id", ASCENDING), ("timestamp", DESCENDING)]),
+        ]
@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 from typing import List, Optional
 from datetime import datetime
 
@@ -85,3 +86,6 @@ class PlannerDomain(Document):
 
     class Settings:
         name = "planners"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
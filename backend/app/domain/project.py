@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, IndexModel
 from datetime import datetime
 
 
@@ -21,5 +22,12 @@ class Project(Document):
     planners_id: PydanticObjectId | None = None
     exports_id: PydanticObjectId | None = None
     chats_id: PydanticObjectId | None = None
+
+    # Stockage des tâches / diagrammes / requirements / logs / chats :
+    # embedded (tableau `data` du conteneur) | migrating (double lecture) | items (un document par élément)
+    storage_mode: str = "embedded"
     class Settings:
         name = "projects"
+        indexes = [
+            IndexModel([("created_by", ASCENDING)]),
+        ]
@@ -0,0 +1,40 @@
+"""
+Liste explicite des documents Beanie passés à `init_beanie`.
+
+Tout nouveau Document de app/domain doit être ajouté ici : l'ordre est fixe et
+le démarrage n'inspecte plus le package (pkgutil / importlib / dir()).
+"""
+from beanie import Document
+
+from app.domain.chats import ChatDomain, ChatMessageItemDomain
+from app.domain.diagram import DiagramDomain, DiagramItemDomain
+from app.domain.exports import ExportDomain
+from app.domain.invitation import ProjectInvitation
+from app.domain.log import LogDomain, LogItemDomain
+from app.domain.planner import PlannerDomain
+from app.domain.project import Project
+from app.domain.requirement import RequirementDomain, RequirementItemDomain
+from app.domain.role import RoleDomain
+from app.domain.run import RunDomain
+from app.domain.task import TaskDomain, TaskItemDomain
+from app.domain.user import User
+
+DOCUMENT_MODELS: tuple[type[Document], ...] = (
+    Project,
+    User,
+    RoleDomain,
+    ProjectInvitation,
+    TaskDomain,
+    TaskItemDomain,
+    DiagramDomain,
+    DiagramItemDomain,
+    RequirementDomain,
+    RequirementItemDomain,
+    LogDomain,
+    LogItemDomain,
+    ChatDomain,
+    ChatMessageItemDomain,
+    PlannerDomain,
+    ExportDomain,
+    RunDomain,
+)
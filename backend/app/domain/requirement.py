@@ -1,5 +1,6 @@
 from beanie import Document , PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from datetime import datetime
 from typing import List
 
@@ -21,3 +22,18 @@ class RequirementDomain(Document):
 
     class Settings:
         name = "requirements"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
+
+
+class RequirementItemDomain(Document, RequirementStructure):
+    """Un requirement par document (projets en stockage "items", voir repositories/item_store.py)."""
+    id:  PydanticObjectId = Field(default_factory=PydanticObjectId, alias="_id")
+    project_id: PydanticObjectId
+
+    class Settings:
+        name = "requirement_items"
+        indexes = [
+            IndexModel([("project_id", ASCENDING), ("updated_at", DESCENDING)]),
+        ]
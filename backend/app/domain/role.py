@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, IndexModel
 from typing import List
 
 
@@ -11,3 +12,6 @@ class RoleDomain(Document):
 
     class Settings:
         name = "roles"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
@@ -1,5 +1,6 @@
 from beanie import Document
 from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from uuid import UUID, uuid4
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -11,7 +12,7 @@ class RunDomain(Document):
     """
     id: UUID = Field(default_factory=uuid4)
     project_id: str  # store project ObjectId/UUID as string to align with caller payloads
-    status: str = "queued"  # queued | running | succeeded | failed
+    status: str = "queued"  # queued | running | retrying | succeeded | failed
     
     # État du pipeline avec contenu JSON
     # Structure: {
@@ -20,7 +21,9 @@ class RunDomain(Document):
     #   "diagrams_json_content": {...},
     #   "planner_content": "markdown...",
     #   "export_content": "markdown...",
-    #   "blueprint_markdown": "markdown..."
+    #   "blueprint_markdown": "markdown...",
+    #   "completed_nodes": ["METADATA", ...]   # checkpoints (reprise après retry)
+    #   "failed_nodes": ["DIAGRAMS", ...]      # sortie invalide : ré-exécutés à la reprise
     # }
     state: Dict[str, Any] = Field(default_factory=dict)
     
@@ -32,7 +35,9 @@ class RunDomain(Document):
         indexes = [
             "project_id",
             "status",
-            "created_at"
+            "created_at",
+            # get_latest_run_for_project : filtre projet (+ statut), tri par date
+            IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
         ]
 
     async def update_state(self, new_state: Dict[str, Any]):
@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from datetime import datetime, timezone
 from typing import List
 
@@ -23,3 +24,19 @@ class TaskDomain(Document):
 
     class Settings:
         name = "tasks"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)]),
+        ]
+
+
+class TaskItemDomain(Document, TaskStructure):
+    """Une tâche par document (projets en stockage "items", voir repositories/item_store.py)."""
+    id:  PydanticObjectId = Field(default_factory=PydanticObjectId, alias="_id")
+    project_id: PydanticObjectId
+
+    class Settings:
+        name = "task_items"
+        indexes = [
+            IndexModel([("project_id", ASCENDING), ("updated_at", DESCENDING)]),
+            IndexModel([("project_id", ASCENDING), ("assignee_id", ASCENDING)]),
+        ]
@@ -1,5 +1,6 @@
 from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, IndexModel
 from datetime import datetime
 
 
@@ -13,3 +14,8 @@ class User(Document):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("info_id", ASCENDING), ("project_id", ASCENDING)]),
+            IndexModel([("project_id", ASCENDING)]),
+            IndexModel([("role_id", ASCENDING)]),
+        ]
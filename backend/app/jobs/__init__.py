@@ -1,4 +1,3 @@
 # Jobs package
-from . import blueprint_job
-
-__all__ = ["blueprint_job"]
\ No newline at end of file
+# Les jobs sont importés par RQ au moment de leur exécution (chemin en chaîne,
+# voir app/api/v1/idea.py) : pas d'import ici, le démarrage du worker reste léger.
@@ -6,13 +6,23 @@ import asyncio
 import httpx
 from uuid import UUID
 
+from rq import get_current_job
+
 from app.agents.graph import run_blueprint_pipeline
 from app.repositories import runs_repo
-from app.repositories.session import init_db
-from app.core.events import publish
+from app.repositories.session import ensure_db
+from app.core import tracing
+from app.core.events import emit_run_event
+from app.jobs.runtime import get_runtime
 
 
-def run_blueprint_job(run_id_str: str, project_id_str: str, idea: str, webhook_url: str | None = None):
+def run_blueprint_job(
+    run_id_str: str,
+    project_id_str: str,
+    idea: str,
+    webhook_url: str | None = None,
+    trace_context: dict | None = None,
+):
     """
     Job RQ qui exécute le pipeline d'agents pour générer un blueprint.
     
@@ -21,29 +31,43 @@ def run_blueprint_job(run_id_str: str, project_id_str: str, idea: str, webhook_u
         project_id_str: UUID du projet (string)
         idea: Description du projet par l'utilisateur
         webhook_url: URL optionnelle pour notification de fin
+        trace_context: contexte de trace W3C de la requête API (app/core/tracing.py)
     """
     # Convertir les strings en UUID
     run_id = UUID(run_id_str)
     project_id = project_id_str
     
-    # RQ est synchrone, on doit exécuter l'async dans une boucle
-    asyncio.run(_async_run_blueprint_job(run_id, project_id, idea, webhook_url))
+    # Une autre tentative suivra-t-elle en cas d'échec ? (Retry RQ ; le run reprendra
+    # depuis le dernier noeud terminé)
+    job = get_current_job()
+    will_retry = bool(job is not None and job.retries_left)
+
+    # RQ est synchrone : on exécute l'async sur la boucle persistante du processus
+    # (partagée entre les jobs, voir app/jobs/runtime.py)
+    get_runtime().run(_traced_run(run_id, project_id, idea, webhook_url, will_retry, trace_context))
+
+
+async def _traced_run(run_id: UUID, project_id: str, idea: str, webhook_url: str | None, will_retry: bool, trace_context: dict | None):
+    # Le contexte est rattaché dans la tâche de la boucle partagée (contextvars par tâche)
+    with tracing.attached_context(trace_context), tracing.span(
+        "job blueprint", **{"run.id": str(run_id), "project.id": project_id, "job.will_retry": will_retry}
+    ):
+        await _async_run_blueprint_job(run_id, project_id, idea, webhook_url, will_retry)
 
 
-async def _async_run_blueprint_job(run_id: UUID, project_id: str, idea: str, webhook_url: str | None):
+async def _async_run_blueprint_job(run_id: UUID, project_id: str, idea: str, webhook_url: str | None, will_retry: bool = False):
     """Version async du job"""
     print(f"[JOB] Starting job for run_id={run_id}, project_id={project_id}")
     
-    # IMPORTANT: Initialiser Beanie/MongoDB car le worker RQ est un processus séparé
-    print("[JOB] Initializing MongoDB/Beanie...")
-    await init_db()
-    print("[JOB] MongoDB initialized successfully")
+    # IMPORTANT: Beanie/MongoDB doit être initialisé dans le worker RQ (processus séparé).
+    # No-op si le runtime l'a déjà fait pour un job précédent.
+    await ensure_db()
     
     try:
         # 1) Mettre à jour le statut à "running"
         print(f"[JOB] Updating run status to 'running'...")
         await runs_repo.update_run_status(run_id, "running")
-        publish(f"run:{run_id}", "STATUS:running")
+        await emit_run_event(run_id, "STATUS:running")
         print(f"[JOB] Run status updated. Starting pipeline...")
         
         # 2) Exécuter le pipeline d'agents
@@ -58,7 +82,7 @@ async def _async_run_blueprint_job(run_id: UUID, project_id: str, idea: str, web
         # 3) Mettre à jour le statut à "succeeded"
         print(f"[JOB] Updating run status to 'succeeded'...")
         await runs_repo.update_run_status(run_id, "succeeded")
-        publish(f"run:{run_id}", "STATUS:succeeded")
+        await emit_run_event(run_id, "STATUS:succeeded")
 
 
         # 4) Appeler le webhook si fourni
@@ -78,12 +102,14 @@ async def _async_run_blueprint_job(run_id: UUID, project_id: str, idea: str, web
             except Exception as e:
                 print(f"Webhook call failed: {e}")
 
-    except Exception as e:
-        # En cas d'erreur, mettre à jour le statut à "failed"
-        print(f"[JOB ERROR] Exception occurred: {type(e).__name__}: {str(e)}")
+    except (Exception, asyncio.CancelledError) as e:
+        # En cas d'erreur (ou d'annulation sur timeout du job), mettre à jour le statut :
+        # "retrying" si RQ va relancer le job, "failed" sinon
+        status = "retrying" if will_retry else "failed"
+        print(f"[JOB ERROR] Exception occurred: {type(e).__name__}: {str(e)} (status={status})")
         try:
-            await runs_repo.update_run_status(run_id, "failed")
-            publish(f"run:{run_id}", f"STATUS:failed ERROR:{str(e)}")
+            await runs_repo.update_run_status(run_id, status)
+            await emit_run_event(run_id, f"STATUS:{status} ERROR:{str(e) or type(e).__name__}")
         except Exception as inner_e:
             print(f"[JOB ERROR] Failed to update run status: {inner_e}")
         raise
@@ -0,0 +1,126 @@
+"""
+Runtime asyncio persistant pour les jobs.
+
+RQ exécute des fonctions synchrones : au lieu d'un `asyncio.run()` par job
+(nouvelle boucle, nouveau client Motor, nouvelle init Beanie, client LLM lié à
+une boucle fermée), on garde UNE boucle dans un thread dédié pour toute la vie
+du processus. Les jobs y soumettent leurs coroutines et partagent le pool Motor,
+l'init Beanie et le client LLM.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine
+
+from app.core.observability import get_logger
+
+logger = get_logger("fromscratch.jobs")
+
+
+class AsyncRuntime:
+    """Boucle asyncio unique, exécutée dans un thread daemon."""
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self.start()
+        return self._loop
+
+    def start(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name="blueprint-runtime", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+        # Initialisation partagée (Mongo/Beanie), une seule fois
+        self.run(self._bootstrap())
+        # Pipeline + client LLM préchargés en arrière-plan : le worker prend des
+        # jobs sans attendre l'import de LangGraph / LangChain (verrou d'import
+        # partagé : un job arrivé avant la fin attend simplement ce chargement)
+        threading.Thread(target=self._warm_up, name="blueprint-warm-up", daemon=True).start()
+
+    async def _bootstrap(self) -> None:
+        from app.repositories.session import ensure_db
+
+        await ensure_db()
+        logger.info("Runtime: MongoDB/Beanie initialized")
+
+    @staticmethod
+    def _warm_up() -> None:
+        try:
+            import app.jobs.blueprint_job  # noqa: F401  (pipeline, agents)
+            from app.llm.provider import get_llm_client
+
+            get_llm_client()
+            logger.info("Runtime: pipeline and LLM client loaded")
+        except Exception as e:
+            # Pas bloquant : l'erreur réapparaîtra au premier job / appel LLM
+            logger.warning(f"Runtime: warm-up failed: {e}")
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Exécute la coroutine sur la boucle partagée et attend son résultat.
+
+        L'attente se fait par tranches d'une seconde pour que les exceptions
+        asynchrones (timeout RQ via TimerDeathPenalty) soient bien livrées au
+        thread appelant ; la coroutine est alors annulée.
+        """
+        future = self.submit(coro)
+        try:
+            while True:
+                try:
+                    return future.result(timeout=1.0)
+                except TimeoutError:
+                    continue
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout=10)
+            self._loop = None
+            self._thread = None
+
+
+_runtime: AsyncRuntime | None = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AsyncRuntime:
+    """Singleton du runtime (démarré au premier usage)."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+    _runtime.start()
+    return _runtime
+
+
+def stop_runtime() -> None:
+    """Arrête le runtime s'il a été démarré (arrêt du worker)."""
+    if _runtime is not None:
+        _runtime.stop()
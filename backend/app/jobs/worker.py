@@ -0,0 +1,108 @@
+"""
+Worker RQ longue durée pour les jobs blueprint.
+
+Lancement :
+    rq worker fromscratch --url redis://redis:6379/0 -w app.jobs.worker.BlueprintWorker
+
+Différences avec le worker RQ par défaut :
+- pas de fork par job (SimpleWorker) : la boucle asyncio, le pool Motor,
+  l'init Beanie et le client LLM sont créés une seule fois (voir runtime.py) ;
+- jusqu'à WORKER_CONCURRENCY jobs exécutés simultanément par processus.
+  Chaque job occupe un thread qui attend sa coroutine sur la boucle partagée ;
+  le travail réel (I/O réseau) est multiplexé sur cette boucle.
+
+État RQ du worker : le hash Redis du worker n'a qu'un champ `current_job` et
+un état. Avec plusieurs jobs en cours, `current_job` désigne le plus récent
+des jobs encore en cours (jamais un job terminé) et l'état reste "busy" tant
+qu'il en reste un ; les autres jobs n'apparaissent que dans le
+StartedJobRegistry de la file. Pour un suivi RQ exact job par job :
+WORKER_CONCURRENCY=1 et plusieurs processus (`rq worker-pool -n N`).
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rq.worker import SimpleWorker, WorkerStatus
+from rq.timeouts import TimerDeathPenalty
+
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.jobs.runtime import get_runtime, stop_runtime
+
+
+class BlueprintWorker(SimpleWorker):
+    # Les signaux (UnixSignalDeathPenalty) ne fonctionnent que dans le thread
+    # principal ; les jobs tournent ici dans des threads du pool.
+    death_penalty_class = TimerDeathPenalty
+
+    def __init__(self, *args, concurrency: int | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.concurrency = max(1, concurrency or settings.worker_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="blueprint-job",
+        )
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        # Jobs en cours (ordre de démarrage) et job du thread courant
+        self._running: dict[str, None] = {}
+        self._running_lock = threading.Lock()
+        self._local = threading.local()
+        # Avant l'init Mongo : le client Motor reçoit alors le listener de traces
+        tracing.setup_tracing("fromscratch-worker")
+        # Démarre la boucle partagée et initialise DB + LLM avant le 1er job
+        get_runtime()
+        # Noeuds, LLM et Mongo s'exécutent ici : métriques exposées par le worker
+        if metrics.start_metrics_server(settings.worker_metrics_port):
+            self.log.info(f"Metrics on :{settings.worker_metrics_port}/metrics")
+
+    def execute_job(self, job, queue):
+        # Bloque la boucle de dequeue tant que N jobs sont en cours
+        self._slots.acquire()
+        with self._running_lock:
+            self._running[job.id] = None
+            self.set_state(WorkerStatus.BUSY)
+        future = self._executor.submit(self._perform, job, queue)
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def _perform(self, job, queue):
+        self._local.job_id = job.id
+        try:
+            return self.perform_job(job, queue)
+        finally:
+            self._local.job_id = None
+            with self._running_lock:
+                self._running.pop(job.id, None)
+                if not self._running:
+                    self.set_state(WorkerStatus.IDLE)
+
+    # --- État RQ partagé par les jobs concurrents (voir docstring du module) ---
+    def set_current_job_id(self, job_id=None, pipeline=None):
+        with self._running_lock:
+            if job_id is None:
+                # Fin du job de ce thread : current_job passe à un job encore en cours
+                self._running.pop(getattr(self._local, "job_id", None), None)
+                job_id = next(reversed(self._running), None)
+            super().set_current_job_id(job_id, pipeline=pipeline)
+
+    def get_current_job_id(self, pipeline=None):
+        job_id = getattr(self._local, "job_id", None)
+        if job_id is not None:
+            return job_id
+        with self._running_lock:
+            return next(reversed(self._running), None)
+
+    def set_state(self, state, pipeline=None):
+        # La boucle de dequeue repasse "idle" pendant qu'elle attend le job suivant
+        if state == WorkerStatus.IDLE and getattr(self, "_running", None):
+            state = WorkerStatus.BUSY
+        super().set_state(state, pipeline=pipeline)
+
+    def work(self, *args, **kwargs):
+        try:
+            return super().work(*args, **kwargs)
+        finally:
+            # Laisse les jobs en cours se terminer avant de fermer la boucle
+            self._executor.shutdown(wait=True)
+            stop_runtime()
+            tracing.shutdown_tracing()
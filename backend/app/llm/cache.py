@@ -0,0 +1,173 @@
+"""
+Cache des réponses LLM adressé par contenu.
+
+La clé est un hash SHA-256 de (provider, model, params, prompt) : deux appels
+avec exactement le même prompt et les mêmes paramètres partagent la réponse.
+Backends :
+- MemoryLLMCache : LRU en process, borné en nombre d'entrées, avec TTL ;
+- RedisLLMCache  : partagé entre API et workers, TTL via SETEX
+  (l'éviction par taille est laissée à la politique maxmemory de Redis) ;
+- TieredLLMCache : LRU local devant Redis.
+Le cache est "best effort" : une erreur Redis est loggée et traitée comme un miss.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.observability import get_logger
+
+logger = get_logger("fromscratch.llm")
+
+KEY_PREFIX = "llmcache:"
+
+
+def make_cache_key(provider: str, model: str | None, params: dict[str, Any], prompt: str) -> str:
+    payload = json.dumps(
+        {"provider": provider, "model": model, "params": params, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return KEY_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    errors: int = 0
+
+
+class MemoryLLMCache:
+    """LRU en mémoire avec TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, stats: CacheStats):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.stats = stats
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisLLMCache:
+    """Cache partagé entre processus via Redis."""
+
+    def __init__(self, ttl_seconds: int, stats: CacheStats):
+        self.ttl_seconds = ttl_seconds
+        self.stats = stats
+
+    async def get(self, key: str) -> Optional[str]:
+        from app.core.events import get_async_redis
+
+        try:
+            return await get_async_redis().get(key)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"LLM cache: redis get failed: {e}")
+            return None
+
+    async def set(self, key: str, value: str) -> None:
+        from app.core.events import get_async_redis
+
+        try:
+            await get_async_redis().set(key, value, ex=self.ttl_seconds)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"LLM cache: redis set failed: {e}")
+
+
+class TieredLLMCache:
+    """LRU local (L1) devant un backend partagé (L2)."""
+
+    def __init__(self, local: MemoryLLMCache, shared: RedisLLMCache):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.local.get(key)
+        if value is not None:
+            return value
+        value = await self.shared.get(key)
+        if value is not None:
+            await self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        await self.local.set(key, value)
+        await self.shared.set(key, value)
+
+
+class LLMCache:
+    """Façade utilisée par `llm_call` : backend + compteurs hit/miss."""
+
+    def __init__(self, backend, stats: CacheStats):
+        self.backend = backend
+        self.stats = stats
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        await self.backend.set(key, value)
+        self.stats.sets += 1
+
+    def get_stats(self) -> dict[str, int]:
+        return asdict(self.stats)
+
+
+_cache: LLMCache | None = None
+
+
+def get_llm_cache() -> LLMCache | None:
+    """Retourne le cache configuré par LLM_CACHE_BACKEND (None si désactivé)."""
+    global _cache
+
+    backend_name = (settings.llm_cache_backend or "none").lower()
+    if backend_name == "none":
+        return None
+
+    if _cache is None:
+        stats = CacheStats()
+        local = MemoryLLMCache(settings.llm_cache_max_entries, settings.llm_cache_ttl_seconds, stats)
+        if backend_name == "memory":
+            backend = local
+        elif backend_name == "redis":
+            backend = TieredLLMCache(local, RedisLLMCache(settings.llm_cache_ttl_seconds, stats))
+        else:
+            raise ValueError(f"LLM_CACHE_BACKEND inconnu: {settings.llm_cache_backend}. Utilisez 'none', 'memory' ou 'redis'")
+        _cache = LLMCache(backend, stats)
+
+    return _cache
@@ -0,0 +1,150 @@
+"""
+Provider LLM factice et déterministe (MODEL_PROVIDER=fake).
+
+Rejoue une réponse JSON figée par agent (app/llm/fixtures/<agent>.json),
+choisie d'après le prompt, avec une latence configurable (+ jitter) et un
+streaming par fragments. Permet d'exécuter run_blueprint_pipeline sans clé
+d'API pour mesurer le coût de notre propre code (scripts/bench_pipeline.py).
+Même interface que les chat models LangChain utilisés par le provider :
+`ainvoke(messages)` et `astream(messages)`. Simule aussi le cache de prompt
+des providers : un message system déjà vu est compté en `cache_read`.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from app.core.config import settings
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Marqueur présent dans le prompt de chaque agent -> fixture rejouée.
+# Export en premier : son prompt embarque les sorties des autres agents.
+FIXTURE_MARKERS = (
+    ("Technical Documentation Specialist", "export"),
+    ("project naming and branding consultant", "metadata"),
+    ("Requirements Engineer", "requirements"),
+    ("React Flow diagrams", "diagrams"),
+    ("Technical Project Manager", "planner"),
+)
+
+
+class _Message:
+    """Message minimal si langchain_core n'est pas installé."""
+
+    def __init__(self, content: str, usage_metadata: Optional[dict] = None):
+        self.content = content
+        self.additional_kwargs: dict = {}
+        self.usage_metadata = usage_metadata
+
+
+def _message(content: str, usage: Optional[dict] = None, chunk: bool = False):
+    try:
+        from langchain_core.messages import AIMessage, AIMessageChunk
+    except ImportError:
+        return _Message(content, usage)
+    cls = AIMessageChunk if chunk else AIMessage
+    return cls(content=content, usage_metadata=usage) if usage else cls(content=content)
+
+
+class FakeChatModel:
+    model_name = "fake"
+    temperature = 0.0
+    top_p = None
+    max_tokens = None
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        chunk_chars: int = 64,
+        seed: Optional[int] = None,
+        fixtures_dir: Path = FIXTURES_DIR,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_chars = max(1, chunk_chars)
+        self.fixtures_dir = Path(fixtures_dir)
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._fixtures: dict[str, str] = {}
+        self._seen_prefixes: set[str] = set()
+
+    def fixture_for(self, prompt: str) -> str:
+        for marker, name in FIXTURE_MARKERS:
+            if marker in prompt:
+                if name not in self._fixtures:
+                    self._fixtures[name] = (self.fixtures_dir / f"{name}.json").read_text(encoding="utf-8")
+                return self._fixtures[name]
+        # Prompt inconnu (route de test, idea_simple...) : réponse texte stable
+        return f"[fake] {prompt[:200]}"
+
+    def _delay(self) -> float:
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    @staticmethod
+    def _prompt_of(messages: Any) -> str:
+        if isinstance(messages, str):
+            return messages
+        parts = []
+        for m in messages:
+            parts.append(m.get("content", "") if isinstance(m, dict) else getattr(m, "content", str(m)))
+        return "\n".join(parts)
+
+    def _cached_prefix(self, messages: Any) -> int:
+        """Taille (tokens) du message system s'il a déjà été envoyé."""
+        if isinstance(messages, str) or not messages:
+            return 0
+        first = messages[0]
+        role = first.get("role") if isinstance(first, dict) else getattr(first, "type", None)
+        if role != "system":
+            return 0
+        system = first.get("content", "") if isinstance(first, dict) else first.content
+        if system in self._seen_prefixes:
+            return len(system) // 4
+        self._seen_prefixes.add(system)
+        return 0
+
+    @staticmethod
+    def _usage(prompt: str, content: str, cached: int = 0) -> dict:
+        input_tokens, output_tokens = len(prompt) // 4, len(content) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached},
+        }
+
+    async def ainvoke(self, messages: Any, **kwargs):
+        self.calls += 1
+        prompt = self._prompt_of(messages)
+        content = self.fixture_for(prompt)
+        cached = self._cached_prefix(messages)
+        await asyncio.sleep(self._delay())
+        return _message(content, self._usage(prompt, content, cached))
+
+    async def astream(self, messages: Any, **kwargs) -> AsyncIterator[Any]:
+        self.calls += 1
+        prompt = self._prompt_of(messages)
+        content = self.fixture_for(prompt)
+        cached = self._cached_prefix(messages)
+        chunks = [content[i:i + self.chunk_chars] for i in range(0, len(content), self.chunk_chars)]
+        # La latence totale est répartie entre les fragments
+        step = self._delay() / max(1, len(chunks))
+        for chunk in chunks:
+            await asyncio.sleep(step)
+            yield _message(chunk, chunk=True)
+        yield _message("", self._usage(prompt, content, cached), chunk=True)
+
+
+def get_fake_client() -> FakeChatModel:
+    """Initialise le client factice (FAKE_LLM_* dans la config)"""
+    return FakeChatModel(
+        latency_ms=settings.fake_llm_latency_ms,
+        jitter_ms=settings.fake_llm_jitter_ms,
+        chunk_chars=settings.fake_llm_chunk_chars,
+        seed=settings.fake_llm_seed,
+    )
@@ -0,0 +1,91 @@
+"""
+Parser JSON incrémental pour les réponses LLM streamées.
+
+Les agents renvoient un objet du type {"requirements": [ {...}, {...} ]} ou
+{"...": ..., "tasks": [ {...} ]}. `JsonArrayItemStream` reçoit le texte par
+fragments et retourne chaque objet de la liste ciblée dès que son accolade
+fermante arrive, sans attendre la fin de la réponse. Le texte hors JSON
+(```json, explications) est ignoré.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class JsonArrayItemStream:
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars: list[str] = []
+        self._last_string: str | None = None
+        self._pending_key: str | None = None
+
+        self._array_depth: int | None = None  # profondeur de la liste ciblée
+        self._array_closed = False
+        self._item_chars: list[str] | None = None  # objet en cours dans la liste
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Ajoute un fragment et retourne les objets complétés par celui-ci."""
+        items: list[dict[str, Any]] = []
+        if not chunk or self._array_closed:
+            return items
+
+        for c in chunk:
+            if self._item_chars is not None:
+                self._item_chars.append(c)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string_chars)
+                    continue
+                # Seules les clés courtes nous intéressent : inutile de garder les longues valeurs
+                if len(self._string_chars) <= len(self.array_key):
+                    self._string_chars.append(c)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif c == ":":
+                self._pending_key = self._last_string
+            elif c == ",":
+                self._pending_key = None
+            elif c in "{[":
+                if (
+                    c == "["
+                    and self._array_depth is None
+                    and len(self._stack) == 1
+                    and self._pending_key == self.array_key
+                ):
+                    self._array_depth = 2
+                elif c == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_chars = [c]
+                self._stack.append(c)
+                self._pending_key = None
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._array_depth is None:
+                    continue
+                if c == "}" and self._item_chars is not None and len(self._stack) == self._array_depth:
+                    try:
+                        item = json.loads("".join(self._item_chars))
+                        if isinstance(item, dict):
+                            items.append(item)
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_chars = None
+                elif c == "]" and len(self._stack) == self._array_depth - 1:
+                    self._array_closed = True
+                    break
+
+        return items
@@ -0,0 +1,323 @@
+"""
+Contrôle d'admission des appels LLM (au niveau du provider).
+
+- Concurrence : au plus LLM_MAX_CONCURRENCY appels en vol par processus ; les
+  appels en attente sont servis par lane de priorité (interactive avant
+  background), puis dans l'ordre d'arrivée.
+- Débit : deux token buckets, requêtes/minute (LLM_RPM) et tokens/minute
+  (LLM_TPM). Avec LLM_RATE_LIMIT_BACKEND=redis, les buckets sont partagés entre
+  l'API et tous les workers (script Lua atomique, horloge Redis) ; `memory`
+  les garde par processus. La lane background laisse une réserve
+  (LLM_INTERACTIVE_RESERVE) aux appels interactifs.
+- 429 : nouvel essai avec backoff exponentiel à jitter complet (Retry-After
+  respecté s'il est fourni), slot de concurrence libéré pendant l'attente.
+Comme le cache, le limiteur est "best effort" : une erreur Redis est loggée et
+l'appel est admis.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.observability import get_logger
+
+logger = get_logger("fromscratch.llm")
+
+T = TypeVar("T")
+
+KEY_PREFIX = "llmrate:"
+
+# Lanes de priorité (plus petit = servi en premier)
+LANES = {"interactive": 0, "background": 1}
+
+# Réservation de sortie par appel avant de connaître l'usage réel (ajustée après)
+OUTPUT_TOKENS_ESTIMATE = 1024
+
+# KEYS[1] = bucket requêtes, KEYS[2] = bucket tokens
+# ARGV = rpm, coût requêtes, tpm, coût tokens, réserve (fraction), force (0/1)
+# Retourne 0 si admis (buckets débités), sinon l'attente en ms.
+_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local reserve = tonumber(ARGV[5])
+local force = ARGV[6] == '1'
+local wait = 0
+local levels = {}
+for i = 1, 2 do
+  local limit = tonumber(ARGV[i * 2 - 1])
+  local cost = tonumber(ARGV[i * 2])
+  if limit > 0 then
+    local b = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or limit
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(limit, tokens + math.max(0, now - ts) * limit / 60000)
+    local need = math.min(limit, cost + limit * reserve)
+    if not force and cost > 0 and tokens < need then
+      wait = math.max(wait, math.ceil((need - tokens) * 60000 / limit))
+    end
+    levels[i] = tokens
+  end
+end
+if wait > 0 then
+  return wait
+end
+for i = 1, 2 do
+  if levels[i] then
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local cost = tonumber(ARGV[i * 2])
+    redis.call('HSET', KEYS[i], 'tokens', math.min(limit, levels[i] - cost), 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], 120000)
+  end
+end
+return 0
+"""
+
+
+@dataclass
+class LimiterStats:
+    calls: int = 0
+    queued: int = 0
+    throttled: int = 0
+    rate_limited: int = 0
+    retries: int = 0
+    errors: int = 0
+
+
+class PriorityAdmission:
+    """Sémaphore à priorités : un slot libéré va au waiter de plus petite lane."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def acquire(self, lane: int) -> None:
+        if self._active < self.limit and not self.waiting:
+            self._active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Slot transmis juste avant l'annulation : le rendre
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                # Le slot passe directement au waiter (_active inchangé)
+                fut.set_result(None)
+                return
+        self._active -= 1
+
+
+class MemoryTokenBuckets:
+    """Buckets RPM/TPM en process (même algorithme que le script Redis)."""
+
+    def __init__(self):
+        self._levels: dict[str, tuple[float, float]] = {}
+
+    async def take(self, key: str, rpm: int, requests: int, tpm: int, tokens: int,
+                   reserve: float, force: bool = False) -> int:
+        now = time.monotonic() * 1000
+        wait = 0
+        levels = {}
+        for suffix, limit, cost in (("rpm", rpm, requests), ("tpm", tpm, tokens)):
+            if limit <= 0:
+                continue
+            level, ts = self._levels.get(key + suffix, (limit, now))
+            level = min(limit, level + max(0.0, now - ts) * limit / 60000)
+            need = min(limit, cost + limit * reserve)
+            if not force and cost > 0 and level < need:
+                wait = max(wait, math.ceil((need - level) * 60000 / limit))
+            levels[suffix] = (limit, cost, level)
+        if wait:
+            return wait
+        for suffix, (limit, cost, level) in levels.items():
+            self._levels[key + suffix] = (min(limit, level - cost), now)
+        return 0
+
+
+class RedisTokenBuckets:
+    """Buckets RPM/TPM partagés entre processus (script Lua atomique)."""
+
+    def __init__(self, stats: LimiterStats):
+        self.stats = stats
+        self._script = None
+
+    async def take(self, key: str, rpm: int, requests: int, tpm: int, tokens: int,
+                   reserve: float, force: bool = False) -> int:
+        from app.core.events import get_async_redis
+
+        try:
+            if self._script is None:
+                self._script = get_async_redis().register_script(_BUCKET_SCRIPT)
+            wait = await self._script(
+                keys=[key + "rpm", key + "tpm"],
+                args=[rpm, requests, tpm, tokens, reserve, "1" if force else "0"],
+            )
+            return int(wait or 0)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"LLM limiter: redis bucket failed, admitting call: {e}")
+            return 0
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """429 du provider (OpenAI, NVIDIA, httpx...) quel que soit le client."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    if "RateLimit" in type(exc).__name__:
+        return True
+    text = str(exc).lower()
+    return "429" in text or "rate limit" in text or "too many requests" in text
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Backoff exponentiel à jitter complet, borné ; jamais moins que Retry-After."""
+    ceiling = min(settings.llm_backoff_max_seconds, settings.llm_backoff_base_seconds * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class LLMLimiter:
+    """Façade utilisée par `llm_call` : admission, débit, retries sur 429."""
+
+    def __init__(self, buckets, stats: LimiterStats):
+        self.buckets = buckets
+        self.stats = stats
+        self.admission = PriorityAdmission(settings.llm_max_concurrency)
+
+    def _bucket_key(self, scope: str) -> str:
+        return f"{KEY_PREFIX}{scope}:"
+
+    async def _wait_for_budget(self, scope: str, lane: int, tokens: int) -> None:
+        if self.buckets is None:
+            return
+        reserve = settings.llm_interactive_reserve if lane > LANES["interactive"] else 0.0
+        throttled = False
+        while True:
+            wait_ms = await self.buckets.take(
+                self._bucket_key(scope), settings.llm_rpm, 1, settings.llm_tpm, tokens, reserve
+            )
+            if not wait_ms:
+                return
+            if not throttled:
+                throttled = True
+                self.stats.throttled += 1
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def adjust_tokens(self, scope: str, delta: int) -> None:
+        """Corrige le bucket TPM une fois l'usage réel connu (delta > 0 : débit en plus)."""
+        if self.buckets is None or not delta or settings.llm_tpm <= 0:
+            return
+        await self.buckets.take(self._bucket_key(scope), 0, 0, settings.llm_tpm, delta, 0.0, force=True)
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        scope: str,
+        priority: str = "background",
+        tokens: int = 0,
+        retryable: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """
+        Exécute `fn` sous le contrôle d'admission.
+        `scope` identifie les buckets (provider:model), `tokens` est l'estimation
+        débitée du bucket TPM. `retryable()` est consulté avant un nouvel essai
+        (ex. faux si des tokens ont déjà été streamés).
+        """
+        lane = LANES.get(priority, LANES["background"])
+        attempt = 0
+        while True:
+            if self.admission.active >= self.admission.limit:
+                self.stats.queued += 1
+            await self.admission.acquire(lane)
+            try:
+                await self._wait_for_budget(scope, lane, tokens)
+                self.stats.calls += 1
+                return await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.stats.rate_limited += 1
+                if attempt >= settings.llm_max_retries or not retryable():
+                    raise
+                delay = backoff_delay(attempt, _retry_after(e))
+            finally:
+                self.admission.release()
+            attempt += 1
+            self.stats.retries += 1
+            logger.warning(f"LLM limiter: rate limited ({scope}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "active": self.admission.active,
+            "waiting": self.admission.waiting,
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 caractères par token : suffisant pour dimensionner le bucket
+    return len(text) // 4 + 1
+
+
+_limiter: LLMLimiter | None = None
+
+
+def get_llm_limiter() -> LLMLimiter:
+    """Retourne le limiteur configuré par LLM_RATE_LIMIT_BACKEND (none | memory | redis)."""
+    global _limiter
+
+    if _limiter is None:
+        stats = LimiterStats()
+        backend_name = (settings.llm_rate_limit_backend or "none").lower()
+        if backend_name == "none":
+            buckets = None
+        elif backend_name == "memory":
+            buckets = MemoryTokenBuckets()
+        elif backend_name == "redis":
+            buckets = RedisTokenBuckets(stats)
+        else:
+            raise ValueError(f"LLM_RATE_LIMIT_BACKEND inconnu: {settings.llm_rate_limit_backend}. Utilisez 'none', 'memory' ou 'redis'")
+        _limiter = LLMLimiter(buckets, stats)
+
+    return _limiter
@@ -0,0 +1,22 @@
+"""
+Prompts structurés system / user pour les agents.
+
+Le message system porte toute la partie statique (rôle, règles, format de
+sortie, exemples). Il est assemblé une seule fois à l'import et envoyé en
+premier, à l'octet près identique d'un appel à l'autre : c'est ce préfixe que
+les providers (OpenAI, NVIDIA NIM...) mettent en cache. Le message user ne
+contient que la partie variable (idée, artefacts) et reste court.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ChatPrompt:
+    system: str          # statique, jamais formaté (peut contenir des accolades JSON)
+    user_template: str   # str.format : {idea}, {requirements}...
+
+    def format(self, **values: str) -> str:
+        """Message user pour ces valeurs (le system est envoyé tel quel)."""
+        return self.user_template.format(**values)
@@ -1,92 +1,304 @@
-from typing import Optional, Union
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
 
 from app.core.config import settings
+from app.core import metrics, tracing
+from app.core.observability import get_logger
+from app.llm.cache import get_llm_cache, make_cache_key
+from app.llm.limiter import OUTPUT_TOKENS_ESTIMATE, estimate_tokens, get_llm_limiter
+from app.llm.router import get_llm_router, register_provider
+from app.llm.fake import get_fake_client
 
-try:
-    from langchain_nvidia_ai_endpoints import ChatNVIDIA
-except ImportError:
-    ChatNVIDIA = None
+logger = get_logger("fromscratch.llm")
 
-try:
-    from langchain_openai import ChatOpenAI
-except ImportError:
-    ChatOpenAI = None
 
-_chat_client: Optional[Union["ChatNVIDIA", "ChatOpenAI"]] = None
+@dataclass
+class UsageStats:
+    """Tokens consommés par les appels aux providers (hors cache de réponses)."""
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # préfixe servi par le cache de prompt du provider
 
 
-def get_nvidia_client() -> "ChatNVIDIA":
-    """Initialise le client NVIDIA/DeepSeek"""
-    global _chat_client
+_usage_stats = UsageStats()
 
-    if ChatNVIDIA is None:
-        raise RuntimeError("langchain_nvidia_ai_endpoints n'est pas installé")
 
-    if _chat_client is None:
-        if not settings.nvidia_api_key:
-            raise RuntimeError("NVIDIA_API_KEY manquant dans l'environnement")
+def get_usage_stats() -> dict:
+    return asdict(_usage_stats)
 
-        if not settings.nvidia_model:
-            raise RuntimeError("NVIDIA_MODEL manquant dans l'environnement")
 
-        _chat_client = ChatNVIDIA(
-            model=settings.nvidia_model,
-            api_key=settings.nvidia_api_key,
-            temperature=0.6,
-            top_p=0.7,
-            max_tokens=4096,
-        )
+def get_nvidia_client() -> "ChatNVIDIA":
+    """Initialise le client NVIDIA/DeepSeek (mis en cache par le router)"""
+    # Import au premier client créé (plusieurs centaines de ms) et non au démarrage
+    try:
+        from langchain_nvidia_ai_endpoints import ChatNVIDIA
+    except ImportError:
+        raise RuntimeError("langchain_nvidia_ai_endpoints n'est pas installé") from None
+
+    if not settings.nvidia_api_key:
+        raise RuntimeError("NVIDIA_API_KEY manquant dans l'environnement")
+
+    if not settings.nvidia_model:
+        raise RuntimeError("NVIDIA_MODEL manquant dans l'environnement")
 
-    return _chat_client
+    return ChatNVIDIA(
+        model=settings.nvidia_model,
+        api_key=settings.nvidia_api_key,
+        temperature=0.6,
+        top_p=0.7,
+        max_tokens=4096,
+    )
 
 
 def get_openai_client() -> "ChatOpenAI":
-    """Initialise le client OpenAI/ChatGPT"""
-    global _chat_client
+    """Initialise le client OpenAI/ChatGPT (mis en cache par le router)"""
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError:
+        raise RuntimeError("langchain_openai n'est pas installé. Installez: pip install langchain-openai") from None
 
-    if ChatOpenAI is None:
-        raise RuntimeError("langchain_openai n'est pas installé. Installez: pip install langchain-openai")
+    if not settings.openai_api_key:
+        raise RuntimeError("OPENAI_API_KEY manquant dans l'environnement")
 
-    if _chat_client is None:
-        if not settings.openai_api_key:
-            raise RuntimeError("OPENAI_API_KEY manquant dans l'environnement")
+    return ChatOpenAI(
+        model=settings.litellm_model,  # ex: "gpt-4o-mini" ou "gpt-4"
+        api_key=settings.openai_api_key,
+        temperature=0.6,
+        max_tokens=4096,
+        stream_usage=True,  # usage (dont cached_tokens) aussi en streaming
+    )
 
-        _chat_client = ChatOpenAI(
-            model=settings.litellm_model,  # ex: "gpt-4o-mini" ou "gpt-4"
-            api_key=settings.openai_api_key,
-            temperature=0.6,
-            max_tokens=4096,
-        )
 
-    return _chat_client
+register_provider("openai", get_openai_client)
+register_provider("nvidia", get_nvidia_client)
+register_provider("fake", get_fake_client)  # fixtures déterministes (bench, dev sans clé)
 
 
 def get_llm_client():
-    """Retourne le bon client selon MODEL_PROVIDER dans config"""
-    if settings.model_provider == "openai":
-        return get_openai_client()
-    elif settings.model_provider == "nvidia":
-        return get_nvidia_client()
-    else:
-        raise ValueError(f"Provider inconnu: {settings.model_provider}. Utilisez 'openai' ou 'nvidia'")
+    """Retourne le client du provider préféré (LLM_PROVIDERS / MODEL_PROVIDER)"""
+    router = get_llm_router()
+    return router.client(router.primary())
+
+
+def _model_of(client) -> Optional[str]:
+    return getattr(client, "model_name", None) or getattr(client, "model", None)
+
+
+def _client_cache_params(client) -> dict:
+    """Paramètres du client qui influencent la réponse (font partie de la clé de cache)."""
+    return {
+        "temperature": getattr(client, "temperature", None),
+        "top_p": getattr(client, "top_p", None),
+        "max_tokens": getattr(client, "max_tokens", None),
+    }
+
+
+def _reasoning_of(msg) -> Optional[str]:
+    # DeepSeek-R1 renvoie parfois un champ reasoning_content séparé
+    if getattr(msg, "additional_kwargs", None):
+        return msg.additional_kwargs.get("reasoning_content")
+    return None
+
+
+def _usage_of(msg) -> Optional[dict]:
+    """Usage d'une réponse : tokens d'entrée / sortie / total et tokens d'entrée
+    servis par le cache de prompt du provider."""
+    usage = getattr(msg, "usage_metadata", None)
+    if not usage:
+        return None
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached is None:
+        # Anciennes versions de langchain-openai : détail brut de l'API
+        token_usage = (getattr(msg, "response_metadata", None) or {}).get("token_usage") or {}
+        cached = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    return {
+        "input_tokens": usage.get("input_tokens") or 0,
+        "output_tokens": usage.get("output_tokens") or 0,
+        "total_tokens": usage.get("total_tokens") or 0,
+        "cached_input_tokens": cached or 0,
+    }
+
+
+def _record_usage(scope: str, usage: Optional[dict]) -> None:
+    _usage_stats.calls += 1
+    if not usage:
+        return
+    _usage_stats.input_tokens += usage["input_tokens"]
+    _usage_stats.output_tokens += usage["output_tokens"]
+    _usage_stats.cached_input_tokens += usage["cached_input_tokens"]
+    logger.debug(
+        f"LLM usage ({scope}): in={usage['input_tokens']} cached={usage['cached_input_tokens']} "
+        f"out={usage['output_tokens']}"
+    )
+
+
+def _build_messages(prompt: str, system: Optional[str]) -> list[dict]:
+    # Préfixe statique (system) en premier : identique d'un appel à l'autre, il
+    # est servi par le cache de prompt du provider
+    if system is None:
+        return [{"role": "user", "content": prompt}]
+    return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
 
 
-async def llm_call(prompt: str, **kwargs) -> str:
+def _cache_key(prompt: str, system: Optional[str], kwargs: dict) -> str:
+    # Clé sur le provider préféré : une réponse obtenue par hedging/failover
+    # reste valable pour la même requête
+    router = get_llm_router()
+    preferred = router.names[0]
+    client = router.client(preferred)
+    return make_cache_key(
+        preferred,
+        _model_of(client),
+        {**_client_cache_params(client), **kwargs},
+        prompt if system is None else json.dumps(_build_messages(prompt, system), ensure_ascii=False),
+    )
+
+
+async def get_cached_response(prompt: str, *, system: Optional[str] = None, **kwargs) -> Optional[str]:
+    """Réponse en cache pour cet appel `llm_call` (None si absente ou cache désactivé)."""
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    return await cache.get(_cache_key(prompt, system, kwargs))
+
+
+async def cache_response(prompt: str, content: str, *, system: Optional[str] = None, **kwargs) -> None:
+    """
+    Met `content` en cache pour cet appel `llm_call`. Pour les appels dont la
+    réponse est validée après coup (app/llm/structured.py) : seule une sortie
+    valide est mise en cache.
     """
-    Appel LLM unifié (OpenAI ou NVIDIA selon config).
+    cache = get_llm_cache()
+    if cache is not None and content:
+        await cache.set(_cache_key(prompt, system, kwargs), content)
+
+
+async def llm_call(
+    prompt: str,
+    *,
+    system: Optional[str] = None,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+    priority: str = "background",
+    **kwargs,
+) -> str:
+    """
+    Appel LLM unifié, routé sur les providers configurés (app/llm/router.py :
+    hedging, failover, circuit breaker).
     Utilisé par les agents (requirements_agent, etc.).
+
+    `system` : partie statique du prompt, envoyée en premier dans un message system
+    (voir app/llm/prompts.py) ; `prompt` devient alors le seul message user.
+    Les réponses sont mises en cache par contenu (provider, model, params, prompt)
+    selon LLM_CACHE_BACKEND ; `use_cache=False` force un nouvel appel.
+    Si `on_token` est fourni (et LLM_STREAMING actif), la réponse est streamée et
+    chaque fragment est passé au callback ; la valeur retournée reste le texte complet.
+    Chaque appel à un provider passe par le limiteur (app/llm/limiter.py) : `priority`
+    choisit la lane ("interactive" pour les requêtes d'un utilisateur en attente,
+    "background" pour le pipeline) ; les 429 sont réessayés avec backoff.
     """
-    client = get_llm_client()
+    router = get_llm_router()
+    messages = _build_messages(prompt, system)
 
-    # On envoie un message au format "chat"
-    resp = await client.ainvoke([{"role": "user", "content": prompt}], **kwargs)
+    cache = get_llm_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = _cache_key(prompt, system, kwargs)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached)
+            return cached
 
-    # DeepSeek-R1 renvoie parfois un champ reasoning_content séparé
-    reasoning = None
-    if getattr(resp, "additional_kwargs", None):
-        reasoning = resp.additional_kwargs.get("reasoning_content")
+    stream = on_token is not None and settings.llm_streaming
+    limiter = get_llm_limiter()
+    input_estimate = estimate_tokens(prompt) + (estimate_tokens(system) if system else 0)
+    estimated = input_estimate + OUTPUT_TOKENS_ESTIMATE
+
+    async def invoke(name: str, client, emit) -> tuple[str, str]:
+        scope = f"{name}:{_model_of(client)}"
+        streamed = False
+
+        async def call_provider() -> tuple[str, str, Optional[dict]]:
+            started = time.perf_counter()
+            with tracing.span(
+                f"llm {name}",
+                **{
+                    "llm.agent": metrics.current_agent.get(),
+                    "llm.provider": name,
+                    "llm.model": _model_of(client),
+                    "llm.priority": priority,
+                    "llm.stream": stream,
+                },
+            ) as current:
+                try:
+                    result = await provider_request()
+                except BaseException as e:
+                    metrics.observe_llm(name, time.perf_counter() - started, e)
+                    raise
+                metrics.observe_llm(name, time.perf_counter() - started)
+                usage = result[2] or {}
+                tracing.set_attributes(
+                    current,
+                    **{
+                        "llm.input_tokens": usage.get("input_tokens"),
+                        "llm.output_tokens": usage.get("output_tokens"),
+                        "llm.cached_input_tokens": usage.get("cached_input_tokens"),
+                    },
+                )
+            return result
+
+        async def provider_request() -> tuple[str, str, Optional[dict]]:
+            nonlocal streamed
+            if stream:
+                content_parts: list[str] = []
+                reasoning_parts: list[str] = []
+                usage = None
+                async for chunk in client.astream(messages, **kwargs):
+                    reasoning = _reasoning_of(chunk)
+                    if reasoning:
+                        reasoning_parts.append(reasoning)
+                    if chunk.content:
+                        content_parts.append(chunk.content)
+                        streamed = True
+                        emit(chunk.content)
+                    # L'usage arrive sur le dernier fragment
+                    usage = _usage_of(chunk) or usage
+                return "".join(reasoning_parts), "".join(content_parts), usage
+
+            # On envoie un message au format "chat"
+            resp = await client.ainvoke(messages, **kwargs)
+            return _reasoning_of(resp), resp.content, _usage_of(resp)
+
+        reasoning, text, usage = await limiter.run(
+            call_provider,
+            scope=scope,
+            priority=priority,
+            tokens=estimated,
+            # Pas de nouvel essai une fois des fragments publiés (ils seraient dupliqués)
+            retryable=lambda: not streamed,
+        )
+        _record_usage(scope, usage)
+        metrics.count_llm_tokens(name, usage)
+        # Usage réel (ou estimé) : corrige la réservation faite dans le bucket TPM
+        used = (usage or {}).get("total_tokens") or input_estimate + estimate_tokens((reasoning or "") + text)
+        await limiter.adjust_tokens(scope, used - estimated)
+        return reasoning, text
+
+    reasoning, text = await router.call(
+        invoke,
+        on_token=on_token if stream else None,
+        valid=lambda result: bool(result[1]),
+    )
+    if on_token is not None and not stream:
+        on_token(text)
+
+    content = reasoning + "\n\n" + text if reasoning else text
 
-    if reasoning:
-        return reasoning + "\n\n" + resp.content
+    if cache is not None and content:
+        await cache.set(cache_key, content)
 
-    return resp.content
+    return content
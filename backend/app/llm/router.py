@@ -0,0 +1,253 @@
+"""
+Routage des appels LLM sur plusieurs providers (OpenAI, NVIDIA, ou tout chat
+model LangChain enregistré via `register_provider`).
+
+- Un client par provider, créé à la demande et gardé en cache.
+- Latence suivie par provider : EWMA (ordre de préférence) + fenêtre glissante
+  pour le p95.
+- Hedging : si le provider principal n'a pas répondu après son p95
+  (LLM_HEDGE_DELAY_SECONDS tant qu'il n'y a pas assez de mesures), la même
+  requête part sur le provider suivant ; la première réponse valide gagne et
+  l'autre est annulée. En streaming, le premier appel qui produit un token gagne.
+- Circuit breaker : après LLM_CIRCUIT_FAILURES échecs consécutifs (ou si l'EWMA
+  dépasse LLM_DEGRADED_LATENCY_SECONDS), le provider est écarté pendant
+  LLM_CIRCUIT_COOLDOWN_SECONDS, puis un seul appel de test est autorisé.
+- Failover : si un appel échoue avant d'avoir streamé, le provider suivant prend
+  le relais.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.observability import get_logger
+
+logger = get_logger("fromscratch.llm")
+
+T = TypeVar("T")
+
+EWMA_ALPHA = 0.2
+LATENCY_WINDOW = 100
+
+_factories: dict[str, Callable[[], Any]] = {}
+
+
+def register_provider(name: str, factory: Callable[[], Any]) -> None:
+    """Déclare un provider : `factory()` retourne un chat model LangChain."""
+    _factories[name] = factory
+    if _router is not None:
+        _router.clients.pop(name, None)
+
+
+def configured_providers() -> list[str]:
+    """Providers routés, par ordre de préférence (LLM_PROVIDERS, sinon MODEL_PROVIDER)."""
+    names = [n.strip() for n in (settings.llm_providers or "").split(",") if n.strip()]
+    return names or [settings.model_provider]
+
+
+class InvalidResponse(Exception):
+    pass
+
+
+class ProviderHealth:
+    """Latence (EWMA + p95) et état du circuit breaker d'un provider."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ewma: Optional[float] = None
+        self.samples: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def p95(self) -> Optional[float]:
+        if len(self.samples) < settings.llm_hedge_min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= settings.llm_circuit_cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def record_success(self, latency: float) -> None:
+        self.samples.append(latency)
+        self.ewma = latency if self.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma
+        self.failures = 0
+        self.probing = False
+        degraded = settings.llm_degraded_latency_seconds
+        if degraded and self.ewma > degraded:
+            self._open(f"degraded (ewma {self.ewma:.1f}s)")
+        elif self.opened_at is not None:
+            logger.info(f"LLM router: circuit closed for {self.name}")
+            self.opened_at = None
+
+    def record_failure(self, error: BaseException) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= settings.llm_circuit_failures:
+            self._open(f"{type(error).__name__}: {error}")
+
+    def _open(self, reason: str) -> None:
+        self.opened_at = time.monotonic()
+        logger.warning(f"LLM router: circuit open for {self.name} ({reason})")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "ewma_seconds": self.ewma,
+            "p95_seconds": self.p95(),
+            "samples": len(self.samples),
+            "consecutive_failures": self.failures,
+        }
+
+
+class LLMRouter:
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.clients: dict[str, Any] = {}
+        self.health = {name: ProviderHealth(name) for name in names}
+
+    def client(self, name: str):
+        if name not in self.clients:
+            factory = _factories.get(name)
+            if factory is None:
+                raise ValueError(f"Provider inconnu: {name}. Providers enregistrés: {sorted(_factories)}")
+            self.clients[name] = factory()
+        return self.clients[name]
+
+    def primary(self) -> str:
+        candidates = self.candidates()
+        return candidates[0] if candidates else self.names[0]
+
+    def candidates(self) -> list[str]:
+        """Providers disponibles, du plus rapide (EWMA) au plus lent ; ordre de
+        configuration pour ceux sans mesure. Un circuit half-open passe en dernier."""
+        closed = [n for n in self.names if self.health[n].state == "closed"]
+        probes = [n for n in self.names if self.health[n].state == "half_open" and self.health[n].available()]
+        unmeasured = float("inf")
+        closed.sort(key=lambda n: self.health[n].ewma if self.health[n].ewma is not None else unmeasured)
+        return closed + probes
+
+    def hedge_delay(self, name: str) -> float:
+        return self.health[name].p95() or settings.llm_hedge_delay_seconds
+
+    async def _attempt(self, name: str, fn, emit, valid: Callable[[T], bool]) -> T:
+        health = self.health[name]
+        if health.state == "half_open":
+            health.probing = True
+        started = time.monotonic()
+        try:
+            result = await fn(name, self.client(name), emit)
+        except asyncio.CancelledError:
+            health.probing = False
+            raise
+        except Exception as e:
+            health.record_failure(e)
+            raise
+        if not valid(result):
+            error = InvalidResponse(f"invalid response from {name}")
+            health.record_failure(error)
+            raise error
+        health.record_success(time.monotonic() - started)
+        return result
+
+    async def call(
+        self,
+        fn: Callable[[str, Any, Optional[Callable[[str], None]]], Awaitable[T]],
+        *,
+        on_token: Optional[Callable[[str], None]] = None,
+        valid: Callable[[T], bool] = bool,
+    ) -> T:
+        """
+        Exécute `fn(provider_name, client, emit)` avec hedging et failover.
+        `emit` (None sans `on_token`) remplace `on_token` pour l'appel : seuls les
+        tokens de l'appel gagnant sont transmis.
+        """
+        candidates = iter(self.candidates())
+        pending: dict[asyncio.Task, str] = {}
+        winner: Optional[str] = None
+        last_error: Optional[BaseException] = None
+
+        def make_emit(name: str):
+            if on_token is None:
+                return None
+
+            def emit(text: str) -> None:
+                nonlocal winner
+                if winner is None:
+                    winner = name
+                    for task, other in pending.items():
+                        if other != name:
+                            task.cancel()
+                if winner == name:
+                    on_token(text)
+            return emit
+
+        def launch() -> Optional[str]:
+            name = next(candidates, None)
+            if name is not None:
+                task = asyncio.create_task(self._attempt(name, fn, make_emit(name), valid))
+                pending[task] = name
+            return name
+
+        primary = launch()
+        if primary is None:
+            raise RuntimeError(f"Aucun provider LLM disponible (circuits ouverts: {self.names})")
+        hedge_at = time.monotonic() + self.hedge_delay(primary) if settings.llm_hedging else None
+
+        try:
+            while pending:
+                timeout = None
+                if hedge_at is not None and winner is None:
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    hedged = launch()
+                    if hedged:
+                        logger.info(f"LLM router: {primary} slower than {self.hedge_delay(primary):.1f}s, hedging on {hedged}")
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    if task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"LLM router: {name} failed: {last_error}")
+                    if winner == name:
+                        # Des tokens ont déjà été transmis : pas de relais possible
+                        raise last_error
+                if not pending and winner is None:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error or RuntimeError("Aucun provider LLM n'a répondu")
+
+    def get_stats(self) -> dict[str, Any]:
+        return {name: health.snapshot() for name, health in self.health.items()}
+
+
+_router: LLMRouter | None = None
+
+
+def get_llm_router() -> LLMRouter:
+    global _router
+
+    if _router is None:
+        _router = LLMRouter(configured_providers())
+    return _router
@@ -0,0 +1,244 @@
+"""
+Sorties structurées des agents : JSON -> modèle Pydantic, en une seule passe.
+
+- `parse_json` : retire les blocs ```json, tente `json.loads` puis, en cas
+  d'échec, répare les défauts courants des LLM (virgules finales, texte après
+  l'objet, réponse tronquée : chaînes / listes / objets refermés, dernier
+  élément incomplet abandonné).
+- `generate_structured` : appelle le LLM, parse et valide la réponse dans le
+  modèle. Si des champs de premier niveau sont invalides ou manquants, seuls
+  ces champs sont redemandés au LLM (même message system, donc même préfixe
+  en cache) puis fusionnés ; le reste de la réponse est conservé. Seule une
+  sortie valide est mise en cache (cache de réponses LLM, app/llm/cache.py) ;
+  les re-demandes ne passent jamais par le cache.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.core.observability import get_logger
+from app.llm.prompts import ChatPrompt
+from app.llm.provider import cache_response, get_cached_response, llm_call
+
+logger = get_logger("fromscratch.llm")
+
+M = TypeVar("M", bound=BaseModel)
+
+# Nombre de virgules essayées (de la dernière vers la première) pour couper un
+# élément tronqué
+MAX_TRUNCATION_CUTS = 20
+MAX_REPORTED_ERRORS = 5
+
+
+class StructuredOutputError(ValueError):
+    pass
+
+
+def strip_fences(text: str) -> str:
+    """Retire un bloc de code markdown (```json ... ```) autour de la réponse."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        lines = cleaned.split("\n")
+        lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+        cleaned = "\n".join(lines).strip()
+    return cleaned
+
+
+def _closers(stack) -> str:
+    return "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def _strip_dangling(text: str) -> str:
+    """Fin d'un texte tronqué : virgule ou ':' en suspens."""
+    text = text.rstrip()
+    if text.endswith(","):
+        return text[:-1]
+    if text.endswith(":"):
+        return text + " null"
+    return text
+
+
+def _repair(text: str) -> Any:
+    """Parse un JSON abîmé (virgules finales, texte annexe, troncature)."""
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise StructuredOutputError("no JSON object in response")
+
+    out: list[str] = []
+    stack: list[str] = []
+    cuts: list[tuple[int, tuple[str, ...]]] = []  # (position d'une virgule, pile)
+    in_string = escape = False
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch in "}]":
+            # Virgule finale : [1, 2, ] -> [1, 2]
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            out.append(ch)
+            if stack:
+                stack.pop()
+            if not stack:
+                break  # fin de l'objet racine : le texte qui suit est ignoré
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch == ",":
+            cuts.append((len(out), tuple(stack)))
+        out.append(ch)
+
+    repaired = "".join(out)
+    if not stack and not in_string:
+        return json.loads(repaired, strict=False)
+
+    # Réponse tronquée : on referme tel quel, sinon on coupe au dernier élément complet
+    candidates = [_strip_dangling(repaired + ('"' if in_string else "")) + _closers(stack)]
+    for position, cut_stack in reversed(cuts[-MAX_TRUNCATION_CUTS:]):
+        candidates.append(_strip_dangling(repaired[:position]) + _closers(cut_stack))
+    for candidate in candidates:
+        try:
+            return json.loads(candidate, strict=False)
+        except json.JSONDecodeError:
+            continue
+    raise StructuredOutputError("truncated JSON could not be repaired")
+
+
+def parse_json(text: Optional[str]) -> Any:
+    """
+    Parse une réponse LLM en JSON (blocs markdown retirés, réparation si besoin).
+    Lève StructuredOutputError si rien d'exploitable.
+    """
+    if not text or not text.strip():
+        raise StructuredOutputError("empty response")
+    cleaned = strip_fences(text)
+    try:
+        return json.loads(cleaned, strict=False)
+    except json.JSONDecodeError as e:
+        error = e
+    try:
+        data = _repair(cleaned)
+    except (StructuredOutputError, json.JSONDecodeError) as e:
+        raise StructuredOutputError(f"invalid JSON ({error.msg} at position {error.pos}): {e}") from e
+    logger.info(f"Structured output: repaired invalid JSON ({error.msg} at position {error.pos})")
+    return data
+
+
+def parse_model(text: Optional[str], model: type[M]) -> M:
+    """Parse + validation, sans appel LLM (réponses déjà stockées)."""
+    try:
+        return model.model_validate(parse_json(text))
+    except ValidationError as e:
+        raise StructuredOutputError(str(e)) from e
+
+
+def _broken_fields(error: ValidationError) -> list[str]:
+    fields = []
+    for err in error.errors():
+        if err["loc"] and isinstance(err["loc"][0], str) and err["loc"][0] not in fields:
+            fields.append(err["loc"][0])
+    return fields
+
+
+def _describe_errors(error: ValidationError) -> str:
+    lines = [
+        f"- {'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()[:MAX_REPORTED_ERRORS]
+    ]
+    return "\n".join(lines)
+
+
+def _reask_message(user_message: str, fields: list[str], error: ValidationError) -> str:
+    keys = ", ".join(f'"{field}"' for field in fields)
+    return f"""{user_message}
+
+---
+
+Your previous answer was invalid for these top-level fields:
+{_describe_errors(error)}
+
+Regenerate ONLY these fields, following the exact format described above.
+Return ONLY a JSON object whose keys are {keys} - no other keys, no markdown, no explanations."""
+
+
+async def generate_structured(
+    prompt: ChatPrompt,
+    model: type[M],
+    *,
+    on_token: Optional[Callable[[str], None]] = None,
+    max_reasks: Optional[int] = None,
+    use_cache: bool = True,
+    **values: str,
+) -> M:
+    """
+    Appel LLM dont la réponse est parsée puis validée dans `model`.
+
+    Les champs de premier niveau en erreur sont redemandés (au plus `max_reasks`
+    fois, STRUCTURED_OUTPUT_MAX_REASKS par défaut) sans refaire tout l'appel ;
+    une réponse sans aucun JSON exploitable est redemandée en entier.
+    `use_cache=False` force une nouvelle réponse (régénération d'un artefact).
+    Lève StructuredOutputError si la sortie reste invalide.
+    """
+    if max_reasks is None:
+        max_reasks = settings.structured_output_max_reasks
+    user_message = prompt.format(**values)
+
+    # Le cache n'est lu qu'ici et n'est écrit qu'après validation : une réponse
+    # invalide n'y reste jamais, et une re-demande obtient toujours un nouvel appel
+    cached = await get_cached_response(user_message, system=prompt.system) if use_cache else None
+    if cached is not None and on_token is not None:
+        on_token(cached)
+    raw = cached
+    if raw is None:
+        raw = await llm_call(user_message, system=prompt.system, use_cache=False, on_token=on_token)
+    try:
+        data = parse_json(raw)
+    except StructuredOutputError as e:
+        if max_reasks <= 0:
+            raise
+        logger.warning(f"Structured output ({model.__name__}): {e}; asking again")
+        max_reasks -= 1
+        cached = None
+        raw = await llm_call(user_message, system=prompt.system, use_cache=False)
+        data = parse_json(raw)
+
+    for attempt in range(max_reasks + 1):
+        try:
+            output = model.model_validate(data)
+        except ValidationError as e:
+            fields = _broken_fields(e)
+            if attempt == max_reasks or not fields or not isinstance(data, dict):
+                raise StructuredOutputError(f"{model.__name__}: {e}") from e
+            logger.warning(f"Structured output ({model.__name__}): invalid fields {fields}; asking again for them only")
+            try:
+                patch = parse_json(
+                    await llm_call(_reask_message(user_message, fields, e), system=prompt.system, use_cache=False)
+                )
+            except StructuredOutputError as reask_error:
+                raise StructuredOutputError(f"{model.__name__}: {reask_error}") from e
+            if isinstance(patch, dict):
+                data = {**data, **{field: patch[field] for field in fields if field in patch}}
+            continue
+        if use_cache and (attempt > 0 or cached is None):
+            # Réponse corrigée par des re-demandes : c'est la sortie fusionnée qui est mise en cache
+            valid = raw if attempt == 0 else json.dumps(data, ensure_ascii=False)
+            await cache_response(user_message, valid, system=prompt.system)
+        return output
+
+    raise StructuredOutputError(f"{model.__name__}: invalid output")
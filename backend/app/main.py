@@ -1,8 +1,12 @@
+import time
+
 from app.api.webhook import router as webhook_router
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import metrics, tracing
 from app.core.config import settings
 from app.repositories.session import init_db
 from app.core.observability import logger
@@ -20,7 +24,6 @@ from app.api.v1.chat import router as chat_router
 # Routes agents
 from app.api.v1.idea import router as idea_router
 from app.api.v1.runs import router as runs_router
-from app.llm.provider import llm_call
 
 def create_app() -> FastAPI:
     app = FastAPI(title=settings.app_name)
@@ -35,6 +38,45 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
         expose_headers=["x-user"],
     )
+
+    if tracing.setup_tracing("fromscratch-api"):
+        @app.middleware("http")
+        async def _request_span(request: Request, call_next):
+            # Trace continuée si l'appelant envoie un traceparent ; elle suit ensuite le job RQ
+            with tracing.attached_context(dict(request.headers)), tracing.span(
+                f"{request.method} {request.url.path}", **{"http.method": request.method}
+            ) as current:
+                response = await call_next(request)
+                route = getattr(request.scope.get("route"), "path", None)
+                if route:
+                    current.update_name(f"{request.method} {route}")
+                tracing.set_attributes(current, **{"http.route": route, "http.status_code": response.status_code})
+                return response
+
+    if metrics.enabled():
+        from app.services.realtime import manager
+
+        metrics.register_api_collectors(manager)
+
+        @app.middleware("http")
+        async def _request_metrics(request: Request, call_next):
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = await call_next(request)
+                status = response.status_code
+                return response
+            finally:
+                # Template de la route (/api/v1/projects/{project_id}) : cardinalité bornée
+                route = getattr(request.scope.get("route"), "path", "unmatched")
+                metrics.observe_request(request.method, route, status, time.perf_counter() - started)
+
+        @app.get("/metrics", include_in_schema=False)
+        async def prometheus_metrics():
+            # Le collecteur RQ interroge Redis en synchrone : hors de la boucle
+            body, content_type = await run_in_threadpool(metrics.render_latest)
+            return Response(body, media_type=content_type)
+
     # Add /api prefix to all v1 routes
     app.include_router(projects_router, prefix="/api")
     app.include_router(diagrams_router, prefix="/api")
@@ -58,6 +100,23 @@ def create_app() -> FastAPI:
             await init_db()
         except Exception as e:
             logger.error(f"DB init failed: {e}")
+            return
+        if settings.activity_log_mode == "buffered":
+            from app.services.activity_log import sink as activity_log_sink
+            activity_log_sink.start()
+        if settings.mongo_indexes == "background":
+            from app.repositories.indexes import start_index_reconciliation
+            from app.domain.registry import DOCUMENT_MODELS
+            start_index_reconciliation(DOCUMENT_MODELS)
+
+    @app.on_event("shutdown")
+    async def _shutdown():
+        from app.services.activity_log import sink as activity_log_sink
+        from app.services.realtime import manager
+        # Entrées du journal encore en mémoire écrites avant l'arrêt
+        await activity_log_sink.stop()
+        await manager.close()
+        tracing.shutdown_tracing()
 
     @app.get("/health")
     def health():
@@ -71,7 +130,10 @@ def create_app() -> FastAPI:
     @app.get("/test-llm")
     async def test_llm(q: str = "Hello"):
         try:
-            answer = await llm_call(q)
+            # Import à la demande : LangChain n'est pas chargé au démarrage de l'API
+            from app.llm.provider import llm_call
+
+            answer = await llm_call(q, priority="interactive")
             return {"input": q, "output": answer}
         except Exception as e:
             return JSONResponse(
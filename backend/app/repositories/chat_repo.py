@@ -2,7 +2,11 @@ from uuid import UUID
 from typing import List, Dict, Any
 from datetime import datetime
 
-from app.domain.chats import ChatDomain, ChatsStructure, SubChatMessage
+from pymongo import UpdateOne
+
+from app.domain.chats import ChatDomain, ChatMessageItemDomain, ChatsStructure, SubChatMessage
+from app.repositories.embedded_items import get_collection, to_object_id
+from app.repositories.item_store import get_storage_mode
 
 async def create_chat(Chat: ChatDomain) -> ChatDomain:
     return await Chat.insert()
@@ -23,6 +27,20 @@ async def add_message(
     # Create the message
     msg = SubChatMessage(message=content, name=name or str(user_id))
 
+    if await get_storage_mode(project_id) != "embedded":
+        # Stockage "items" (ou migration en cours) : un document par message
+        await get_collection(ChatMessageItemDomain).insert_one(
+            _item_doc(to_object_id(project_id), str(user_id), msg.model_dump(by_alias=True))
+        )
+        return {
+            "id": msg.id,
+            "project_id": project_id,
+            "user_id": user_id,
+            "name": msg.name,
+            "message": msg.message,
+            "timestamp": msg.timestamp,
+        }
+
     chat = await ChatDomain.find_one(ChatDomain.project_id == project_id)
     if not chat:
         chat = ChatDomain(project_id=project_id, data=[ChatsStructure(user_id=user_id, user_chat=[msg])])
@@ -47,32 +65,96 @@ async def add_message(
     }
 
 
+def _item_doc(pid, user_id: str, message: dict) -> dict:
+    return {**message, "project_id": pid, "user_id": user_id}
+
+
+def _message_out(project_id, user_id, m) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "project_id": project_id,
+        "user_id": user_id,
+        "name": m.name,
+        "message": m.message,
+        "timestamp": m.timestamp,
+    }
+
+
+async def _embedded_messages(project_id) -> List[Dict[str, Any]]:
+    chat = await ChatDomain.find_one(ChatDomain.project_id == project_id)
+    if not chat:
+        return []
+    return [_message_out(project_id, cs.user_id, m) for cs in chat.data for m in cs.user_chat]
+
+
 async def get_project_messages(
     project_id: UUID,
     limit: int,
     skip: int
 ) -> List[Dict[str, Any]]:
     """Return a flattened list of messages across all users for a project, sorted by timestamp desc."""
-    chat = await ChatDomain.find_one(ChatDomain.project_id == project_id)
-    if not chat:
-        return []
-
-    msgs = []
-    for cs in chat.data:
-        for m in cs.user_chat:
-            msgs.append({
-                "id": m.id,
-                "project_id": project_id,
-                "user_id": cs.user_id,
-                "name": m.name,
-                "message": m.message,
-                "timestamp": m.timestamp,
-            })
+    mode = await get_storage_mode(project_id)
+    if mode != "embedded":
+        pid = to_object_id(project_id)
+        cursor = get_collection(ChatMessageItemDomain).find({"project_id": pid}).sort("timestamp", -1)
+        if mode == "items":
+            # Pagination faite par Mongo (index project_id + timestamp)
+            cursor = cursor.skip(skip).limit(limit)
+        items = [
+            _message_out(project_id, doc.get("user_id"), SubChatMessage.model_validate(doc))
+            async for doc in cursor
+        ]
+        if mode == "items":
+            return items
+        # Double lecture pendant la migration
+        migrated = {m["id"] for m in items}
+        msgs = items + [m for m in await _embedded_messages(project_id) if m["id"] not in migrated]
+    else:
+        msgs = await _embedded_messages(project_id)
 
     # sort by timestamp descending
     msgs.sort(key=lambda x: x["timestamp"], reverse=True)
     return msgs[skip: skip + limit]
 
+
+async def migrate_chat_messages(project_id) -> int:
+    """Copy the container messages into chat_message_items (replayable).
+    Returns the number of inserted messages."""
+    pid = to_object_id(project_id)
+    if pid is None:
+        return 0
+    container = await get_collection(ChatDomain).find_one({"project_id": pid}, {"data": 1})
+    docs = [
+        _item_doc(pid, user_chat.get("user_id"), message)
+        for user_chat in (container or {}).get("data") or []
+        for message in user_chat.get("user_chat") or []
+    ]
+    if not docs:
+        return 0
+    result = await get_collection(ChatMessageItemDomain).bulk_write(
+        [UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs],
+        ordered=False,
+    )
+    return result.upserted_count
+
+
+async def clear_chat_container(project_id) -> bool:
+    pid = to_object_id(project_id)
+    if pid is None:
+        return False
+    result = await get_collection(ChatDomain).update_one(
+        {"project_id": pid}, {"$set": {"data": [], "updated_at": datetime.utcnow()}}
+    )
+    return bool(result.modified_count)
+
+
+async def delete_chat_items(project_id) -> int:
+    pid = to_object_id(project_id)
+    if pid is None:
+        return 0
+    result = await get_collection(ChatMessageItemDomain).delete_many({"project_id": pid})
+    return result.deleted_count
+
 async def delete_chat(chat_id: str) -> ChatDomain | None:
     chat = await ChatDomain.get(chat_id)
     if chat:
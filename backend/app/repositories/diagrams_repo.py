@@ -1,7 +1,9 @@
 from typing import List
 from beanie import PydanticObjectId
-from app.domain.diagram import DiagramDomain as Diagram, DiagramStructure
-from datetime import datetime
+from app.domain.diagram import DiagramDomain as Diagram, DiagramItemDomain, DiagramStructure
+from app.repositories.item_store import ItemStorage
+
+_items = ItemStorage(Diagram, DiagramItemDomain, DiagramStructure)
 
 
 async def create_diagram(diagram: Diagram) -> Diagram:
@@ -16,67 +18,35 @@ async def get_diagram_Container_by_project(project_id: str | PydanticObjectId) -
     diagram = await Diagram.find_one(Diagram.project_id == pid)
     return diagram
 
-async def get_diagram_by_id(project_id:str, doc_id: str) -> DiagramStructure | None:
-    allDiagrams = await get_diagrams_by_project(project_id)
-    for diagram in allDiagrams:
-        if str(diagram.id) == doc_id:
-            return diagram
-    return None
+async def get_diagram_item_by_id(project_id: str | PydanticObjectId, doc_id: str) -> DiagramStructure | None:
+    """Get one of the project's diagram items by its item id."""
+    return await _items.get(project_id, doc_id)
+
+async def add_diagram_item(project_id: str | PydanticObjectId, data: DiagramStructure) -> DiagramStructure | None:
+    """Add an item to the project's diagrams (container $push or item collection, see item_store)."""
+    return await _items.add(project_id, data)
+
+async def add_diagram_items(
+    project_id: str | PydanticObjectId, data: List[DiagramStructure], idempotent: bool = False
+) -> List[DiagramStructure]:
+    """Add several items to the project's diagrams in one round-trip."""
+    return await _items.add_many(project_id, data, idempotent=idempotent)
 
 async def update_diagram_item(project_id: str | PydanticObjectId, data: DiagramStructure) -> DiagramStructure | None:
-    """Update an item inside the project's Diagram document and persist it."""
-    try:
-        pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Diagram.find_one(Diagram.project_id == pid)
-    if not doc:
-        return None
-    for idx, item in enumerate(doc.data):
-        if item.id == data.id:
-            doc.data[idx] = data
-            await doc.save()
-            return data
-    return None
+    """Replace one of the project's diagram items (same _id)."""
+    return await _items.update(project_id, data)
 
 async def remove_diagram_item(project_id: str | PydanticObjectId, doc_id: str) -> DiagramStructure | None:
-    """Remove an item inside the project's Diagram document and persist it."""
-    try:
-        pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Diagram.find_one(Diagram.project_id == pid)
-    if not doc:
-        return None
-    for idx, item in enumerate(doc.data):
-        if str(item.id) == doc_id:
-            deleted_item = doc.data.pop(idx)
-            await doc.save()
-            return deleted_item
-    return None
+    """Remove one of the project's diagram items by _id."""
+    return await _items.remove(project_id, doc_id)
 
-async def get_diagrams_by_project(project_id: str | PydanticObjectId) -> List[DiagramStructure]:
-        try:
-            pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-        except Exception:
-            print("Invalid project id:", project_id)
-            return []
-        diagram = await Diagram.find_one(Diagram.project_id == pid)
-        if not diagram:
-            return []
+async def remove_diagram_items(project_id: str | PydanticObjectId, doc_ids: List[str]) -> bool:
+    """Remove several of the project's diagram items in one round-trip."""
+    return await _items.remove_many(project_id, doc_ids)
 
-        def _key(item: DiagramStructure):
-            updated = getattr(item, "updated_at", None)
-            created = getattr(item, "created_at", None)
-            # normalize None to a very old datetime so sorting works
-            if updated is None:
-                updated = created or datetime.min
-            if created is None:
-                created = updated or datetime.min
-            return (updated, created)
-        return sorted(list(diagram.data), key=_key, reverse=True)
+async def get_diagrams_by_project(project_id: str | PydanticObjectId) -> List[DiagramStructure]:
+    """All diagrams of the project, most recently updated first."""
+    return await _items.list(project_id)
 
 async def get_diagram_by_id(doc_id: str) -> Diagram | None:
     return await Diagram.get(doc_id)
@@ -86,3 +56,7 @@ async def delete_diagram(doc_id: str) -> Diagram | None:
     if doc:
         await doc.delete()
     return doc
+
+async def delete_diagram_items(project_id: str | PydanticObjectId) -> int:
+    """Delete every diagram of the project from the diagram_items collection."""
+    return await _items.delete_project(project_id)
@@ -0,0 +1,177 @@
+"""
+Opérations atomiques sur les tableaux `data` des documents conteneurs par projet
+(TaskDomain, DiagramDomain, RequirementDomain, LogDomain, ...).
+
+Au lieu de charger tout le document, modifier la liste en Python puis `save()`
+le document complet, chaque écriture est un seul opérateur Mongo ciblé :
+- ajout      : $push (upsert du conteneur s'il n'existe pas encore),
+               $push + $each pour un lot d'éléments en un seul aller-retour
+- mise à jour: $set positionnel sur `data.$`
+- suppression: $pull par `_id` (l'élément supprimé est renvoyé via $elemMatch),
+               $pull + $in pour un lot d'éléments
+- lecture    : projection `data.$` (un seul élément transféré)
+La taille de la requête ne dépend plus du nombre d'éléments du projet, et deux
+modifications concurrentes sur des éléments différents ne s'écrasent plus.
+
+Les repositories passent par item_store.ItemStorage, qui délègue ici pour les
+projets en stockage "embedded" et utilise sinon une collection par type d'élément.
+"""
+import hashlib
+from datetime import datetime
+from typing import Any, Optional, Type, TypeVar
+
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+
+def to_object_id(value: Any, label: str = "project id") -> Optional[PydanticObjectId]:
+    if isinstance(value, PydanticObjectId):
+        return value
+    try:
+        return PydanticObjectId(value)
+    except Exception:
+        print(f"Invalid {label}:", value)
+        return None
+
+
+def stable_object_id(*parts: Any) -> PydanticObjectId:
+    """ObjectId déterministe (ex. run_id, type, index) : un même élément généré
+    garde le même _id si l'écriture est rejouée."""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return PydanticObjectId(digest[:24])
+
+
+def get_collection(doc_cls: Type[Document]):
+    """Collection brute du document (Beanie >= 2 : pymongo async, sinon motor)."""
+    getter = getattr(doc_cls, "get_pymongo_collection", None) or doc_cls.get_motor_collection
+    return getter()
+
+
+def dump_item(item: BaseModel) -> dict:
+    # by_alias => `_id`, comme lors d'un save() Beanie
+    return item.model_dump(by_alias=True)
+
+
+async def push_item(doc_cls: Type[Document], project_id: Any, item: ItemT) -> Optional[ItemT]:
+    """Ajoute `item` au tableau `data` du conteneur du projet (créé au besoin)."""
+    pid = to_object_id(project_id)
+    if pid is None:
+        return None
+    now = datetime.utcnow()
+    await get_collection(doc_cls).update_one(
+        {"project_id": pid},
+        {
+            "$push": {"data": dump_item(item)},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True,
+    )
+    return item
+
+
+async def push_items(
+    doc_cls: Type[Document], project_id: Any, items: list[ItemT], idempotent: bool = False
+) -> list[ItemT]:
+    """Ajoute tous les `items` en une seule requête ($push + $each).
+
+    `idempotent=True` : le $push n'est appliqué que si aucun des _id n'est déjà
+    présent (le lot est atomique), donc rejouer l'écriture ne crée pas de doublons.
+    """
+    pid = to_object_id(project_id)
+    if pid is None or not items:
+        return []
+    now = datetime.utcnow()
+    collection = get_collection(doc_cls)
+    docs = [dump_item(item) for item in items]
+
+    if not idempotent:
+        await collection.update_one(
+            {"project_id": pid},
+            {
+                "$push": {"data": {"$each": docs}},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        return items
+
+    # Conteneur créé au besoin, puis $push conditionnel (pas d'upsert sur un filtre $nin)
+    await collection.update_one(
+        {"project_id": pid},
+        {"$setOnInsert": {"data": [], "created_at": now, "updated_at": now}},
+        upsert=True,
+    )
+    result = await collection.update_one(
+        {"project_id": pid, "data._id": {"$nin": [doc["_id"] for doc in docs]}},
+        {"$push": {"data": {"$each": docs}}, "$set": {"updated_at": now}},
+    )
+    if not result.matched_count:
+        print(f"[{doc_cls.__name__}] items already persisted for project {pid}, skipping")
+    return items
+
+
+async def update_item(doc_cls: Type[Document], project_id: Any, item: ItemT) -> Optional[ItemT]:
+    """Remplace l'élément de même `_id` (set positionnel). None si introuvable."""
+    pid = to_object_id(project_id)
+    if pid is None:
+        return None
+    result = await get_collection(doc_cls).update_one(
+        {"project_id": pid, "data._id": item.id},
+        {"$set": {"data.$": dump_item(item), "updated_at": datetime.utcnow()}},
+    )
+    return item if result.matched_count else None
+
+
+async def pull_item(
+    doc_cls: Type[Document], item_cls: Type[ItemT], project_id: Any, item_id: Any
+) -> Optional[ItemT]:
+    """Retire l'élément `item_id` et le renvoie (None si introuvable)."""
+    pid = to_object_id(project_id)
+    oid = to_object_id(item_id, "item id")
+    if pid is None or oid is None:
+        return None
+    before = await get_collection(doc_cls).find_one_and_update(
+        {"project_id": pid, "data._id": oid},
+        {"$pull": {"data": {"_id": oid}}, "$set": {"updated_at": datetime.utcnow()}},
+        projection={"data": {"$elemMatch": {"_id": oid}}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not before or not before.get("data"):
+        return None
+    return item_cls.model_validate(before["data"][0])
+
+
+async def pull_items(doc_cls: Type[Document], project_id: Any, item_ids: list[Any]) -> bool:
+    """Retire en une seule requête tous les éléments dont l'_id est dans `item_ids`
+    (les _id absents sont ignorés, donc l'opération peut être rejouée)."""
+    pid = to_object_id(project_id)
+    oids = [oid for oid in (to_object_id(i, "item id") for i in item_ids) if oid is not None]
+    if pid is None or not oids:
+        return False
+    result = await get_collection(doc_cls).update_one(
+        {"project_id": pid},
+        {"$pull": {"data": {"_id": {"$in": oids}}}, "$set": {"updated_at": datetime.utcnow()}},
+    )
+    return bool(result.modified_count)
+
+
+async def get_item(
+    doc_cls: Type[Document], item_cls: Type[ItemT], project_id: Any, item_id: Any
+) -> Optional[ItemT]:
+    """Lit un seul élément du tableau `data` (projection positionnelle)."""
+    pid = to_object_id(project_id)
+    oid = to_object_id(item_id, "item id")
+    if pid is None or oid is None:
+        return None
+    doc = await get_collection(doc_cls).find_one(
+        {"project_id": pid, "data._id": oid},
+        {"data.$": 1},
+    )
+    if not doc or not doc.get("data"):
+        return None
+    return item_cls.model_validate(doc["data"][0])
@@ -0,0 +1,163 @@
+"""
+Réconciliation des index Mongo avec les déclarations `Settings.indexes` des
+documents Beanie.
+
+- `diff_indexes` : index déclarés absents de la collection, et index présents
+  mais non déclarés (comparaison sur les clés, le nom est ignoré).
+- `reconcile_indexes` : construit les index manquants. Au démarrage de l'API
+  (MONGO_INDEXES=background), `init_beanie` est appelé avec skip_indexes et la
+  construction tourne dans une tâche asyncio : l'API répond pendant le build
+  (MongoDB >= 4.2 ne bloque la collection qu'au début et à la fin du build).
+- `unused_indexes` : index sans aucune utilisation depuis le dernier redémarrage
+  du serveur ($indexStats), candidats à la suppression. Rien n'est jamais
+  supprimé automatiquement.
+
+CLI : scripts/reconcile_indexes.py
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, Sequence, Type
+
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+
+from app.core.observability import get_logger
+from app.repositories.embedded_items import get_collection
+
+logger = get_logger("fromscratch.db")
+
+_task: Optional[asyncio.Task] = None
+
+IndexKey = tuple[tuple[str, Any], ...]
+
+
+@dataclass
+class IndexDiff:
+    collection: str
+    missing: list[IndexModel] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)  # noms des index non déclarés
+
+
+def _to_index_model(spec: Any) -> IndexModel:
+    # Formes acceptées par Beanie : "champ", [("champ", sens), ...] ou IndexModel
+    if isinstance(spec, IndexModel):
+        return spec
+    if isinstance(spec, str):
+        return IndexModel([(spec, ASCENDING)])
+    return IndexModel(list(spec))
+
+
+def declared_indexes(doc_cls: Type[Document]) -> list[IndexModel]:
+    settings_cls = getattr(doc_cls, "Settings", None)
+    return [_to_index_model(spec) for spec in getattr(settings_cls, "indexes", None) or []]
+
+
+def _key(spec: Any) -> IndexKey:
+    # Les index créés depuis le shell peuvent avoir des sens en float (1.0)
+    return tuple(
+        (name, int(direction) if isinstance(direction, float) else direction)
+        for name, direction in dict(spec).items()
+    )
+
+
+def collection_name(doc_cls: Type[Document]) -> str:
+    settings_cls = getattr(doc_cls, "Settings", None)
+    return getattr(settings_cls, "name", None) or doc_cls.__name__
+
+
+async def diff_indexes(doc_cls: Type[Document]) -> IndexDiff:
+    existing = await get_collection(doc_cls).index_information()
+    existing_keys = {_key(info["key"]): name for name, info in existing.items()}
+
+    diff = IndexDiff(collection_name(doc_cls))
+    declared_keys = set()
+    for model in declared_indexes(doc_cls):
+        key = _key(model.document["key"])
+        declared_keys.add(key)
+        if key not in existing_keys:
+            diff.missing.append(model)
+    diff.extra = [
+        name for key, name in existing_keys.items()
+        if name != "_id_" and key not in declared_keys
+    ]
+    return diff
+
+
+async def reconcile_indexes(
+    documents: Iterable[Type[Document]], dry_run: bool = False
+) -> list[IndexDiff]:
+    """
+    Construit les index déclarés manquants, collection par collection.
+    Un échec (ex. doublons sur un index unique) est journalisé et n'arrête pas
+    les autres collections.
+    """
+    diffs = []
+    for doc_cls in documents:
+        try:
+            diff = await diff_indexes(doc_cls)
+        except Exception as e:
+            logger.error(f"Indexes: cannot read indexes of {collection_name(doc_cls)}: {e}")
+            continue
+        diffs.append(diff)
+        if diff.extra:
+            logger.info(f"Indexes: {diff.collection} has undeclared indexes {diff.extra}")
+        if not diff.missing:
+            continue
+        names = [model.document["name"] for model in diff.missing]
+        if dry_run:
+            logger.info(f"Indexes: {diff.collection} is missing {names}")
+            continue
+        logger.info(f"Indexes: building {names} on {diff.collection}")
+        try:
+            await get_collection(doc_cls).create_indexes(diff.missing)
+        except Exception as e:
+            logger.error(f"Indexes: build failed on {diff.collection}: {e}")
+    return diffs
+
+
+async def unused_indexes(documents: Iterable[Type[Document]]) -> list[dict]:
+    """
+    Index sans accès depuis `since` (redémarrage du serveur ou création de l'index).
+    Sur un replica set, $indexStats ne couvre que le membre interrogé.
+    """
+    report = []
+    for doc_cls in documents:
+        cursor = await _aggregate(get_collection(doc_cls), [{"$indexStats": {}}])
+        async for stat in cursor:
+            accesses = stat.get("accesses") or {}
+            if stat.get("name") == "_id_" or accesses.get("ops", 0):
+                continue
+            report.append({
+                "collection": collection_name(doc_cls),
+                "name": stat.get("name"),
+                "key": dict(stat.get("key") or {}),
+                "since": accesses.get("since"),
+            })
+    return report
+
+
+async def _aggregate(collection, pipeline: Sequence[dict]):
+    # motor : aggregate() renvoie directement le curseur ; pymongo async : coroutine
+    cursor = collection.aggregate(list(pipeline))
+    if asyncio.iscoroutine(cursor):
+        cursor = await cursor
+    return cursor
+
+
+def start_index_reconciliation(documents: Iterable[Type[Document]]) -> asyncio.Task:
+    """Lance `reconcile_indexes` en tâche de fond (une seule à la fois par processus)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run_reconciliation(list(documents)))
+    return _task
+
+
+async def _run_reconciliation(documents: list[Type[Document]]) -> None:
+    try:
+        diffs = await reconcile_indexes(documents)
+        missing = sum(len(diff.missing) for diff in diffs)
+        logger.info(f"Indexes: reconciliation done ({missing} missing index(es) handled)")
+    except Exception as e:
+        logger.error(f"Indexes: reconciliation failed: {e}")
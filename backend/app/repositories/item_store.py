@@ -0,0 +1,258 @@
+"""
+Stockage des éléments d'un projet (tâches, diagrammes, requirements, logs) selon
+le mode du projet (`Project.storage_mode`) :
+
+- embedded  : tableau `data` du document conteneur (repositories/embedded_items.py).
+              Limité à 16 Mo par projet, la liste entière est lue et triée en Python.
+- items     : un document par élément dans une collection dédiée (task_items, ...)
+              avec index composés (project_id, updated_at) [+ (project_id, assignee_id)
+              pour les tâches] : tri et pagination faits par Mongo.
+- migrating : période de double lecture pendant scripts/migrate_item_storage.py.
+              Les écritures vont dans la collection d'éléments, les lectures
+              fusionnent les deux (la version de la collection gagne), les
+              suppressions s'appliquent aux deux.
+
+Le mode est mémorisé par projet pendant ITEM_STORAGE_MODE_CACHE_SECONDS (cache local
+au processus) ; le script de migration attend ce délai entre deux changements de mode.
+"""
+import time
+from datetime import datetime
+from typing import Any, Optional, Sequence, Type
+
+from beanie import Document
+from pydantic import BaseModel
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.domain.project import Project
+from app.repositories import embedded_items
+from app.repositories.embedded_items import ItemT, dump_item, get_collection, to_object_id
+
+STORAGE_MODES = ("embedded", "migrating", "items")
+
+_modes: dict[str, tuple[float, str]] = {}
+
+
+async def get_storage_mode(project_id: Any) -> str:
+    pid = to_object_id(project_id)
+    if pid is None:
+        return "embedded"
+    key = str(pid)
+    cached = _modes.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    doc = await get_collection(Project).find_one({"_id": pid}, {"storage_mode": 1})
+    mode = (doc or {}).get("storage_mode") or "embedded"
+    ttl = settings.item_storage_mode_cache_seconds
+    if ttl > 0:
+        _modes[key] = (time.monotonic() + ttl, mode)
+    return mode
+
+
+async def set_storage_mode(project_id: Any, mode: str) -> bool:
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode: {mode}")
+    pid = to_object_id(project_id)
+    if pid is None:
+        return False
+    result = await get_collection(Project).update_one(
+        {"_id": pid}, {"$set": {"storage_mode": mode, "updated_at": datetime.utcnow()}}
+    )
+    _modes.pop(str(pid), None)
+    return bool(result.matched_count)
+
+
+def _sort_key(sort: Sequence[tuple[str, int]]):
+    # Même ordre que Mongo en tri décroissant : les valeurs absentes en dernier
+    def key(item: BaseModel):
+        return tuple(getattr(item, field, None) or datetime.min for field, _ in sort)
+    return key
+
+
+class ItemStorage:
+    """Accès aux éléments d'un type (ex. tâches) quel que soit le mode du projet."""
+
+    def __init__(
+        self,
+        container: Type[Document],
+        items: Type[Document],
+        item: Type[ItemT],
+        sort: Sequence[tuple[str, int]] = (("updated_at", -1), ("created_at", -1)),
+    ):
+        self.container = container  # conteneur par projet (tableau `data`)
+        self.items = items          # un document par élément
+        self.item = item
+        self.sort = list(sort)
+
+    def _doc(self, pid, item: BaseModel) -> dict:
+        return {**dump_item(item), "project_id": pid}
+
+    def _load(self, doc: dict) -> ItemT:
+        doc.pop("project_id", None)
+        return self.item.model_validate(doc)
+
+    async def list(self, project_id: Any, filters: Optional[dict] = None) -> list[ItemT]:
+        """Éléments du projet, triés (par défaut du plus récemment modifié au plus ancien).
+        `filters` : conditions Mongo sur les champs de l'élément (ex. {"assignee_id": oid})."""
+        pid = to_object_id(project_id)
+        if pid is None:
+            return []
+        mode = await get_storage_mode(pid)
+
+        items: list[ItemT] = []
+        if mode != "embedded":
+            cursor = get_collection(self.items).find({"project_id": pid, **(filters or {})}).sort(self.sort)
+            items = [self._load(doc) async for doc in cursor]
+            if mode == "items":
+                return items
+
+        container = await self.container.find_one(self.container.project_id == pid)
+        embedded = list(container.data) if container else []
+        if filters:
+            embedded = [
+                item for item in embedded
+                if all(getattr(item, field, None) == value for field, value in filters.items())
+            ]
+        if mode == "migrating":
+            # Double lecture : la version de la collection d'éléments gagne
+            migrated = {item.id for item in items}
+            embedded = items + [item for item in embedded if item.id not in migrated]
+        return sorted(embedded, key=_sort_key(self.sort), reverse=True)
+
+    async def get(self, project_id: Any, item_id: Any) -> Optional[ItemT]:
+        pid = to_object_id(project_id)
+        oid = to_object_id(item_id, "item id")
+        if pid is None or oid is None:
+            return None
+        mode = await get_storage_mode(pid)
+        if mode != "embedded":
+            doc = await get_collection(self.items).find_one({"_id": oid, "project_id": pid})
+            if doc or mode == "items":
+                return self._load(doc) if doc else None
+        return await embedded_items.get_item(self.container, self.item, pid, oid)
+
+    async def add(self, project_id: Any, item: ItemT) -> Optional[ItemT]:
+        pid = to_object_id(project_id)
+        if pid is None:
+            return None
+        if await get_storage_mode(pid) == "embedded":
+            return await embedded_items.push_item(self.container, pid, item)
+        await get_collection(self.items).insert_one(self._doc(pid, item))
+        return item
+
+    async def add_many(self, project_id: Any, items: list[ItemT], idempotent: bool = False) -> list[ItemT]:
+        """Un seul aller-retour ; `idempotent=True` : les _id déjà présents sont ignorés."""
+        pid = to_object_id(project_id)
+        if pid is None or not items:
+            return []
+        if await get_storage_mode(pid) == "embedded":
+            return await embedded_items.push_items(self.container, pid, items, idempotent=idempotent)
+        collection = get_collection(self.items)
+        docs = [self._doc(pid, item) for item in items]
+        if idempotent:
+            await collection.bulk_write(
+                [UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs],
+                ordered=False,
+            )
+        else:
+            await collection.insert_many(docs, ordered=False)
+        return items
+
+    async def update(self, project_id: Any, item: ItemT) -> Optional[ItemT]:
+        """Remplace l'élément de même `_id`. None si introuvable."""
+        pid = to_object_id(project_id)
+        if pid is None:
+            return None
+        mode = await get_storage_mode(pid)
+        if mode == "embedded":
+            return await embedded_items.update_item(self.container, pid, item)
+        if mode == "migrating" and not await self.get(pid, item.id):
+            return None
+        # En migration, l'élément encore embarqué est écrit dans la collection
+        # (upsert) : la lecture fusionnée le prend alors en priorité
+        result = await get_collection(self.items).replace_one(
+            {"_id": item.id, "project_id": pid}, self._doc(pid, item), upsert=mode == "migrating"
+        )
+        return item if (result.matched_count or result.upserted_id is not None) else None
+
+    async def remove(self, project_id: Any, item_id: Any) -> Optional[ItemT]:
+        """Supprime l'élément et le renvoie (None si introuvable)."""
+        pid = to_object_id(project_id)
+        oid = to_object_id(item_id, "item id")
+        if pid is None or oid is None:
+            return None
+        mode = await get_storage_mode(pid)
+        removed = None
+        if mode != "embedded":
+            doc = await get_collection(self.items).find_one_and_delete({"_id": oid, "project_id": pid})
+            removed = self._load(doc) if doc else None
+            if mode == "items":
+                return removed
+        embedded = await embedded_items.pull_item(self.container, self.item, pid, oid)
+        return removed or embedded
+
+    async def remove_many(self, project_id: Any, item_ids: list[Any]) -> bool:
+        pid = to_object_id(project_id)
+        oids = [oid for oid in (to_object_id(i, "item id") for i in item_ids) if oid is not None]
+        if pid is None or not oids:
+            return False
+        mode = await get_storage_mode(pid)
+        deleted = False
+        if mode != "embedded":
+            result = await get_collection(self.items).delete_many({"project_id": pid, "_id": {"$in": oids}})
+            deleted = bool(result.deleted_count)
+            if mode == "items":
+                return deleted
+        return await embedded_items.pull_items(self.container, pid, oids) or deleted
+
+    async def delete_project(self, project_id: Any) -> int:
+        """Supprime tous les éléments du projet dans la collection dédiée."""
+        pid = to_object_id(project_id)
+        if pid is None:
+            return 0
+        result = await get_collection(self.items).delete_many({"project_id": pid})
+        return result.deleted_count
+
+    async def migrate(self, project_id: Any) -> int:
+        """
+        Copie les éléments du conteneur dans la collection dédiée ($setOnInsert :
+        un élément déjà écrit pendant la migration n'est pas écrasé). Rejouable.
+        Un élément supprimé entre la lecture du conteneur et la copie serait
+        recréé depuis cette lecture : les éléments insérés qui ne sont plus dans
+        le conteneur après la copie sont retirés de la collection.
+        Retourne le nombre d'éléments insérés (et conservés).
+        """
+        pid = to_object_id(project_id)
+        if pid is None:
+            return 0
+        container = get_collection(self.container)
+        snapshot = await container.find_one({"project_id": pid}, {"data": 1})
+        docs = [{**doc, "project_id": pid} for doc in (snapshot or {}).get("data") or []]
+        if not docs:
+            return 0
+        result = await get_collection(self.items).bulk_write(
+            [UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs],
+            ordered=False,
+        )
+        inserted = set(result.upserted_ids.values())
+        if not inserted:
+            return 0
+
+        # Une suppression faite après la copie s'applique aux deux stockages
+        # (mode migrating) : seules celles faites avant sont à rejouer ici
+        current = await container.find_one({"project_id": pid}, {"data._id": 1})
+        still_there = {doc["_id"] for doc in (current or {}).get("data") or []}
+        removed = list(inserted - still_there)
+        if removed:
+            await get_collection(self.items).delete_many({"project_id": pid, "_id": {"$in": removed}})
+        return len(inserted) - len(removed)
+
+    async def clear_container(self, project_id: Any) -> bool:
+        """Vide le tableau `data` du conteneur (après la migration)."""
+        pid = to_object_id(project_id)
+        if pid is None:
+            return False
+        result = await get_collection(self.container).update_one(
+            {"project_id": pid}, {"$set": {"data": [], "updated_at": datetime.utcnow()}}
+        )
+        return bool(result.modified_count)
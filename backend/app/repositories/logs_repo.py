@@ -1,8 +1,12 @@
 from typing import List
 from uuid import UUID
-from app.domain.log import LogDomain as Log
+from app.domain.log import LogDomain as Log, LogEntry, LogItemDomain
+from app.repositories import embedded_items
+from app.repositories.item_store import ItemStorage
 from beanie import PydanticObjectId
 
+_items = ItemStorage(Log, LogItemDomain, LogEntry, sort=(("timestamp", -1),))
+
 async def create_log(log: Log) -> Log:
     return await log.insert()
 
@@ -16,6 +20,35 @@ async def get_logs_by_project(project_id: str | PydanticObjectId) -> Log:
     return await Log.find_one(Log.project_id == pid)
 
 
+async def add_log_entry(project_id: str | PydanticObjectId, entry: LogEntry) -> LogEntry | None:
+    """Add an entry to the project's logs (container $push or item collection, see item_store)."""
+    return await _items.add(project_id, entry)
+
+
+async def add_log_entries(project_id: str | PydanticObjectId, entries: List[LogEntry]) -> List[LogEntry]:
+    """Add a batch of entries in one write ($push $each, or one bulk insert in items mode).
+    Idempotent: replaying the same batch after a failed flush creates no duplicates."""
+    return await _items.add_many(project_id, entries, idempotent=True)
+
+
+async def list_log_entries(
+    project_id: str | PydanticObjectId, user_id: str | PydanticObjectId | None = None
+) -> List[LogEntry]:
+    """Log entries of the project (optionally of one user), most recent first."""
+    filters = None
+    if user_id is not None:
+        uid = embedded_items.to_object_id(user_id, "user id")
+        if uid is None:
+            return []
+        filters = {"user_id": uid}
+    return await _items.list(project_id, filters)
+
+
+async def delete_log_items(project_id: str | PydanticObjectId) -> int:
+    """Delete every entry of the project from the log_items collection."""
+    return await _items.delete_project(project_id)
+
+
 async def get_log_by_id(doc_id: UUID) -> Log | None:
     return await Log.get(doc_id)
 
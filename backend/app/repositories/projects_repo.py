@@ -2,6 +2,7 @@ from typing import List
 from app.domain.project import Project
 from app.domain.user import User
 from app.domain.role import RoleDomain
+from app.repositories.embedded_items import get_collection, to_object_id
 from beanie import PydanticObjectId
 from bson import ObjectId
 
@@ -16,6 +17,10 @@ async def list_projects() -> List[Project]:
 async def list_for_user(user_id: str) -> List[dict]:
     """Return projects for a user with projection:
     - id, name, description, members (name + role name), created_at, updated_at
+
+    Uses a fixed number of batched queries whatever the number of projects:
+    memberships, projects, all members ($in), their roles ($in) and, only if
+    needed, fallback owner names ($in).
     """
     # Find any user docs that reference this external user id to collect project ids
     user_docs = await User.find({"info_id": user_id}).to_list()
@@ -26,31 +31,46 @@ async def list_for_user(user_id: str) -> List[dict]:
         query["$or"].append({"_id": {"$in": project_ids_from_users}})
 
     projects = await Project.find(query).to_list()
+    if not projects:
+        return []
+
+    # resolve members of every project in one query (users that reference the project)
+    members = await User.find({"project_id": {"$in": [p.id for p in projects]}}).to_list()
+    members_by_project: dict = {}
+    for m in members:
+        members_by_project.setdefault(m.project_id, []).append(m)
+
+    # gather role ids to resolve names
+    role_ids = list({m.role_id for m in members if getattr(m, "role_id", None) is not None})
+    roles_map = {}
+    if role_ids:
+        roles = await RoleDomain.find({"_id": {"$in": role_ids}}).to_list()
+        roles_map = {r.id: r.name for r in roles}
+
+    # Resolve owner name: prefer a User doc tied to this project, fallback to any User with the info_id
+    owner_by_project = {}
+    for proj in projects:
+        for m in members_by_project.get(proj.id, []):
+            if m.info_id == proj.created_by:
+                owner_by_project[proj.id] = m
+                break
+    missing_owners = list({p.created_by for p in projects if p.id not in owner_by_project})
+    fallback_owners = {}
+    if missing_owners:
+        for u in await User.find({"info_id": {"$in": missing_owners}}).to_list():
+            fallback_owners.setdefault(u.info_id, u)
 
-    # Pre-fetch roles for efficiency per project later
     results: List[dict] = []
     for proj in projects:
-        # resolve members as users that reference this project
-        members = await User.find({"project_id": proj.id}).to_list()
-        # gather role ids to resolve names
-        role_ids = list({m.role_id for m in members if getattr(m, "role_id", None) is not None})
-        roles_map = {}
-        if role_ids:
-            roles = await RoleDomain.find({"_id": {"$in": role_ids}}).to_list()
-            roles_map = {r.id: r.name for r in roles}
-
         members_list = []
-        for m in members:
+        for m in members_by_project.get(proj.id, []):
             members_list.append({
                 "name": m.name,
                 "role_name": roles_map.get(m.role_id) if getattr(m, "role_id", None) is not None else None,
             })
 
-        # Resolve owner name: prefer a User doc tied to this project, fallback to any User with the info_id
         owner_name = proj.created_by
-        owner_user = await User.find_one({"info_id": proj.created_by, "project_id": proj.id})
-        if not owner_user:
-            owner_user = await User.find_one({"info_id": proj.created_by})
+        owner_user = owner_by_project.get(proj.id) or fallback_owners.get(proj.created_by)
         if owner_user:
             owner_name = owner_user.name
 
@@ -75,13 +95,22 @@ async def get_project(project_id: str) -> Project | None:
     return await Project.get(project_id)
 
 
+async def existing_project_ids(project_ids: List[str]) -> set[str]:
+    """Parmi `project_ids`, ceux dont le projet existe encore (une requête $in, _id seul)."""
+    oids = [oid for oid in (to_object_id(pid) for pid in set(project_ids)) if oid is not None]
+    if not oids:
+        return set()
+    cursor = get_collection(Project).find({"_id": {"$in": oids}}, {"_id": 1})
+    return {str(doc["_id"]) async for doc in cursor}
+
+
 async def update_project(project_id: str, data: dict) -> Project | None:
     proj = await Project.get(project_id)
     if not proj:
         return None
-    for k, v in data.items():
-        setattr(proj, k, v)
-    await proj.save()
+    # $set des seuls champs modifiés : un save() complet écraserait les champs
+    # modifiés en parallèle (ex. storage_mode pendant une migration)
+    await proj.set(data)
     return proj
 
 
@@ -99,7 +128,7 @@ async def add_member(project_id: PydanticObjectId, user_id: PydanticObjectId) ->
         return None
     if user_id not in proj.members:
         proj.members.append(user_id)
-        await proj.save()
+        await proj.set({"members": proj.members})
     return proj
 
 
@@ -110,5 +139,5 @@ async def remove_member(project_id: str, user_id: str) -> Project | None:
         return None
     if user_id in proj.members:
         proj.members.remove(user_id)
-        await proj.save()
+        await proj.set({"members": proj.members})
     return proj
@@ -1,8 +1,10 @@
 from typing import List
 from uuid import UUID
-from app.domain.requirement import RequirementDomain as Requirement , RequirementStructure
+from app.domain.requirement import RequirementDomain as Requirement , RequirementItemDomain, RequirementStructure
 from beanie import PydanticObjectId
-from datetime import datetime
+from app.repositories.item_store import ItemStorage
+
+_items = ItemStorage(Requirement, RequirementItemDomain, RequirementStructure)
 
 
 async def create_requirement(requirement: Requirement) -> Requirement:
@@ -18,47 +20,29 @@ async def get_requirement_Container_by_project(project_id: str | PydanticObjectI
     return diagram
 
 async def get_requirements_by_project(project_id: str) -> List[RequirementStructure]:
-        try:
-            pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-        except Exception:
-            print("Invalid project id:", project_id)
-            return []
-        requirement = await Requirement.find_one(Requirement.project_id == pid)
-        if not requirement:
-            return []
-
-        def _key(item: RequirementStructure):
-            updated = getattr(item, "updated_at", None)
-            created = getattr(item, "created_at", None)
-            # normalize None to a very old datetime so sorting works
-            if updated is None:
-                updated = created or datetime.min
-            if created is None:
-                created = updated or datetime.min
-            return (updated, created)
-        print(requirement)
-        return sorted(list(requirement.data), key=_key, reverse=True)
+    """All requirements of the project, most recently updated first."""
+    return await _items.list(project_id)
 
 
 async def get_requirement_by_id(doc_id: UUID) -> Requirement | None:
     return await Requirement.get(doc_id)
 
 
+async def add_requirement_item(project_id: str | PydanticObjectId, data: RequirementStructure) -> RequirementStructure | None:
+    """Add an item to the project's requirements (container $push or item collection, see item_store)."""
+    return await _items.add(project_id, data)
+
+
+async def add_requirement_items(
+    project_id: str | PydanticObjectId, data: List[RequirementStructure], idempotent: bool = False
+) -> List[RequirementStructure]:
+    """Add several items to the project's requirements in one round-trip."""
+    return await _items.add_many(project_id, data, idempotent=idempotent)
+
+
 async def update_requirement(project_id: str | PydanticObjectId, data: RequirementStructure) -> RequirementStructure | None:
-    try:
-        pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Requirement.find_one(Requirement.project_id == pid)
-    if not doc:
-        return None
-    for idx, item in enumerate(doc.data):
-        if item.id == data.id:
-            doc.data[idx] = data
-            await doc.save()
-            return data
-    return None
+    """Replace one of the project's requirement items (same _id)."""
+    return await _items.update(project_id, data)
 
 
 async def delete_all_requirements(project_id: str | PydanticObjectId) -> bool:
@@ -75,18 +59,13 @@ async def delete_all_requirements(project_id: str | PydanticObjectId) -> bool:
     return True
 
 async def delete_requirement(project_id: str | PydanticObjectId, doc_id: str) -> RequirementStructure | None:
-    """Remove an item inside the project's Diagram document and persist it."""
-    try:
-        pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Requirement.find_one(Requirement.project_id == pid)
-    if not doc:
-        return None
-    for idx, item in enumerate(doc.data):
-        if str(item.id) == doc_id:
-            deleted_item = doc.data.pop(idx)
-            await doc.save()
-            return deleted_item
-    return None
+    """Remove one of the project's requirement items by _id."""
+    return await _items.remove(project_id, doc_id)
+
+async def delete_requirements(project_id: str | PydanticObjectId, doc_ids: List[str]) -> bool:
+    """Remove several of the project's requirement items in one round-trip."""
+    return await _items.remove_many(project_id, doc_ids)
+
+async def delete_requirement_items(project_id: str | PydanticObjectId) -> int:
+    """Delete every requirement of the project from the requirement_items collection."""
+    return await _items.delete_project(project_id)
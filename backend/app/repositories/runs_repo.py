@@ -1,4 +1,5 @@
 from uuid import UUID
+from datetime import datetime
 from typing import Optional, List, Union
 from app.domain.run import RunDomain
 
@@ -27,11 +28,15 @@ async def get_runs_by_project(project_id: Union[str, UUID]) -> List[RunDomain]:
     return await RunDomain.find(RunDomain.project_id == project_id).to_list()
 
 
-async def get_latest_run_for_project(project_id: Union[str, UUID]) -> Optional[RunDomain]:
-    """Return the most recent run for a project (or None)."""
+async def get_latest_run_for_project(
+    project_id: Union[str, UUID], status: Optional[str] = None
+) -> Optional[RunDomain]:
+    """Return the most recent run for a project (or None), optionally with a given status."""
+    query = RunDomain.find(RunDomain.project_id == str(project_id))
+    if status is not None:
+        query = query.find(RunDomain.status == status)
     return await (
-        RunDomain
-        .find(RunDomain.project_id == str(project_id))
+        query
         .sort("-created_at")
         .first_or_none()
     )
@@ -46,15 +51,37 @@ async def update_run_status(run_id: Union[str, UUID], status: str) -> Optional[R
     await run.update_status(status)
     return run
 
-async def update_run_state(run_id: Union[str, UUID], state: dict) -> Optional[RunDomain]:
+async def update_run_state(run_id: Union[str, UUID], state: dict) -> bool:
     """
     Met à jour l'état d'un run.
+    Utilise un $set atomique par clé (state.<clé>) au lieu d'un load-modify-save,
+    pour que les noeuds exécutés en parallèle n'écrasent pas les clés des autres.
     """
-    run = await get_run(run_id)
-    if not run:
-        return None
-    await run.update_state(state)
-    return run
+    if not state:
+        return False
+    rid = UUID(run_id) if isinstance(run_id, str) else run_id
+    fields = {f"state.{key}": value for key, value in state.items()}
+    fields["updated_at"] = datetime.utcnow()
+    result = await RunDomain.find_one(RunDomain.id == rid).update({"$set": fields})
+    return bool(result and result.matched_count)
+
+async def save_node_checkpoint(run_id: Union[str, UUID], node: str, updates: dict, completed: bool = True) -> bool:
+    """
+    Checkpoint d'un noeud du pipeline, en une seule écriture atomique :
+    $set des clés produites (state.<clé>) + ajout du noeud à state.completed_nodes.
+    Un run relancé (retry RQ) saute les noeuds déjà présents dans completed_nodes.
+    `completed=False` (noeud sans sortie exploitable) : le noeud est ajouté à
+    state.failed_nodes à la place, et sera ré-exécuté par une reprise.
+    """
+    rid = UUID(run_id) if isinstance(run_id, str) else run_id
+    fields = {f"state.{key}": value for key, value in (updates or {}).items()}
+    fields["updated_at"] = datetime.utcnow()
+    if completed:
+        update = {"$set": fields, "$addToSet": {"state.completed_nodes": node}, "$pull": {"state.failed_nodes": node}}
+    else:
+        update = {"$set": fields, "$addToSet": {"state.failed_nodes": node}}
+    result = await RunDomain.find_one(RunDomain.id == rid).update(update)
+    return bool(result and result.matched_count)
 
 async def delete_run(run_id: Union[str, UUID]) -> bool:
     """
@@ -1,42 +1,48 @@
 from __future__ import annotations
 
-from typing import AsyncGenerator, List
-import pkgutil
-import importlib
+from typing import AsyncGenerator
+import asyncio
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from beanie import init_beanie, Document
+from beanie import init_beanie
 
+from app.core.mongo_events import command_listeners
 from app.core.config import settings
-import app.domain as domain_pkg
+from app.domain.registry import DOCUMENT_MODELS
 
 _client: AsyncIOMotorClient | None = None
+_init_lock: asyncio.Lock | None = None
 
 
 async def init_db() -> None:
-    """Initialize motor client and Beanie with discovered Document models."""
+    """Initialize motor client and Beanie with the registered Document models."""
     global _client
     mongodb_uri = settings.mongodb_uri
-    _client = AsyncIOMotorClient(mongodb_uri)
-
-    docs: List[type[Document]] = []
-    try:
-        # dynamically import app.domain modules and collect Document subclasses
-        for finder, name, ispkg in pkgutil.iter_modules(domain_pkg.__path__):
-            mod = importlib.import_module(f"app.domain.{name}")
-            for attr in dir(mod):
-                obj = getattr(mod, attr)
-                try:
-                    if isinstance(obj, type) and issubclass(obj, Document) and obj is not Document:
-                        docs.append(obj)
-                except Exception:
-                    # ignore non-types and other issues
-                    pass
-    except Exception:
-        # if domain package inspection fails, continue with an empty list
-        pass
-
-    await init_beanie(database=_client.get_default_database(), document_models=docs)
+    _client = AsyncIOMotorClient(mongodb_uri, event_listeners=command_listeners())
+
+    # MONGO_INDEXES=init : index créés par Beanie avant de rendre la main (bloquant) ;
+    # sinon ils sont réconciliés à part (app/repositories/indexes.py)
+    await init_beanie(
+        database=_client.get_default_database(),
+        document_models=list(DOCUMENT_MODELS),
+        skip_indexes=settings.mongo_indexes != "init",
+    )
+
+
+async def ensure_db() -> None:
+    """Initialize Motor/Beanie once per process; later calls are no-ops.
+
+    Used by long-lived workers so that jobs share one client pool and one
+    Beanie initialization instead of paying for `init_db()` every time.
+    """
+    global _init_lock
+    if _client is not None:
+        return
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    async with _init_lock:
+        if _client is None:
+            await init_db()
 
 
 async def get_mongo_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
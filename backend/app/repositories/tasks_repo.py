@@ -1,7 +1,10 @@
 from typing import List
 from beanie import PydanticObjectId
-from app.domain.task import TaskDomain as Task, TaskStructure
-from datetime import datetime
+from app.domain.task import TaskDomain as Task, TaskItemDomain, TaskStructure
+from app.repositories import embedded_items
+from app.repositories.item_store import ItemStorage
+
+_items = ItemStorage(Task, TaskItemDomain, TaskStructure)
 
 
 async def create_task(task: Task) -> Task:
@@ -25,28 +28,19 @@ async def get_task_Container_by_project(
 async def get_tasks_by_project(
     project_id: str | PydanticObjectId,
 ) -> List[TaskStructure]:
-    try:
-        pid = (
-            PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-        )
-    except Exception:
-        print("Invalid project id:", project_id)
-        return []
-    task = await Task.find_one(Task.project_id == pid)
-    if not task:
-        return []
+    """All tasks of the project, most recently updated first (sorted by Mongo
+    in "items" storage, see item_store)."""
+    return await _items.list(project_id)
 
-    def _key(item: TaskStructure):
-        updated = getattr(item, "updated_at", None)
-        created = getattr(item, "created_at", None)
-        # normalize None to a very old datetime so sorting works
-        if updated is None:
-            updated = created or datetime.min
-        if created is None:
-            created = updated or datetime.min
-        return (updated, created)
 
-    return sorted(list(task.data), key=_key, reverse=True)
+async def get_tasks_by_assignee(
+    project_id: str | PydanticObjectId, assignee_id: str | PydanticObjectId
+) -> List[TaskStructure]:
+    """Tasks of the project assigned to `assignee_id` (index project_id + assignee_id)."""
+    oid = embedded_items.to_object_id(assignee_id, "assignee id")
+    if oid is None:
+        return []
+    return await _items.list(project_id, {"assignee_id": oid})
 
 
 async def get_today_tasks(project_id: str) -> List[TaskStructure]:
@@ -63,44 +57,29 @@ async def get_task_by_id(doc_id: str) -> Task | None:
 async def get_task_item_by_id(
     project_id: str | PydanticObjectId, item_id: str
 ) -> TaskStructure | None:
-    """Get an item inside the project's Task document by its item id."""
-    try:
-        pid = (
-            PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-        )
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Task.find_one(Task.project_id == pid)
-    if not doc:
-        return None
-    for item in doc.data:
-        if str(item.id) == item_id:
-            return item
-    return None
+    """Get one of the project's task items by its item id."""
+    return await _items.get(project_id, item_id)
+
+
+async def add_task_item(
+    project_id: str | PydanticObjectId, data: TaskStructure
+) -> TaskStructure | None:
+    """Add an item to the project's tasks (container $push or item collection, see item_store)."""
+    return await _items.add(project_id, data)
+
+
+async def add_task_items(
+    project_id: str | PydanticObjectId, data: List[TaskStructure], idempotent: bool = False
+) -> List[TaskStructure]:
+    """Add several items to the project's tasks in one round-trip."""
+    return await _items.add_many(project_id, data, idempotent=idempotent)
 
 
 async def update_task_item(
     project_id: str | PydanticObjectId, data: TaskStructure
 ) -> TaskStructure | None:
-    """Update an item inside the project's Diagram document and persist it."""
-    try:
-        pid = (
-            PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-        )
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Task.find_one(Task.project_id == pid)
-    if not doc:
-        return None
-    for idx, item in enumerate(doc.data):
-        print("Updating task item:", item.id , "with data:", data.id)
-        if  item.id == data.id:
-            doc.data[idx] = data
-            await doc.save()
-            return data
-    return None
+    """Replace one of the project's task items (same _id)."""
+    return await _items.update(project_id, data)
 
 
 
@@ -114,20 +93,17 @@ async def delete_task(doc_id: str) -> Task | None:
 async def remove_task_item(
     project_id: str | PydanticObjectId, doc_id: str
 ) -> TaskStructure | None:
-    """Remove an item inside the project's Task document and persist it."""
-    try:
-        pid = (
-            PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
-        )
-    except Exception:
-        print("Invalid project id:", project_id)
-        return None
-    doc = await Task.find_one(Task.project_id == pid)
-    if not doc:
-        return None
-    for idx, item in enumerate(doc.data):
-        if str(item.id) == doc_id:
-            deleted_item = doc.data.pop(idx)
-            await doc.save()
-            return deleted_item
-    return None
+    """Remove one of the project's task items by _id."""
+    return await _items.remove(project_id, doc_id)
+
+
+async def remove_task_items(
+    project_id: str | PydanticObjectId, doc_ids: List[str]
+) -> bool:
+    """Remove several of the project's task items in one round-trip."""
+    return await _items.remove_many(project_id, doc_ids)
+
+
+async def delete_task_items(project_id: str | PydanticObjectId) -> int:
+    """Delete every task of the project from the task_items collection."""
+    return await _items.delete_project(project_id)
@@ -48,6 +48,16 @@ async def get_user_by_id(id: str | PydanticObjectId) -> User | None:
 async def get_user_by_info_id(info_id: str) -> User | None:
     return await User.find_one(User.info_id == info_id)
 
+async def get_users_by_info_ids(info_ids: List[str]) -> dict[str, User]:
+    """One query ($in) for several info_ids; for each, the same user doc as get_user_by_info_id."""
+    users: dict[str, User] = {}
+    if not info_ids:
+        return users
+    for user in await User.find({"info_id": {"$in": list(set(info_ids))}}).to_list():
+        # Ordre naturel, comme find_one : le premier document trouvé par info_id
+        users.setdefault(user.info_id, user)
+    return users
+
 async def get_user_by_info_id_and_projectId(info_id: str, project_id: str) -> User | None:
     try:
         pid = PydanticObjectId(project_id) if isinstance(project_id, str) else project_id
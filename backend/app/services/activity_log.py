@@ -0,0 +1,146 @@
+"""
+Journal d'activité bufferisé.
+
+`log_activity` (log_service) ne fait plus d'écriture dans la requête : l'entrée
+est mise en mémoire et une tâche de fond l'écrit par lots, toutes les
+ACTIVITY_LOG_FLUSH_INTERVAL_MS ou dès ACTIVITY_LOG_BATCH_SIZE entrées :
+- une seule requête ($in) pour retrouver les utilisateurs du lot ;
+- une écriture par projet ($push $each dans le conteneur, ou insertion groupée
+  dans log_items selon le mode de stockage, voir repositories/item_store.py).
+
+L'id et l'horodatage de l'entrée sont fixés à l'appel, pas à l'écriture.
+Au-delà de ACTIVITY_LOG_MAX_PENDING entrées en attente, l'appelant attend un
+flush (contre-pression plutôt que perte). Les entrées d'un projet supprimé
+entre-temps sont abandonnées (l'écriture recréerait son conteneur de logs).
+Les entrées restantes sont écrites à
+l'arrêt de l'API (stop()). Hors API (worker, scripts) ou avec
+ACTIVITY_LOG_MODE=inline, la tâche ne tourne pas et l'écriture reste immédiate.
+"""
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.observability import get_logger
+from app.domain.log import LogEntry
+from app.repositories.logs_repo import add_log_entries
+from app.repositories.projects_repo import existing_project_ids
+from app.repositories.users_repo import get_users_by_info_ids
+
+logger = get_logger("fromscratch.activity")
+
+
+@dataclass
+class PendingLog:
+    project_id: str
+    info_id: str
+    message: str
+    id: PydanticObjectId = field(default_factory=PydanticObjectId)
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    attempts: int = 0
+
+
+class ActivityLogSink:
+    def __init__(self, flush_interval: float = 0.5, batch_size: int = 500, max_pending: int = 10000, max_attempts: int = 3):
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max(self.batch_size, max_pending)
+        self.max_attempts = max_attempts
+        self._pending: deque[PendingLog] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrête la tâche de fond puis écrit tout ce qui reste en attente."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Termine : une entrée en échec est abandonnée après max_attempts écritures
+        while self._pending:
+            await self.flush()
+
+    async def enqueue(self, project_id: str, info_id: str, message: str) -> PendingLog:
+        entry = PendingLog(project_id=str(project_id), info_id=info_id, message=message)
+        self._pending.append(entry)
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return entry
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                if not await self.flush():
+                    break  # Mongo indisponible : nouvel essai au prochain tick
+
+    async def flush(self) -> bool:
+        """Écrit un lot (au plus batch_size entrées). False si l'écriture a échoué."""
+        async with self._flush_lock:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if not batch:
+                return True
+            try:
+                await self._write(batch)
+                return True
+            except asyncio.CancelledError:
+                # Arrêt pendant l'écriture : le lot sera rejoué par stop() (écriture idempotente)
+                self._pending.extendleft(reversed(batch))
+                raise
+            except Exception as e:
+                retry = [entry for entry in batch if entry.attempts + 1 < self.max_attempts]
+                for entry in retry:
+                    entry.attempts += 1
+                self._pending.extendleft(reversed(retry))
+                logger.error(f"Activity log: flush failed ({len(batch)} entries, {len(batch) - len(retry)} dropped): {e}")
+                return False
+
+    async def _write(self, batch: list[PendingLog]) -> None:
+        users = await get_users_by_info_ids([entry.info_id for entry in batch])
+        projects = await existing_project_ids([entry.project_id for entry in batch])
+        by_project: dict[str, list[LogEntry]] = {}
+        for entry in batch:
+            user = users.get(entry.info_id)
+            if user is None:
+                logger.warning(f"Activity log: user {entry.info_id} not found, entry dropped: {entry.message}")
+                continue
+            if entry.project_id not in projects:
+                logger.warning(f"Activity log: project {entry.project_id} no longer exists, entry dropped: {entry.message}")
+                continue
+            by_project.setdefault(entry.project_id, []).append(
+                LogEntry(_id=entry.id, message=entry.message, user_id=user.id, timestamp=entry.timestamp)
+            )
+        for project_id, entries in by_project.items():
+            await add_log_entries(project_id, entries)
+
+
+sink = ActivityLogSink(
+    flush_interval=settings.activity_log_flush_interval_ms / 1000,
+    batch_size=settings.activity_log_batch_size,
+    max_pending=settings.activity_log_max_pending,
+)
@@ -2,36 +2,36 @@ from typing import List
 from app.domain.diagram import DiagramDomain, DiagramStructure
 from app.repositories.diagrams_repo import (
     get_diagrams_by_project,
-    get_diagram_by_id,
-    get_diagram_Container_by_project,
+    get_diagram_by_id as get_diagram_doc_by_id,
+    get_diagram_item_by_id,
+    add_diagram_item,
+    add_diagram_items,
     update_diagram_item,
     remove_diagram_item,
+    remove_diagram_items,
 )
 
 
 async def create(project_id: str, payload: DiagramStructure) -> DiagramStructure:
-    diagram = await get_diagram_Container_by_project(project_id)
-    if not diagram:
-        diagram = DiagramDomain(
-            project_id=project_id,
-            data=[payload]
-        )
-    else:
-        diagram.data.append(payload)
-
-    await diagram.save()    
-    # Return the persisted item (may have server-side defaults such as object id / timestamps)
-    return diagram.data[-1]
+    await add_diagram_item(project_id, payload)
+    # Return the persisted item (object id / timestamps are set client-side)
+    return payload
+
+
+async def create_many(project_id: str, payloads: List[DiagramStructure], idempotent: bool = False) -> List[DiagramStructure]:
+    """Persist several diagrams in a single round-trip ($push/$each).
+    With `idempotent`, nothing is written if one of the ids already exists."""
+    return await add_diagram_items(project_id, payloads, idempotent=idempotent)
     
 async def get_diagram_by_id(project_id: str, doc_id: str) -> DiagramStructure | None:
-    return await get_diagram_by_id(project_id, doc_id)
+    return await get_diagram_item_by_id(project_id, doc_id)
 
 async def list_by_project(project_id: str) -> List[DiagramStructure]:
     return await get_diagrams_by_project(project_id)
 
 
 async def get_by_id(doc_id: str) -> DiagramDomain | None:
-    return await get_diagram_by_id(doc_id)
+    return await get_diagram_doc_by_id(doc_id)
 
 
 async def update(project_id: str, data: DiagramStructure) -> DiagramStructure | None:
@@ -41,3 +41,7 @@ async def update(project_id: str, data: DiagramStructure) -> DiagramStructure |
 async def remove(project_id: str, doc_id: str) -> DiagramStructure | None:
     return await remove_diagram_item(project_id, doc_id)
         
+
+
+async def remove_many(project_id: str, doc_ids: List[str]) -> bool:
+    return await remove_diagram_items(project_id, doc_ids)
@@ -32,9 +32,19 @@ async def update_from_json(project_id: str, export_json_str: str) -> Optional[Ex
         Updated ExportDomain or None if parsing fails
     """
     try:
-        # Parse JSON string
         export_data = json.loads(export_json_str)
-        
+    except json.JSONDecodeError as e:
+        print(f"[EXPORT_SERVICE] Failed to parse JSON: {e}")
+        return None
+    return await update_from_data(project_id, export_data)
+
+
+async def update_from_data(project_id: str, export_data: dict) -> Optional[ExportDomain]:
+    """
+    Update the export document from already parsed export data
+    (e.g. the validated agent output stored in the pipeline state).
+    """
+    try:
         # Build update data with proper type conversion
         update_data = {}
         
@@ -91,9 +101,6 @@ async def update_from_json(project_id: str, export_json_str: str) -> Optional[Ex
         # Update export document
         return await update_export_repo(project_id, update_data)
         
-    except json.JSONDecodeError as e:
-        print(f"[EXPORT_SERVICE] Failed to parse JSON: {e}")
-        return None
     except Exception as e:
         print(f"[EXPORT_SERVICE] Error updating export: {e}")
         return None
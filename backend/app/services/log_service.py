@@ -5,63 +5,69 @@ from app.domain.log import LogDomain ,LogEntry
 from app.services.user_service import get_member_info_by_id
 from app.repositories.logs_repo import (
     create_log,
-    get_logs_by_project,
+    add_log_entry,
+    list_log_entries,
     get_log_by_id,
     update_log,
     delete_log,
 )
 from app.repositories.users_repo import get_user_by_info_id
+from app.core.observability import get_logger
+from app.services.activity_log import sink as activity_log_sink
 from datetime import datetime
 from datetime import datetime
 
+logger = get_logger("fromscratch.activity")
 
-async def log_activity(project_id: str, user_id: str, message: str) -> LogEntry:
+
+async def log_activity(project_id: str, user_id: str, message: str, immediate: bool = False) -> None:
     """
     Helper function to log project activity consistently.
-    
+
+    In the API (ACTIVITY_LOG_MODE=buffered) the entry is only queued in memory and
+    written in batches by app/services/activity_log.py; elsewhere (or with
+    immediate=True, e.g. right before the project is deleted) it is written now.
+
     Args:
         project_id: The project ID where the activity occurred
         user_id: The user who performed the action
         message: The activity message (e.g., "Created task: User Authentication")
-        
-    Returns:
-        The persisted LogEntry
+        immediate: Write the entry now even if the buffered sink is running
     """
+    if activity_log_sink.running and not immediate:
+        await activity_log_sink.enqueue(project_id, user_id, message)
+        return
+    await _log_activity_now(project_id, user_id, message)
+
+
+async def _log_activity_now(project_id: str, user_id: str, message: str) -> LogEntry | None:
     user = await get_user_by_info_id(user_id)
-    print(f"Logging activity for user_id: {user.id} in project_id: {project_id} - {message}")
-    if user:
-        payload = LogEntry(
-            message=message,
-            user_id=PydanticObjectId(user.id)
-        )
-        return await add_log(project_id, payload)
-    else:
-        raise ValueError("User not found for logging activity")
+    if not user:
+        # Comme l'écriture bufferisée : une entrée sans utilisateur est abandonnée,
+        # l'action journalisée ne doit pas échouer pour autant
+        logger.warning(f"Activity log: user {user_id} not found, entry dropped: {message}")
+        return None
+    payload = LogEntry(
+        message=message,
+        user_id=PydanticObjectId(user.id)
+    )
+    return await add_log(project_id, payload)
 
 async def create(project_id: str, payload: LogDomain) -> LogDomain:
     payload.project_id = project_id
     return await create_log(payload)
 
 async def add_log(project_id: str, payload: LogEntry) -> LogEntry:
-    logsContainer = await get_logs_by_project(project_id)
-    if not logsContainer:
-        logsContainer = LogDomain(
-            project_id=project_id,
-            data=[payload]
-        )
-    else:
-        logsContainer.data.append(payload)
-
-    await logsContainer.save()    
-    # Return the persisted item (may have server-side defaults such as object id / timestamps)
-    return logsContainer.data[-1]
+    await add_log_entry(project_id, payload)
+    # Return the persisted item (object id / timestamp are set client-side)
+    return payload
     
     
 async def list_by_project(project_id: str) -> List[dict]:
-    Logs = await get_logs_by_project(project_id)
+    entries = await list_log_entries(project_id)
     results = []
-    if Logs:
-        for log in Logs.data:
+    if entries:
+        for log in entries:
             user = await get_member_info_by_id(log.user_id)
             results.append({
                 "id": str(log.id),
@@ -93,17 +99,15 @@ async def list_by_project(project_id: str) -> List[dict]:
 
 async def list_by_user(project_id: str, user_id: str) -> List[dict]:
     """Get logs for a specific user in a project."""
-    Logs = await get_logs_by_project(project_id)
+    user = await get_user_by_info_id(user_id)
+    entries = await list_log_entries(project_id, user_id=user.id) if user else []
     results = []
-    if Logs:
-        for log in Logs.data:
-            user = await get_user_by_info_id(user_id)
-            if str(log.user_id) == str(user.id):
-                results.append({
-                    "id": str(log.id),
-                    "timestamp": log.timestamp if hasattr(log, 'timestamp') else None,
-                    "details": log.message if hasattr(log, 'message') else ""
-                })
+    for log in entries:
+        results.append({
+            "id": str(log.id),
+            "timestamp": log.timestamp if hasattr(log, 'timestamp') else None,
+            "details": log.message if hasattr(log, 'message') else ""
+        })
 
     # Sort descending by timestamp (most recent first). Robust to None and ISO strings.
     def _ts_key(item):
@@ -0,0 +1,116 @@
+"""
+Résolution des permissions effectives d'un utilisateur sur un projet.
+
+Une seule agrégation sur `users` ($lookup projects + roles) remplace les lectures
+séquentielles user -> project -> role faites à chaque requête. L'ensemble des
+permissions d'un membre est mémorisé par (info_id, project_id) pendant
+PERMISSION_CACHE_TTL_SECONDS, dans un LRU borné à PERMISSION_CACHE_MAX_ENTRIES
+(les entrées expirées sont purgées à chaque insertion). Un refus (non membre)
+n'est pas mémorisé : un utilisateur qui vient d'accepter une invitation est
+reconnu dès sa requête suivante, quelle que soit l'instance qui la reçoit.
+
+Les services qui modifient rôles ou appartenances appellent `invalidate_project`.
+Le cache est local au processus : avec plusieurs instances d'API, un retrait de
+droits fait ailleurs est visible au plus tard après le TTL.
+"""
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Optional
+
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.observability import logger
+from app.domain.user import User
+
+# (info_id, project_id) -> (expiration, permissions), du moins au plus récemment utilisé
+_cache: "OrderedDict[tuple[str, str], tuple[float, FrozenSet[str]]]" = OrderedDict()
+
+
+def _pipeline(info_id: str, pid: PydanticObjectId) -> list[dict]:
+    return [
+        {"$match": {"info_id": info_id, "project_id": pid}},
+        {"$limit": 1},
+        {"$lookup": {"from": "projects", "localField": "project_id", "foreignField": "_id", "as": "project"}},
+        {"$lookup": {"from": "roles", "localField": "role_id", "foreignField": "_id", "as": "role"}},
+        {"$project": {
+            "_id": 1,
+            "project_found": {"$gt": [{"$size": "$project"}, 0]},
+            "is_member": {"$in": ["$_id", {"$ifNull": [{"$arrayElemAt": ["$project.members", 0]}, []]}]},
+            "role_project_id": {"$arrayElemAt": ["$role.project_id", 0]},
+            "permissions": {"$ifNull": [{"$arrayElemAt": ["$role.permissions", 0]}, []]},
+        }},
+    ]
+
+
+async def _load(info_id: str, project_id: str) -> Optional[FrozenSet[str]]:
+    """Mêmes règles que role_service.user_has_permission, en un aller-retour."""
+    try:
+        pid = PydanticObjectId(project_id)
+    except Exception:
+        print("Invalid project id:", project_id)
+        return None
+
+    rows = await User.aggregate(_pipeline(info_id, pid)).to_list(length=1)
+    if not rows:
+        return None
+    row = rows[0]
+
+    if not row.get("project_found") or not row.get("is_member"):
+        logger.debug("permission denied: user not in project members", extra={"user_id": str(row.get("_id"))})
+        return None
+    if str(row.get("role_project_id")) != str(pid):
+        logger.debug("permission denied: role missing or belongs to different project", extra={"user_id": str(row.get("_id"))})
+        return None
+
+    return frozenset(row.get("permissions") or [])
+
+
+async def get_permissions(info_id: str, project_id: str) -> Optional[FrozenSet[str]]:
+    """Permissions effectives de `info_id` sur le projet (None si non membre)."""
+    key = (str(info_id), str(project_id))
+    now = time.monotonic()
+
+    cached = _cache.get(key)
+    if cached is not None:
+        if cached[0] > now:
+            _cache.move_to_end(key)
+            return cached[1]
+        _cache.pop(key, None)
+
+    permissions = await _load(*key)
+    ttl = settings.permission_cache_ttl_seconds
+    if ttl > 0 and permissions is not None:
+        _remember(key, now + ttl, permissions)
+    return permissions
+
+
+def _remember(key: tuple[str, str], expires_at: float, permissions: FrozenSet[str]) -> None:
+    _cache[key] = (expires_at, permissions)
+    _cache.move_to_end(key)
+    # Purge à l'insertion : entrées expirées en tête (les moins récemment utilisées),
+    # puis éviction LRU au-delà de la taille maximale
+    now = time.monotonic()
+    while _cache:
+        oldest_key, (oldest_expiry, _) = next(iter(_cache.items()))
+        if oldest_expiry > now:
+            break
+        _cache.pop(oldest_key)
+    while len(_cache) > max(1, settings.permission_cache_max_entries):
+        _cache.popitem(last=False)
+
+
+async def has_permission(info_id: str, project_id: str, permission: str) -> bool:
+    permissions = await get_permissions(info_id, project_id)
+    return bool(permissions) and permission in permissions
+
+
+def invalidate_project(project_id) -> None:
+    """Oublie les permissions mémorisées pour un projet (rôle ou membres modifiés)."""
+    project_key = str(project_id)
+    for key in [k for k in _cache if k[1] == project_key]:
+        _cache.pop(key, None)
+
+
+def invalidate_all() -> None:
+    _cache.clear()
@@ -33,9 +33,19 @@ async def update_from_json(project_id: str, planner_json_str: str) -> Optional[P
         Updated PlannerDomain or None if parsing fails
     """
     try:
-        # Parse JSON string
         planner_data = json.loads(planner_json_str)
-        
+    except json.JSONDecodeError as e:
+        print(f"[PLANNER_SERVICE] Failed to parse JSON: {e}")
+        return None
+    return await update_from_data(project_id, planner_data)
+
+
+async def update_from_data(project_id: str, planner_data: dict) -> Optional[PlannerDomain]:
+    """
+    Update the planner document from already parsed planner data
+    (e.g. the validated agent output stored in the pipeline state).
+    """
+    try:
         # Build update data with proper type conversion
         update_data = {}
         
@@ -64,9 +74,6 @@ async def update_from_json(project_id: str, planner_json_str: str) -> Optional[P
         # Update planner document
         return await update_planner_repo(project_id, update_data)
         
-    except json.JSONDecodeError as e:
-        print(f"[PLANNER_SERVICE] Failed to parse JSON: {e}")
-        return None
     except Exception as e:
         print(f"[PLANNER_SERVICE] Error updating planner: {e}")
         return None
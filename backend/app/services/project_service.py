@@ -1,4 +1,5 @@
 from typing import List
+from app.core.config import settings
 from app.domain.user import User
 from app.domain.project import Project
 from app.domain.role import RoleDomain
@@ -17,12 +18,13 @@ from app.repositories.projects_repo import (
     remove_member,
     delete_project,
 )
-from app.repositories.diagrams_repo import create_diagram , delete_diagram
-from app.repositories.tasks_repo import create_task , delete_task , get_today_tasks
-from app.repositories.requirements_repo import create_requirement ,  delete_all_requirements
-from app.repositories.logs_repo import create_log, delete_log 
-from app.repositories.chat_repo import create_chat , delete_chat
+from app.repositories.diagrams_repo import create_diagram , delete_diagram , delete_diagram_items
+from app.repositories.tasks_repo import create_task , delete_task , get_today_tasks , delete_task_items
+from app.repositories.requirements_repo import create_requirement ,  delete_all_requirements , delete_requirement_items
+from app.repositories.logs_repo import create_log, delete_log , delete_log_items
+from app.repositories.chat_repo import create_chat , delete_chat , delete_chat_items
 from app.services.role_service import delete_role , get_roles_by_project
+from app.services import permission_service
 from app.repositories.users_repo import set_role, create_user , delete_user , get_users_by_project
 
 from app.services.role_service import get_roles_info_by_project
@@ -41,7 +43,10 @@ async def create_project_with_roles(payload: object, current_user: object) -> Pr
     print(f"Creating project with creator_id: {creator_id}")
     # Set the creator on the payload and create the project
     project = Project(
-        name=payload.name, description=payload.description, created_by=creator_id
+        name=payload.name,
+        description=payload.description,
+        created_by=creator_id,
+        storage_mode=settings.item_storage_default,
     )
     project = await create_project(project)
 
@@ -148,6 +153,11 @@ async def delete(project: Project) -> Project | None:
         await delete_task(project.tasks_id)
     if project.diagrams_id is not None:
         await delete_diagram(project.diagrams_id)
+    if project.storage_mode != "embedded":
+        # Stockage "items" : un document par élément dans les collections dédiées
+        for delete_items in (delete_chat_items, delete_log_items, delete_requirement_items,
+                             delete_task_items, delete_diagram_items):
+            await delete_items(project.id)
     # Delete all users associated with the project
     users = await get_users_by_project(project.id)
     if users:
@@ -160,6 +170,7 @@ async def delete(project: Project) -> Project | None:
             await delete_role(role.id)
     # Finally, delete the project itself
     await delete_project(project.id)
+    permission_service.invalidate_project(project.id)
     return project
 
 
@@ -173,7 +184,9 @@ async def invite_member(project_id: str, member_id: str) -> Project | None:
     if not project:
         return None
     # Permission check should be done at API layer
-    return await add_member(project_id, member_id)
+    updated = await add_member(project_id, member_id)
+    permission_service.invalidate_project(project_id)
+    return updated
 
 
 async def remove_member_from_project(project_id: str, member_id: str) -> Project | None:
@@ -182,7 +195,9 @@ async def remove_member_from_project(project_id: str, member_id: str) -> Project
     if not project:
         return None
     # Permission check should be done at API layer
-    return await remove_member(project_id, member_id)
+    updated = await remove_member(project_id, member_id)
+    permission_service.invalidate_project(project_id)
+    return updated
 
 
 async def load_overview(project: Project) -> dict:
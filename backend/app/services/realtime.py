@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
+import uuid
 from typing import Dict, Set, Optional, Any
 from fastapi import WebSocket
+from app.core.config import settings
 from app.core.observability import logger
 
 
@@ -11,19 +14,160 @@ def room_key(project_id: str, page_id: str) -> str:
     return f"{project_id}:{page_id}"
 
 
+PRESENCE_KEY_PREFIX = "realtime:presence:"
+ROOM_CHANNEL_PREFIX = "realtime:room:"
+
+
+def _json_default(o):
+    # Ensure any non-JSON-serializable objects (e.g., PydanticObjectId) are converted to strings
+    try:
+        return str(o)
+    except Exception:
+        return None
+
+
 class RoomManager:
-    """In-memory room-based WebSocket connection manager.
+    """Room-based WebSocket connection manager.
 
     - Rooms are keyed by `project_id:page_id`.
     - Tracks connections per room and emits broadcast messages.
     - No database storage; presence and cursors are ephemeral.
+
+    With `backend="redis"` (REALTIME_BACKEND) rooms span processes/replicas:
+    - `broadcast` delivers to local sockets and publishes to `realtime:room:{key}`;
+      each process only subscribes to the rooms it has local sockets for and
+      ignores its own messages (origin = instance id).
+    - Presence is a Redis hash `realtime:presence:{key}` (connection id -> user + ts),
+      refreshed by a heartbeat; entries older than the TTL (crashed process) are ignored.
+
+    Cursor moves are coalesced: `update_cursor` only records the latest position
+    per user and a per-room tick (`cursor_hz`) flushes one `cursors` frame.
+    Those frames are droppable: a socket still busy with the previous frame is
+    skipped, and any send exceeding `send_timeout` closes the socket instead of
+    stalling the room.
     """
 
-    def __init__(self):
+    def __init__(self, backend: str = "memory", presence_ttl: int = 30, cursor_hz: float = 30, send_timeout: float = 1.0):
         self.rooms: Dict[str, Set[WebSocket]] = {}
         self.user_by_ws: Dict[WebSocket, Dict[str, Any]] = {}
         self._lock = asyncio.Lock()
 
+        self.distributed = backend == "redis"
+        self.presence_ttl = presence_ttl
+        self.instance_id = uuid.uuid4().hex
+        self._conn_ids: Dict[WebSocket, str] = {}
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Canaux de room effectivement souscrits ; les changements de souscription
+        # d'une même room sont sérialisés (verrous répartis par hash de la clé)
+        self._subscribed: Set[str] = set()
+        self._subscription_locks = [asyncio.Lock() for _ in range(64)]
+
+        self.cursor_interval = 1.0 / max(1.0, cursor_hz)
+        self.send_timeout = send_timeout
+        self._pending_cursors: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._cursor_tasks: Dict[str, asyncio.Task] = {}
+        self._sending: Set[WebSocket] = set()
+
+    # ------------------------------------------------------------
+    # Redis helpers (distributed mode)
+    # ------------------------------------------------------------
+    def _redis(self):
+        from app.core.events import get_async_redis
+        return get_async_redis()
+
+    def _ensure_background_tasks(self):
+        if self._pubsub is None:
+            self._pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def _listen(self):
+        """Forward messages published by other processes to local sockets."""
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    # no local room yet: the pubsub connection only exists after subscribe()
+                    await asyncio.sleep(0.5)
+                    continue
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not msg or msg.get("type") != "message":
+                    continue
+                envelope = json.loads(msg["data"])
+                if envelope.get("origin") == self.instance_id:
+                    continue
+                key = msg["channel"][len(ROOM_CHANNEL_PREFIX):]
+                await self._deliver_local(key, envelope["data"], droppable=envelope.get("droppable", False))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime: pubsub listener error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _heartbeat(self):
+        """Refresh presence timestamps of local connections every TTL/3."""
+        while True:
+            await asyncio.sleep(max(1.0, self.presence_ttl / 3))
+            try:
+                async with self._lock:
+                    entries = [
+                        (key, self._conn_ids[ws], self.user_by_ws.get(ws))
+                        for key, room in self.rooms.items()
+                        for ws in room
+                        if ws in self._conn_ids
+                    ]
+                if not entries:
+                    continue
+                now = time.time()
+                pipe = self._redis().pipeline(transaction=False)
+                for key, conn_id, user in entries:
+                    pipe.hset(PRESENCE_KEY_PREFIX + key, conn_id, json.dumps({"user": user, "ts": now}, default=_json_default))
+                    pipe.expire(PRESENCE_KEY_PREFIX + key, self.presence_ttl * 2)
+                await pipe.execute()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime: presence heartbeat failed: {e}")
+
+    async def _sync_subscription(self, key: str):
+        """Subscribe to / unsubscribe from the room channel to match the local sockets.
+
+        The decision is re-read under the room's subscription lock, so a leave and
+        a join racing on the same room always end with a subscription iff the room
+        still has local sockets (and a failed call is retried by the next join/leave).
+        """
+        async with self._subscription_locks[hash(key) % len(self._subscription_locks)]:
+            async with self._lock:
+                wanted = key in self.rooms
+            if wanted and key not in self._subscribed:
+                await self._pubsub.subscribe(ROOM_CHANNEL_PREFIX + key)
+                self._subscribed.add(key)
+            elif not wanted and key in self._subscribed:
+                await self._pubsub.unsubscribe(ROOM_CHANNEL_PREFIX + key)
+                self._subscribed.discard(key)
+
+    async def _join_distributed(self, key: str, ws: WebSocket, user: Optional[Dict[str, Any]]):
+        self._ensure_background_tasks()
+        await self._sync_subscription(key)
+        conn_id = f"{self.instance_id}:{id(ws)}"
+        self._conn_ids[ws] = conn_id
+        pipe = self._redis().pipeline(transaction=False)
+        pipe.hset(PRESENCE_KEY_PREFIX + key, conn_id, json.dumps({"user": user, "ts": time.time()}, default=_json_default))
+        pipe.expire(PRESENCE_KEY_PREFIX + key, self.presence_ttl * 2)
+        await pipe.execute()
+
+    async def _leave_distributed(self, key: str, conn_id: Optional[str]):
+        if self._pubsub is not None:
+            await self._sync_subscription(key)
+        if conn_id:
+            await self._redis().hdel(PRESENCE_KEY_PREFIX + key, conn_id)
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
     async def connect(self, key: str, ws: WebSocket, user: Optional[Dict[str, Any]] = None):
         async with self._lock:
             if key not in self.rooms:
@@ -32,6 +176,11 @@ class RoomManager:
             if user is not None:
                 self.user_by_ws[ws] = user
             logger.info(f"Realtime: client connected to {key} (user={user.get('id') if user else 'unknown'})")
+        if self.distributed:
+            try:
+                await self._join_distributed(key, ws, user)
+            except Exception as e:
+                logger.warning(f"Realtime: redis join failed for {key}: {e}")
         # after connection, broadcast a presence snapshot to all members
         try:
             users = await self.get_users(key)
@@ -46,8 +195,16 @@ class RoomManager:
                 room.remove(ws)
                 if not room:
                     self.rooms.pop(key, None)
-            self.user_by_ws.pop(ws, None)
+            user = self.user_by_ws.pop(ws, None)
+            conn_id = self._conn_ids.pop(ws, None)
+            if user and isinstance(user, dict):
+                self._pending_cursors.get(key, {}).pop(str(user.get('id')), None)
             logger.info(f"Realtime: client disconnected from {key}")
+        if self.distributed:
+            try:
+                await self._leave_distributed(key, conn_id)
+            except Exception as e:
+                logger.warning(f"Realtime: redis leave failed for {key}: {e}")
         # after disconnect, broadcast a presence snapshot so clients have consistent view
         try:
             users = await self.get_users(key)
@@ -55,38 +212,103 @@ class RoomManager:
         except Exception as e:
             logger.debug(f"Realtime: failed to broadcast presence snapshot after disconnect: {e}")
 
-    async def broadcast(self, key: str, message: Dict[str, Any], skip: Optional[WebSocket] = None):
+    async def broadcast(self, key: str, message: Dict[str, Any], skip: Optional[WebSocket] = None, droppable: bool = False):
+        data = json.dumps(message, default=_json_default)
+        if self.distributed:
+            # other processes deliver to all their sockets; `skip` is always local
+            envelope = json.dumps({"origin": self.instance_id, "data": data, "droppable": droppable})
+            try:
+                await self._redis().publish(ROOM_CHANNEL_PREFIX + key, envelope)
+            except Exception as e:
+                logger.warning(f"Realtime: redis publish failed for {key}: {e}")
+        await self._deliver_local(key, data, skip, droppable)
+
+    async def _deliver_local(self, key: str, data: str, skip: Optional[WebSocket] = None, droppable: bool = False):
         # Copy recipients without holding lock while sending
         recipients: Set[WebSocket]
         async with self._lock:
             recipients = set(self.rooms.get(key, set()))
 
-        # Ensure any non-JSON-serializable objects (e.g., PydanticObjectId) are converted to strings
-        def _json_default(o):
-            try:
-                return str(o)
-            except Exception:
-                return None
+        if droppable:
+            # fire-and-forget: never wait for a socket, skip those still sending
+            for ws in recipients:
+                if ws is skip or ws in self._sending:
+                    continue
+                self._sending.add(ws)
+                asyncio.create_task(self._send_droppable(ws, data))
+            return
 
-        data = json.dumps(message, default=_json_default)
         send_tasks = []
         for ws in recipients:
             if skip is not None and ws == skip:
                 continue
-            send_tasks.append(ws.send_text(data))
+            send_tasks.append(self._send_with_timeout(ws, data))
         if send_tasks:
             # best-effort; log individual send errors
-            results = await asyncio.gather(*[self._safe_send(t) for t in send_tasks], return_exceptions=True)
+            results = await asyncio.gather(*send_tasks, return_exceptions=True)
             for r in results:
                 if isinstance(r, Exception):
                     logger.debug(f"Realtime: send error: {r}")
 
-    async def _safe_send(self, coro):
+    async def _send_with_timeout(self, ws: WebSocket, data: str):
         try:
-            return await coro
+            return await asyncio.wait_for(ws.send_text(data), timeout=self.send_timeout)
+        except asyncio.TimeoutError as e:
+            # slow consumer: drop it, its receive loop will run the disconnect path
+            logger.info("Realtime: dropping slow socket (send timeout)")
+            try:
+                await ws.close(code=1013)
+            except Exception:
+                pass
+            return e
         except Exception as e:
             return e
 
+    async def _send_droppable(self, ws: WebSocket, data: str):
+        try:
+            r = await self._send_with_timeout(ws, data)
+            if isinstance(r, Exception):
+                logger.debug(f"Realtime: send error: {r}")
+        finally:
+            self._sending.discard(ws)
+
+    # ------------------------------------------------------------
+    # Cursors (coalesced per room, flushed every tick)
+    # ------------------------------------------------------------
+    def update_cursor(self, key: str, user: Dict[str, Any], x: Any, y: Any, ts: Any = None):
+        """Record the latest cursor of `user`; sent with the next room tick."""
+        self._pending_cursors.setdefault(key, {})[str(user.get('id'))] = {"user": user, "x": x, "y": y, "ts": ts}
+        task = self._cursor_tasks.get(key)
+        if task is None or task.done():
+            self._cursor_tasks[key] = asyncio.create_task(self._cursor_tick(key))
+
+    async def _cursor_tick(self, key: str):
+        project_id, page_id = key.split(':', 1)
+        idle_ticks = 0
+        max_idle_ticks = max(1, int(2.0 / self.cursor_interval))  # stop after ~2s without moves
+        try:
+            while idle_ticks < max_idle_ticks:
+                await asyncio.sleep(self.cursor_interval)
+                pending = self._pending_cursors.pop(key, None)
+                if not pending:
+                    idle_ticks += 1
+                    continue
+                idle_ticks = 0
+                frame = {
+                    "type": "cursors",
+                    "projectId": project_id,
+                    "pageId": page_id,
+                    "cursors": list(pending.values()),
+                }
+                await self.broadcast(key, frame, droppable=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Realtime: cursor tick failed for {key}: {e}")
+        finally:
+            if self._cursor_tasks.get(key) is asyncio.current_task():
+                self._cursor_tasks.pop(key, None)
+
     async def broadcast_crud(self, project_id: str, page_id: str, action: str, entity: str, payload: Dict[str, Any]):
         key = room_key(str(project_id), str(page_id))
         message = {
@@ -101,6 +323,11 @@ class RoomManager:
 
     async def get_users(self, key: str) -> Dict[str, Any]:
         """Return a dict of user-id -> user-info for all connections in the room."""
+        if self.distributed:
+            try:
+                return await self._get_users_distributed(key)
+            except Exception as e:
+                logger.warning(f"Realtime: redis presence read failed for {key}: {e}")
         async with self._lock:
             room = self.rooms.get(key, set())
             users = {}
@@ -111,9 +338,56 @@ class RoomManager:
                     users[uid] = u
             return users
 
+    async def _get_users_distributed(self, key: str) -> Dict[str, Any]:
+        entries = await self._redis().hgetall(PRESENCE_KEY_PREFIX + key)
+        cutoff = time.time() - self.presence_ttl
+        users: Dict[str, Any] = {}
+        stale = []
+        for conn_id, raw in entries.items():
+            try:
+                entry = json.loads(raw)
+            except Exception:
+                stale.append(conn_id)
+                continue
+            if entry.get("ts", 0) < cutoff:
+                stale.append(conn_id)
+                continue
+            u = entry.get("user")
+            if u and isinstance(u, dict):
+                users[str(u.get('id'))] = u
+        if stale:
+            await self._redis().hdel(PRESENCE_KEY_PREFIX + key, *stale)
+        return users
+
+    async def close(self):
+        """Stop background tasks and drop this process' presence entries (shutdown)."""
+        for task in (self._listener_task, self._heartbeat_task, *self._cursor_tasks.values()):
+            if task is not None:
+                task.cancel()
+        if not self.distributed:
+            return
+        try:
+            async with self._lock:
+                entries = [(key, self._conn_ids[ws]) for key, room in self.rooms.items() for ws in room if ws in self._conn_ids]
+            if entries:
+                pipe = self._redis().pipeline(transaction=False)
+                for key, conn_id in entries:
+                    pipe.hdel(PRESENCE_KEY_PREFIX + key, conn_id)
+                await pipe.execute()
+            if self._pubsub is not None:
+                close = getattr(self._pubsub, "aclose", None) or self._pubsub.close
+                await close()
+        except Exception as e:
+            logger.debug(f"Realtime: close failed: {e}")
+
 
 # Singleton manager used across the app
-manager = RoomManager()
+manager = RoomManager(
+    backend=settings.realtime_backend,
+    presence_ttl=settings.realtime_presence_ttl_seconds,
+    cursor_hz=settings.realtime_cursor_hz,
+    send_timeout=settings.realtime_send_timeout_ms / 1000,
+)
 
 
 async def broadcast_crud_event(project_id: str, page_id: str, action: str, entity: str, payload: Dict[str, Any]):
@@ -2,28 +2,27 @@ from uuid import UUID
 from typing import List
 from app.domain.requirement import RequirementDomain , RequirementStructure
 from app.repositories.requirements_repo import (
-    get_requirement_Container_by_project,
+    add_requirement_item,
+    add_requirement_items,
     get_requirements_by_project,
     get_requirement_by_id,
     update_requirement,
     delete_requirement,
+    delete_requirements,
 )
 
 
 
 async def create(project_id: str, payload: RequirementStructure) -> RequirementStructure:
-    requirement = await get_requirement_Container_by_project(project_id)
-    if not requirement:
-        requirement = RequirementDomain(
-            project_id=project_id,
-            data=[payload]
-        )
-    else:
-        requirement.data.append(payload)
-
-    await requirement.save()    
-    # Return the persisted item (may have server-side defaults such as object id / timestamps)
-    return requirement.data[-1]
+    await add_requirement_item(project_id, payload)
+    # Return the persisted item (object id / timestamps are set client-side)
+    return payload
+
+
+async def create_many(project_id: str, payloads: List[RequirementStructure], idempotent: bool = False) -> List[RequirementStructure]:
+    """Persist several requirements in a single round-trip ($push/$each).
+    With `idempotent`, nothing is written if one of the ids already exists."""
+    return await add_requirement_items(project_id, payloads, idempotent=idempotent)
 
 async def list_by_project(project_id: str) -> List[RequirementStructure]:
     return await get_requirements_by_project(project_id)
@@ -38,4 +37,8 @@ async def update(project_id: str, data: RequirementStructure) -> RequirementStru
 
 
 async def remove(project_id: str, doc_id: str) -> RequirementStructure | None:
-    return await delete_requirement(project_id, doc_id)
\ No newline at end of file
+    return await delete_requirement(project_id, doc_id)
+
+
+async def remove_many(project_id: str, doc_ids: List[str]) -> bool:
+    return await delete_requirements(project_id, doc_ids)
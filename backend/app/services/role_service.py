@@ -7,6 +7,7 @@ from app.domain.project import Project
 import asyncio
 from app.repositories.users_repo import get_users_by_role
 from app.core.observability import logger
+from app.services import permission_service
 from app.repositories.roles_repo import (
     create_role,
     get_roles_by_project,
@@ -62,11 +63,17 @@ async def get_by_id(doc_id: UUID) -> RoleDomain | None:
 
 
 async def update(payload: RoleDomain) -> RoleDomain | None:
-    return await update_role(payload)
+    role = await update_role(payload)
+    if role:
+        permission_service.invalidate_project(role.project_id)
+    return role
 
 
 async def remove(doc_id: str) -> RoleDomain | None:
-    return await delete_role(doc_id)
+    role = await delete_role(doc_id)
+    if role:
+        permission_service.invalidate_project(role.project_id)
+    return role
 
 
 async def user_has_permission(user: User, project: Project, permission: str) -> bool:
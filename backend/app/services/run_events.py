@@ -0,0 +1,43 @@
+"""
+Lecture des événements de progression d'un run (Redis Stream run:{run_id}:events)
+pour les endpoints WebSocket et SSE.
+
+Le client reprend depuis le dernier id reçu : une reconnexion ne rejoue que ce
+qu'il a manqué, sans repasser par GET /v1/runs/{run_id} et son state complet.
+"""
+from typing import AsyncIterator, Optional, Tuple
+
+from app.core.events import read_run_events
+from app.repositories import runs_repo
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+IDLE_BLOCK_MS = 15000
+
+
+def is_terminal_event(message: str) -> bool:
+    return message.startswith("STATUS:succeeded") or message.startswith("STATUS:failed")
+
+
+async def iter_run_events(
+    run_id, last_id: Optional[str] = None, block_ms: int = IDLE_BLOCK_MS
+) -> AsyncIterator[Optional[Tuple[str, str]]]:
+    """
+    Produit (event_id, message) à partir de `last_id` (tout l'historique si None),
+    puis suit le stream en direct. Produit None à chaque attente sans événement
+    (keepalive pour l'appelant). S'arrête après le statut final du run.
+    """
+    cursor = last_id or "0-0"
+    while True:
+        events = await read_run_events(run_id, cursor, block_ms=block_ms)
+        if not events:
+            # Stream expiré ou run terminé sans nouvel événement : inutile d'attendre
+            run = await runs_repo.get_run(run_id)
+            if run is None or run.status in TERMINAL_STATUSES:
+                return
+            yield None
+            continue
+        for event_id, message in events:
+            cursor = event_id
+            yield event_id, message
+            if is_terminal_event(message):
+                return
@@ -7,20 +7,23 @@ from app.domain.task import TaskDomain, TaskStructure
 from app.repositories.tasks_repo import (
     get_task_item_by_id,
     create_task,
-    get_task_Container_by_project,
+    add_task_item,
+    add_task_items,
     get_tasks_by_project,
+    get_tasks_by_assignee,
     get_task_by_id,
     update_task_item,
     remove_task_item,
+    remove_task_items,
 )
 from app.services.email_service import send_task_assignment_email
 from app.repositories.users_repo import get_user, get_user_by_info_id
 from beanie import PydanticObjectId
 
 
-async def create(project_id: str, payload: dict) -> TaskStructure:
-    task = await get_task_Container_by_project(project_id)
-
+def _build_task(payload) -> TaskStructure:
+    """Build a TaskStructure from a dict payload (or object with attributes).
+    A string `assignee_id` is normalized to an ObjectId on the payload as well."""
     # helper to support dict payloads or objects with attributes
     def _get(key):
         return payload.get(key) if isinstance(payload, dict) else getattr(payload, key, None)
@@ -40,7 +43,7 @@ async def create(project_id: str, payload: dict) -> TaskStructure:
             pass
         _set("assignee_id", assignee_id)
 
-    newTask = TaskStructure(
+    return TaskStructure(
         title=_get("title"),
         description=_get("description"),
         assignee_id=assignee_id,
@@ -50,24 +53,45 @@ async def create(project_id: str, payload: dict) -> TaskStructure:
         asign_date=_get("asign_date") if assignee_id else None,
     )
 
-    if not task:
-        task = TaskDomain(project_id=project_id, data=[newTask])
-    else:
-        task.data.append(newTask)
 
-    await task.save()
+async def create(project_id: str, payload: dict) -> TaskStructure:
+    newTask = _build_task(payload)
+
+    await add_task_item(project_id, newTask)
 
     # Send email notification if task has an assignee
-    if _get("assignee_id"):
+    if newTask.assignee_id:
         print("Sending email notification for new task assignment...")
         await send_task_assignment_email(payload)
 
-    # Return the persisted item (may have server-side defaults such as object id / timestamps)
-    return task.data[-1]
+    # Return the persisted item (object id / timestamps are set client-side)
+    return newTask
+
 
+async def create_many(
+    project_id: str, payloads: List[dict], item_ids: Optional[List[PydanticObjectId]] = None
+) -> List[TaskStructure]:
+    """Validate all payloads first, then persist them in a single round-trip ($push/$each).
+    With `item_ids` (stable ids), the write is idempotent: replaying it adds nothing."""
+    tasks = [_build_task(payload) for payload in payloads]
+    if item_ids is not None:
+        for task, item_id in zip(tasks, item_ids):
+            task.id = item_id
+    await add_task_items(project_id, tasks, idempotent=item_ids is not None)
 
-async def list_by_project(project_id: str) -> List[dict]:
-    tasks = await get_tasks_by_project(project_id)
+    for payload, task in zip(payloads, tasks):
+        if task.assignee_id:
+            await send_task_assignment_email(payload)
+
+    return tasks
+
+
+async def list_by_project(project_id: str, assignee_id: Optional[str] = None) -> List[dict]:
+    # assignee_id: only that member's tasks (index project_id + assignee_id in "items" storage)
+    if assignee_id:
+        tasks = await get_tasks_by_assignee(project_id, assignee_id)
+    else:
+        tasks = await get_tasks_by_project(project_id)
     if not tasks:
         return []
     result = []
@@ -139,3 +163,7 @@ async def update(project_id: str, payload: dict) -> TaskStructure | None:
 
 async def remove(project_id: str, doc_id: str) -> TaskStructure | None:
     return await remove_task_item(project_id, doc_id)
+
+
+async def remove_many(project_id: str, doc_ids: List[str]) -> bool:
+    return await remove_task_items(project_id, doc_ids)
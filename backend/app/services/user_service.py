@@ -26,7 +26,7 @@ from app.repositories.invitations_repo import (
     get_invitation_by_id
 )
 from app.repositories.projects_repo import get_project as get_project_by_id, add_member
-from app.services.role_service import user_has_permission
+from app.services import permission_service
 from app.services.email_service import send_invitation_email
 from app.utils.jwt_helper import generate_invitation_token
 from app.core.config import Settings
@@ -198,25 +198,24 @@ async def search_users_by_project(project_id: str, query: str, limit: int = 10)
 
     return result
 
-async def isAllowed(info_id: str, project_id: str,permission: str) -> User | None:
-    user = await get_user_by_info_id_and_projectId(info_id, project_id)
-    if not user:
-        return None
-    project = await get_project_by_id(project_id)
-    if not project:
-        return None
-    print("Checking permission", user.id, project.id, permission)
-    return await user_has_permission(user, project, permission)
+async def isAllowed(info_id: str, project_id: str,permission: str) -> bool:
+    # Membership + role resolved in one aggregation, memoized per (info_id, project_id)
+    return await permission_service.has_permission(info_id, project_id, permission)
     
 async def update(user_id: str, data: dict) -> User | None:
-    return await update_user(user_id, data)
+    user = await update_user(user_id, data)
+    if user:
+        permission_service.invalidate_project(user.project_id)
+    return user
 
 
 async def remove(project_id: str, user_id: str) -> User | None:
     user = await get_user(user_id)
     if str(user.project_id) != project_id:
         return None
-    return await delete_user(user_id)
+    deleted = await delete_user(user_id)
+    permission_service.invalidate_project(project_id)
+    return deleted
 
 async def assign_role(Project_id: str, payload: object) -> User | None:
     # Support dict or Pydantic model payloads
@@ -234,7 +233,9 @@ async def assign_role(Project_id: str, payload: object) -> User | None:
     role = await get_role_by_id(role_id)
     if not role:
         return None
-    return await set_role(user.id, role.id)
+    updated = await set_role(user.id, role.id)
+    permission_service.invalidate_project(Project_id)
+    return updated
 
 async def get_user_permission_by_info_id(project_id: str, info_id: str) -> dict | None:
     user = await get_user_by_info_id_and_projectId(info_id, project_id)
@@ -293,6 +294,7 @@ async def accept_project_invitation(token: str, current_user: dict) -> dict:
     # Check if user already exists in this project
     existing_user = await get_user_by_info_id_and_projectId(info_id, project_id)
     if existing_user:
+        permission_service.invalidate_project(project_id)
         # Mark invitation as accepted
         await update_invitation_status(invitation, "accepted")
         return {
@@ -324,6 +326,7 @@ async def accept_project_invitation(token: str, current_user: dict) -> dict:
     
     # Add user to project members
     await add_member(PydanticObjectId(project_id), created_user.id)
+    permission_service.invalidate_project(project_id)
     
     # Mark invitation as accepted
     await update_invitation_status(invitation, "accepted")
@@ -0,0 +1,181 @@
+"""
+Benchmark de projects_repo.list_for_user : implémentation N+1 d'origine vs
+requêtes batchées ($in).
+
+Crée une base Mongo jetable, y insère un utilisateur membre de N projets
+(avec 3 membres et 2 rôles par projet), puis mesure pour chaque N le nombre de
+commandes Mongo envoyées et la latence des deux implémentations.
+
+Usage (depuis backend/) :
+    python -m scripts.bench_list_for_user --uri mongodb://localhost:27017 --sizes 1 50 500
+La base `bench_list_for_user` est supprimée à la fin (sauf --keep).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.domain.project import Project
+from app.domain.role import RoleDomain
+from app.domain.user import User
+from app.repositories.projects_repo import list_for_user
+
+DB_NAME = "bench_list_for_user"
+INFO_ID = "bench-user"
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# ------------------------------------------------------------
+# Implémentation d'origine (une série de requêtes par projet)
+# ------------------------------------------------------------
+async def legacy_list_for_user(user_id: str) -> List[dict]:
+    """Return projects for a user with projection:
+    - id, name, description, members (name + role name), created_at, updated_at
+    """
+    # Find any user docs that reference this external user id to collect project ids
+    user_docs = await User.find({"info_id": user_id}).to_list()
+    project_ids_from_users = [u.project_id for u in user_docs if getattr(u, "project_id", None) is not None]
+
+    query = {"$or": [{"created_by": user_id}]}
+    if project_ids_from_users:
+        query["$or"].append({"_id": {"$in": project_ids_from_users}})
+
+    projects = await Project.find(query).to_list()
+
+    # Pre-fetch roles for efficiency per project later
+    results: List[dict] = []
+    for proj in projects:
+        # resolve members as users that reference this project
+        members = await User.find({"project_id": proj.id}).to_list()
+        # gather role ids to resolve names
+        role_ids = list({m.role_id for m in members if getattr(m, "role_id", None) is not None})
+        roles_map = {}
+        if role_ids:
+            roles = await RoleDomain.find({"_id": {"$in": role_ids}}).to_list()
+            roles_map = {r.id: r.name for r in roles}
+
+        members_list = []
+        for m in members:
+            members_list.append({
+                "name": m.name,
+                "role_name": roles_map.get(m.role_id) if getattr(m, "role_id", None) is not None else None,
+            })
+
+        # Resolve owner name: prefer a User doc tied to this project, fallback to any User with the info_id
+        owner_name = proj.created_by
+        owner_user = await User.find_one({"info_id": proj.created_by, "project_id": proj.id})
+        if not owner_user:
+            owner_user = await User.find_one({"info_id": proj.created_by})
+        if owner_user:
+            owner_name = owner_user.name
+
+        results.append({
+            "id": str(proj.id),
+            "name": proj.name,
+            "description": proj.description,
+            "full_description": proj.full_description,
+            "owner": {
+                "id": proj.created_by,
+                "name": owner_name
+                },
+            "members": members_list,
+            "created_at": proj.created_at,
+            "updated_at": proj.updated_at,
+        })
+
+    return results
+
+
+async def seed(n_projects: int) -> None:
+    await Project.delete_all()
+    await User.delete_all()
+    await RoleDomain.delete_all()
+
+    projects, users, roles = [], [], []
+    for i in range(n_projects):
+        # les projets impairs ont été créés par quelqu'un d'autre : l'utilisateur y est invité
+        creator = INFO_ID if i % 2 == 0 else f"owner-{i}"
+        project = Project(name=f"Project {i}", description="bench", created_by=creator)
+        owner_role = RoleDomain(project_id=project.id, name="Owner", permissions=["manage_project"])
+        dev_role = RoleDomain(project_id=project.id, name="Dev", permissions=["view_tasks"])
+        members = [
+            User(info_id=creator, name=f"Owner {i}", project_id=project.id, role_id=owner_role.id),
+            User(info_id=f"dev-{i}", name=f"Dev {i}", project_id=project.id, role_id=dev_role.id),
+        ]
+        if creator != INFO_ID:
+            members.append(User(info_id=INFO_ID, name="Bench User", project_id=project.id, role_id=dev_role.id))
+        project.members = [m.id for m in members]
+        projects.append(project)
+        roles += [owner_role, dev_role]
+        users += members
+
+    await Project.insert_many(projects)
+    await RoleDomain.insert_many(roles)
+    await User.insert_many(users)
+
+
+async def measure(fn, counter: CommandCounter, repeat: int) -> tuple[int, float, list]:
+    timings: List[float] = []
+    commands = 0
+    result = []
+    for _ in range(repeat):
+        counter.count = 0
+        t0 = time.perf_counter()
+        result = await fn(INFO_ID)
+        timings.append((time.perf_counter() - t0) * 1000)
+        commands = counter.count
+    return commands, statistics.median(timings), result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="ne pas supprimer la base de bench")
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(args.uri, event_listeners=[counter])
+    await init_beanie(database=client[DB_NAME], document_models=[Project, User, RoleDomain])
+
+    print(f"{'projects':>8} | {'impl':>8} | {'commands':>8} | {'median ms':>10} | {'rows':>5}")
+    print("-" * 52)
+    try:
+        for n in args.sizes:
+            await seed(n)
+            outputs = []
+            for label, fn in (("legacy", legacy_list_for_user), ("batched", list_for_user)):
+                commands, median_ms, rows = await measure(fn, counter, args.repeat)
+                outputs.append(sorted(rows, key=lambda r: r["id"]))
+                print(f"{n:>8} | {label:>8} | {commands:>8} | {median_ms:>10.1f} | {len(rows):>5}")
+            if outputs[0] != outputs[1]:
+                print(f"WARNING: legacy and batched results differ for {n} projects")
+    finally:
+        if not args.keep:
+            await client.drop_database(DB_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
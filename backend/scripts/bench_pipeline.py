@@ -0,0 +1,195 @@
+"""
+Benchmark de bout en bout de run_blueprint_pipeline avec le provider LLM
+factice (MODEL_PROVIDER=fake) : mesure le coût de notre code, hors LLM.
+
+Lance N pipelines (C en parallèle) contre une base Mongo jetable et Redis, puis
+affiche la latence par noeud (p50 / p95 / max), la latence des pipelines, le
+débit, la part des tokens d'entrée servis par le cache de prompt (simulé), le
+nombre de commandes Mongo et les octets envoyés par les écritures.
+
+Usage (depuis backend/) :
+    python -m scripts.bench_pipeline --runs 20 --concurrency 5 --latency-ms 200
+Options utiles :
+    --jitter-ms 50        jitter de la latence factice
+    --no-stream           appels LLM sans streaming (LLM_STREAMING=false)
+    --sequential          graphe séquentiel (PIPELINE_PARALLEL=false)
+    --mock-mongo          mongomock_motor au lieu d'un vrai Mongo (pas de comptage des commandes)
+    --fake-redis          fakeredis au lieu de REDIS_URL
+La base `bench_pipeline` est supprimée à la fin (sauf --keep).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import defaultdict
+
+DB_NAME = "bench_pipeline"
+IDEA = "A platform where students can find tutors, book sessions and pay online"
+WRITE_COMMANDS = {"insert", "update", "findAndModify", "delete"}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-stream", action="store_true")
+    parser.add_argument("--sequential", action="store_true")
+    parser.add_argument("--mock-mongo", action="store_true")
+    parser.add_argument("--fake-redis", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="ne pas supprimer la base de bench")
+    return parser.parse_args()
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    # Doit précéder tout import de app.* (la config est lue à l'import)
+    os.environ["MODEL_PROVIDER"] = "fake"
+    os.environ["LLM_PROVIDERS"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["LLM_STREAMING"] = "false" if args.no_stream else "true"
+    os.environ["PIPELINE_PARALLEL"] = "false" if args.sequential else "true"
+    # Chaque run doit payer ses appels LLM (sinon tout est servi par le cache après le 1er)
+    os.environ.setdefault("LLM_CACHE_BACKEND", "none")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("JWT_ACCESS_SECRET", "bench")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def main() -> None:
+    args = parse_args()
+    configure_env(args)
+
+    import bson
+    from beanie import init_beanie
+    from pymongo import monitoring
+
+    from app.agents.graph import add_node_observer, run_blueprint_pipeline
+    from app.core import events
+    from app.core.config import settings
+    from app.domain.exports import ExportDomain
+    from app.domain.planner import PlannerDomain
+    from app.domain.project import Project
+    from app.llm.provider import get_usage_stats
+    from app.llm.router import get_llm_router
+    from app.repositories import runs_repo
+    from app.domain.registry import DOCUMENT_MODELS
+
+    class CommandCounter(monitoring.CommandListener):
+        def __init__(self):
+            self.count = 0
+            self.write_bytes = 0
+
+        def started(self, event):
+            self.count += 1
+            if event.command_name in WRITE_COMMANDS:
+                self.write_bytes += len(bson.encode(event.command))
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    counter = CommandCounter()
+    if args.mock_mongo:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.uri, event_listeners=[counter])
+    await init_beanie(database=client[DB_NAME], document_models=list(DOCUMENT_MODELS))
+
+    if args.fake_redis:
+        import fakeredis
+        events._async_redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    node_timings: dict[str, list[float]] = defaultdict(list)
+    node_errors: dict[str, int] = defaultdict(int)
+
+    def observe(name, run_id, seconds, error):
+        node_timings[name].append(seconds * 1000)
+        if error is not None:
+            node_errors[name] += 1
+
+    add_node_observer(observe)
+
+    # Projets + runs créés avant la mesure
+    runs = []
+    for i in range(args.runs):
+        project = Project(name=f"Bench {i}", created_by="bench")
+        await project.insert()
+        await ExportDomain(project_id=project.id).insert()
+        await PlannerDomain(project_id=project.id).insert()
+        run = await runs_repo.create_run(project_id=project.id, state={"idea": IDEA})
+        runs.append((str(project.id), run.id))
+
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    pipeline_timings: list[float] = []
+    failures = 0
+
+    async def one(project_id, run_id):
+        nonlocal failures
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                await run_blueprint_pipeline(project_id=project_id, run_id=run_id, idea=IDEA)
+            except Exception as e:
+                failures += 1
+                print(f"run {run_id} failed: {e}")
+            pipeline_timings.append((time.perf_counter() - t0) * 1000)
+
+    counter.count = counter.write_bytes = 0
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(pid, rid) for pid, rid in runs))
+        wall = time.perf_counter() - started
+        await events.get_publisher().flush()
+
+        print(
+            f"runs={args.runs} concurrency={args.concurrency} latency={args.latency_ms}ms "
+            f"jitter={args.jitter_ms}ms streaming={settings.llm_streaming} parallel={settings.pipeline_parallel}"
+        )
+        print(f"{'node':>12} | {'count':>5} | {'p50 ms':>8} | {'p95 ms':>8} | {'max ms':>8} | {'errors':>6}")
+        print("-" * 62)
+        for name, timings in list(node_timings.items()) + [("pipeline", pipeline_timings)]:
+            print(
+                f"{name:>12} | {len(timings):>5} | {statistics.median(timings):>8.1f} | "
+                f"{percentile(timings, 0.95):>8.1f} | {max(timings):>8.1f} | {node_errors.get(name, failures if name == 'pipeline' else 0):>6}"
+            )
+        print("-" * 62)
+        print(f"throughput: {args.runs / wall:.2f} runs/s (wall {wall:.2f}s)")
+        fake = get_llm_router().client("fake")
+        print(f"llm calls: {fake.calls} ({fake.calls / args.runs:.1f} per run)")
+        usage = get_usage_stats()
+        if usage["input_tokens"]:
+            print(
+                f"llm input tokens: {usage['input_tokens']}, cached: {usage['cached_input_tokens']} "
+                f"({usage['cached_input_tokens'] / usage['input_tokens']:.0%})"
+            )
+        if args.mock_mongo:
+            print("mongo: n/a with --mock-mongo")
+        else:
+            print(
+                f"mongo commands: {counter.count} ({counter.count / args.runs:.1f} per run), "
+                f"write bytes: {counter.write_bytes} ({counter.write_bytes / args.runs / 1024:.1f} KiB per run)"
+            )
+    finally:
+        if not args.keep and not args.mock_mongo:
+            await client.drop_database(DB_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
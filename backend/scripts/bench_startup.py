@@ -0,0 +1,84 @@
+"""
+Benchmark du démarrage à froid : temps d'import de l'API (app.main) et du
+worker RQ (app.jobs.worker), mesurés dans des processus neufs avec
+`python -X importtime`.
+
+Pour chaque module : durée médiane de l'import sur --runs processus, puis les
+imports les plus coûteux (temps cumulé) du dernier passage. Sert à vérifier
+qu'aucun import lourd (LangChain, LangGraph, autogen...) ne revient dans le
+chemin de démarrage.
+
+Usage (depuis backend/) :
+    python -m scripts.bench_startup
+    python -m scripts.bench_startup --module app.main --runs 10 --top 25
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["app.main", "app.jobs.worker"]
+# Préfixes des piles chargées à la demande (signalées si présentes au démarrage)
+LAZY_STACKS = ("langchain", "langgraph", "autogen", "openai")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", default=[], help="module à importer (répétable)")
+    parser.add_argument("--runs", type=int, default=5, help="processus par module")
+    parser.add_argument("--top", type=int, default=15, help="imports les plus coûteux affichés")
+    return parser.parse_args()
+
+
+def import_once(module: str) -> list[tuple[int, int, str]]:
+    """Importe `module` dans un nouvel interpréteur ; renvoie (self_us, cumulative_us, nom)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"import {module} failed: {error}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        entries.append((int(self_us), int(cumulative), name.rstrip()))
+    return entries
+
+
+def bench(module: str, runs: int, top: int) -> None:
+    totals = []
+    entries: list[tuple[int, int, str]] = []
+    for _ in range(max(1, runs)):
+        entries = import_once(module)
+        root = next((e for e in reversed(entries) if e[2].strip() == module), None)
+        totals.append((root[1] if root else sum(e[0] for e in entries)) / 1000)
+
+    print(f"{module}: median {statistics.median(totals):.0f} ms (min {min(totals):.0f}, max {max(totals):.0f}, {len(totals)} runs)")
+    for self_us, cumulative, name in sorted(entries, key=lambda e: e[1], reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+
+    loaded = sorted({
+        name.strip().split(".")[0] for _, _, name in entries if name.strip().startswith(LAZY_STACKS)
+    })
+    if loaded:
+        print(f"  WARNING: lazy stacks imported at startup: {', '.join(loaded)}")
+
+
+def main() -> None:
+    args = parse_args()
+    for module in args.module or DEFAULT_MODULES:
+        bench(module, args.runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Migration en ligne des projets du stockage "embedded" (tableau `data` des
+conteneurs tasks / diagrams / requirements / logs / chats) vers le stockage
+"items" (un document par élément, voir app/repositories/item_store.py).
+
+Par lot de projets, l'API restant en service :
+1. storage_mode = "migrating" : les écritures partent dans les collections
+   d'éléments, les lectures fusionnent conteneur + collection ;
+2. attente de ITEM_STORAGE_MODE_CACHE_SECONDS : plus aucun processus n'écrit
+   dans les conteneurs de ces projets ;
+3. copie des éléments des conteneurs ($setOnInsert par _id : rejouable, un
+   élément modifié pendant la migration n'est pas écrasé) ;
+4. storage_mode = "items", puis les tableaux `data` sont vidés (sauf --keep-containers).
+Un projet resté en "migrating" (script interrompu) est repris au lancement suivant.
+
+Usage (depuis backend/) :
+    python -m scripts.migrate_item_storage --dry-run
+    python -m scripts.migrate_item_storage --batch 100
+    python -m scripts.migrate_item_storage --project 665f... --project 6660...
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.domain.chats import ChatDomain
+from app.domain.diagram import DiagramDomain, DiagramItemDomain, DiagramStructure
+from app.domain.log import LogDomain, LogEntry, LogItemDomain
+from app.domain.project import Project
+from app.domain.requirement import RequirementDomain, RequirementItemDomain, RequirementStructure
+from app.domain.task import TaskDomain, TaskItemDomain, TaskStructure
+from app.repositories import chat_repo
+from app.repositories.embedded_items import get_collection, to_object_id
+from app.repositories.item_store import ItemStorage, set_storage_mode
+from app.repositories.session import init_db
+
+STORAGES = {
+    "tasks": ItemStorage(TaskDomain, TaskItemDomain, TaskStructure),
+    "diagrams": ItemStorage(DiagramDomain, DiagramItemDomain, DiagramStructure),
+    "requirements": ItemStorage(RequirementDomain, RequirementItemDomain, RequirementStructure),
+    "logs": ItemStorage(LogDomain, LogItemDomain, LogEntry),
+}
+CONTAINERS = {
+    "tasks": TaskDomain,
+    "diagrams": DiagramDomain,
+    "requirements": RequirementDomain,
+    "logs": LogDomain,
+    "chats": ChatDomain,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project", action="append", default=[], help="projet à migrer (répétable ; défaut : tous)")
+    parser.add_argument("--batch", type=int, default=50, help="projets passés en migration ensemble")
+    parser.add_argument("--keep-containers", action="store_true", help="ne pas vider les tableaux `data`")
+    parser.add_argument("--dry-run", action="store_true", help="affiche les projets et le nombre d'éléments")
+    return parser.parse_args()
+
+
+async def select_projects(project_ids: list[str]) -> list:
+    query: dict = {"storage_mode": {"$in": [None, "embedded", "migrating"]}}
+    if project_ids:
+        query["_id"] = {"$in": [oid for oid in (to_object_id(p) for p in project_ids) if oid is not None]}
+    cursor = get_collection(Project).find(query, {"_id": 1}).sort("_id", 1)
+    return [doc["_id"] async for doc in cursor]
+
+
+async def count_items(pid) -> dict[str, int]:
+    counts = {}
+    for kind, container in CONTAINERS.items():
+        doc = await get_collection(container).find_one({"project_id": pid}, {"data": 1})
+        data = (doc or {}).get("data") or []
+        counts[kind] = sum(len(c.get("user_chat") or []) for c in data) if kind == "chats" else len(data)
+    return counts
+
+
+async def migrate_project(pid, keep_containers: bool) -> dict[str, int]:
+    copied = {kind: await storage.migrate(pid) for kind, storage in STORAGES.items()}
+    copied["chats"] = await chat_repo.migrate_chat_messages(pid)
+    await set_storage_mode(pid, "items")
+    if not keep_containers:
+        for storage in STORAGES.values():
+            await storage.clear_container(pid)
+        await chat_repo.clear_chat_container(pid)
+    return copied
+
+
+async def main() -> None:
+    args = parse_args()
+    await init_db()
+
+    projects = await select_projects(args.project)
+    print(f"{len(projects)} project(s) to migrate")
+    if args.dry_run:
+        for pid in projects:
+            print(f"  {pid}: {await count_items(pid)}")
+        return
+
+    wait = settings.item_storage_mode_cache_seconds
+    batch_size = max(1, args.batch)
+    for start in range(0, len(projects), batch_size):
+        batch = projects[start:start + batch_size]
+        for pid in batch:
+            await set_storage_mode(pid, "migrating")
+        # Les autres processus voient "migrating" au plus tard après le TTL de leur cache
+        print(f"batch {start // batch_size + 1}: {len(batch)} project(s) migrating, waiting {wait}s")
+        await asyncio.sleep(wait)
+        for pid in batch:
+            copied = await migrate_project(pid, args.keep_containers)
+            print(f"  {pid}: copied {copied}")
+    print("done")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Compare les index déclarés (`Settings.indexes` des documents de app/domain) aux
+index existants, construit les manquants et liste ceux qui ne servent pas.
+
+Les index non déclarés ou inutilisés sont seulement signalés : à supprimer à la
+main après vérification ($indexStats est remis à zéro au redémarrage de mongod
+et ne couvre que le membre du replica set interrogé).
+
+Usage (depuis backend/) :
+    python -m scripts.reconcile_indexes --dry-run
+    python -m scripts.reconcile_indexes
+    python -m scripts.reconcile_indexes --report-unused
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.domain.registry import DOCUMENT_MODELS
+from app.repositories.indexes import reconcile_indexes, unused_indexes
+from app.repositories.session import init_db
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="affiche les index manquants sans les construire")
+    parser.add_argument("--report-unused", action="store_true", help="liste les index sans accès ($indexStats)")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    await init_db()
+    documents = DOCUMENT_MODELS
+
+    diffs = await reconcile_indexes(documents, dry_run=args.dry_run)
+    for diff in diffs:
+        missing = [model.document["name"] for model in diff.missing]
+        if missing or diff.extra:
+            action = "missing" if args.dry_run else "built"
+            print(f"{diff.collection}: {action} {missing or '-'}, undeclared {diff.extra or '-'}")
+    print(f"{sum(len(diff.missing) for diff in diffs)} missing index(es) across {len(diffs)} collection(s)")
+
+    if args.report_unused:
+        unused = await unused_indexes(documents)
+        print(f"{len(unused)} unused index(es)")
+        for entry in unused:
+            print(f"  {entry['collection']}.{entry['name']} {entry['key']} (no access since {entry['since']})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,6 +3,15 @@ export type RealtimeEvent =
   | { type: 'presence.join' | 'presence.leave'; projectId: string; pageId: string; user: any }
   | { type: 'crud'; projectId: string; pageId: string; action: 'create' | 'update' | 'delete'; entity: string; data: any };
 
+// Server batches cursor moves into one frame per room tick; connectRealtime
+// unpacks it into individual 'cursor' events (skipping our own cursor).
+type CursorsFrame = {
+  type: 'cursors';
+  projectId: string;
+  pageId: string;
+  cursors: Array<{ user: any; x: number; y: number; ts?: number }>;
+};
+
 export type RealtimeConnection = {
   socket: WebSocket;
   sendCursor: (x: number, y: number) => void;
@@ -53,6 +62,14 @@ export function connectRealtime(
   socket.onmessage = (e) => {
     try {
       const data = JSON.parse(e.data);
+      if (data?.type === 'cursors' && Array.isArray(data.cursors)) {
+        const frame = data as CursorsFrame;
+        for (const c of frame.cursors) {
+          if (!c?.user || String(c.user.id) === String(minimalUser.id)) continue;
+          options?.onMessage?.({ type: 'cursor', projectId: frame.projectId, pageId: frame.pageId, user: c.user, x: c.x, y: c.y, ts: c.ts });
+        }
+        return;
+      }
       options?.onMessage?.(data as RealtimeEvent);
     } catch (_) {
       /* ignore */